@@ -0,0 +1,302 @@
+"""
+Greedy Forward Selection for the Short Quiz
+
+Taking the top N of a single importance ranking (feature_selection_script.py,
+train_short_model.py) ignores redundancy: two questions that measure the same
+thing both rank high. This script builds the quiz one question at a time,
+always adding the question that most improves validation performance given
+the questions already chosen, and records the full 60-step path once. Any
+short quiz length N is then read off the path (top_N_questions.json).
+
+The proxy model is LDA computed from streaming sufficient statistics (class
+counts, class sums and the 60 x 60 cross-product matrix), so no model is
+refitted per candidate. Scores are kept in whitened coordinates: adding
+question j to the chosen set S only needs one new whitened column,
+
+    z_j = (x_j - Z_S l) / d,    l = L_S^-1 Sigma_Sj,    d^2 = Sigma_jj - |l|^2
+
+and updates every class score by z_j * m_cj - m_cj^2 / 2, which is exact LDA
+on S + {j} in O(rows x |S|) instead of a refit. Candidates are scored in
+parallel worker processes, and every evaluated subset is cached on disk
+(forward_selection_cache.json) so reruns and longer paths reuse earlier work.
+The cache and the saved path (forward_selection_path.csv) record a hash of
+the data and split they were computed on (as in run_artifacts.py) and are
+ignored when it no longer matches; --recompute ignores both.
+
+Candidates are ranked by validation accuracy, ties broken by validation
+log-likelihood. Uses the same data split as train_short_model.py.
+
+Usage:
+    python forward_selection.py [--workers 8] [--write 20 35]
+    python forward_selection.py --write 25          # reuse the saved path
+"""
+
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import solve_triangular
+from scipy.special import logsumexp
+
+from train_short_model import SCRIPT_DIR, load_and_preprocess_data, split_data
+from run_artifacts import dataset_hash, split_hash
+
+PATH_FILE = os.path.join(SCRIPT_DIR, 'forward_selection_path.csv')
+CACHE_FILE = os.path.join(SCRIPT_DIR, 'forward_selection_cache.json')
+# Rows accumulated per chunk when computing the sufficient statistics
+CHUNK_ROWS = 8192
+# Ridge added to the pooled covariance (relative to its mean variance)
+RIDGE = 1e-6
+
+# Per-worker state, set by init_worker
+_worker = {}
+
+
+class LDAStatistics:
+    """Mergeable sufficient statistics for LDA with a pooled covariance"""
+
+    def __init__(self, n_classes, n_features):
+        self.counts = np.zeros(n_classes)
+        self.sums = np.zeros((n_classes, n_features))
+        self.cross = np.zeros((n_features, n_features))
+
+    def update(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        self.counts += np.bincount(y, minlength=len(self.counts))
+        np.add.at(self.sums, y, X)
+        self.cross += X.T @ X
+        return self
+
+    def finalize(self):
+        """(class means, pooled within-class covariance, log priors)"""
+        means = self.sums / self.counts[:, None]
+        within = self.cross - (self.sums.T / self.counts) @ self.sums
+        covariance = within / (self.counts.sum() - len(self.counts))
+        covariance += np.eye(len(covariance)) * RIDGE * np.trace(covariance) / len(covariance)
+        return means, covariance, np.log(self.counts / self.counts.sum())
+
+
+class SubsetState:
+    """Whitened LDA state for a chosen question set S on one evaluation matrix"""
+
+    def __init__(self, X, means, covariance, log_priors):
+        self.X = X
+        self.means = means
+        self.covariance = covariance
+        self.selected = []
+        self.L = np.zeros((0, 0))                    # Cholesky factor of Sigma_SS
+        self.Z = np.zeros((len(X), 0))               # whitened rows
+        self.M = np.zeros((len(means), 0))           # whitened class means
+        self.scores = np.tile(log_priors, (len(X), 1))
+
+    def candidate(self, j):
+        """(l, d, z_j, m_j) for adding question j"""
+        S = self.selected
+        l = solve_triangular(self.L, self.covariance[S, j], lower=True) if S else np.zeros(0)
+        d = np.sqrt(max(self.covariance[j, j] - l @ l, 1e-12))
+        z = (self.X[:, j] - self.Z @ l) / d
+        m = (self.means[:, j] - self.M @ l) / d
+        return l, d, z, m
+
+    def candidate_scores(self, j):
+        _, _, z, m = self.candidate(j)
+        return self.scores + np.outer(z, m) - 0.5 * m ** 2
+
+    def add(self, j):
+        l, d, z, m = self.candidate(j)
+        k = len(self.selected)
+        L = np.zeros((k + 1, k + 1))
+        L[:k, :k] = self.L
+        L[k, :k] = l
+        L[k, k] = d
+        self.L = L
+        self.Z = np.column_stack([self.Z, z])
+        self.M = np.column_stack([self.M, m])
+        self.scores = self.scores + np.outer(z, m) - 0.5 * m ** 2
+        self.selected.append(j)
+
+
+def evaluate_scores(scores, y):
+    """(accuracy, mean log-likelihood) of class scores"""
+    accuracy = float(np.mean(scores.argmax(axis=1) == y))
+    log_posterior = scores[np.arange(len(y)), y] - logsumexp(scores, axis=1)
+    return accuracy, float(log_posterior.mean())
+
+
+def init_worker(X_val, y_val, means, covariance, log_priors):
+    _worker.update(X=X_val, y=y_val, means=means, covariance=covariance,
+                   log_priors=log_priors, state=None)
+
+
+def evaluate_candidates(task):
+    """Score adding each of `candidates` to `selected` on the validation set"""
+    selected, candidates = task
+    state = _worker['state']
+    if state is None or state.selected != list(selected):
+        # Rebuild from scratch only when the chosen set changed (once per step)
+        state = SubsetState(_worker['X'], _worker['means'], _worker['covariance'],
+                            _worker['log_priors'])
+        for j in selected:
+            state.add(j)
+        _worker['state'] = state
+    return [(j,) + evaluate_scores(state.candidate_scores(j), _worker['y']) for j in candidates]
+
+
+def subset_key(features):
+    return ','.join(str(j) for j in sorted(features))
+
+
+def data_key(X, y, X_train, X_val, X_test):
+    """Hash of the data and split that the path and cache are computed on"""
+    return (f"{dataset_hash(pd.concat([X, y], axis=1))}-"
+            f"{split_hash(X_train.index, X_val.index, X_test.index)}")
+
+
+def load_cache(key):
+    """Cached subset scores for this data and split (empty if none match)"""
+    if os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE) as f:
+            cache = json.load(f)
+        if cache.get('data_key') == key:
+            return cache['subsets']
+        print(f"Ignoring {CACHE_FILE}: computed on different data or split")
+    return {}
+
+
+def load_path(key):
+    """The saved path if it was computed on this data and split, else None"""
+    if not os.path.exists(PATH_FILE):
+        return None
+    path = pd.read_csv(PATH_FILE)
+    if 'Data Key' not in path.columns or (path['Data Key'] != key).any():
+        print(f"Ignoring {PATH_FILE}: computed on different data or split")
+        return None
+    return path
+
+
+def compute_path(X_train, y_train, X_val, y_val, X_test, y_test, n_classes, workers, key,
+                 use_cache=True):
+    """Full forward selection path: one row per step"""
+    n_features = X_train.shape[1]
+    stats = LDAStatistics(n_classes, n_features)
+    for start in range(0, len(X_train), CHUNK_ROWS):
+        stats.update(X_train[start:start + CHUNK_ROWS], y_train[start:start + CHUNK_ROWS])
+    means, covariance, log_priors = stats.finalize()
+
+    cache = load_cache(key) if use_cache else {}
+    test_state = SubsetState(X_test, means, covariance, log_priors)
+    selected = []
+    path = []
+    start_time = time.perf_counter()
+    with Pool(workers, initializer=init_worker,
+              initargs=(X_val, y_val, means, covariance, log_priors)) as pool:
+        for step in range(1, n_features + 1):
+            remaining = [j for j in range(n_features) if j not in selected]
+            results = {}
+            uncached = []
+            for j in remaining:
+                hit = cache.get(subset_key(selected + [j]))
+                if hit is None:
+                    uncached.append(j)
+                else:
+                    results[j] = tuple(hit)
+            # About four tasks per worker keeps them evenly loaded
+            chunk = max(1, -(-len(uncached) // (4 * workers)))
+            tasks = [(tuple(selected), uncached[i:i + chunk]) for i in range(0, len(uncached), chunk)]
+            for batch in pool.imap_unordered(evaluate_candidates, tasks):
+                for j, accuracy, log_likelihood in batch:
+                    results[j] = (accuracy, log_likelihood)
+                    cache[subset_key(selected + [j])] = [accuracy, log_likelihood]
+
+            best = max(remaining, key=lambda j: (results[j][0], results[j][1], -j))
+            selected.append(best)
+            test_state.add(best)
+            test_accuracy, _ = evaluate_scores(test_state.scores, y_test)
+            path.append({
+                'Step': step,
+                'Index': best,
+                'Val Accuracy': results[best][0],
+                'Val Log-Likelihood': results[best][1],
+                'Test Accuracy': test_accuracy,
+                'Candidates Cached': len(remaining) - len(uncached)
+            })
+            print(f"  Step {step:2d}: +Q{best:<2d}  val acc {results[best][0]:.4f}  "
+                  f"test acc {test_accuracy:.4f}  ({time.perf_counter() - start_time:.1f}s)")
+
+    with open(CACHE_FILE, 'w') as f:
+        json.dump({'data_key': key, 'subsets': cache}, f)
+    return pd.DataFrame(path)
+
+
+def write_top_n(path, feature_names, n, output_dir):
+    """top_N_questions.json in the same format as train_short_model.py"""
+    indices = path['Index'].head(n).astype(int).tolist()
+    questions_data = {
+        'count': n,
+        'indices': indices,  # Indices in original 60-question order, in selection order
+        'features': [feature_names[i] for i in indices],
+        'selection': 'forward',
+        'val_accuracy': float(path['Val Accuracy'].iloc[n - 1]),
+        'test_accuracy': float(path['Test Accuracy'].iloc[n - 1])
+    }
+    output_path = os.path.join(output_dir, f'top_{n}_questions.json')
+    with open(output_path, 'w') as f:
+        json.dump(questions_data, f, indent=2)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Greedy forward selection of quiz questions')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--write', type=int, nargs='*', default=[35],
+                        help='Write top_N_questions.json for these N')
+    parser.add_argument('--recompute', action='store_true',
+                        help='Recompute the path and every subset score, ignoring '
+                             'forward_selection_path.csv and forward_selection_cache.json')
+    parser.add_argument('--output-dir', default=os.path.join(SCRIPT_DIR, 'forward_selection'))
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("GREEDY FORWARD SELECTION (LDA PROXY)")
+    print("=" * 60)
+
+    X, y, feature_names = load_and_preprocess_data()
+    X_train, X_val, X_test, y_train, y_val, y_test, le = split_data(X, y)
+    key = data_key(X, y, X_train, X_val, X_test)
+
+    path = None if args.recompute else load_path(key)
+    if path is not None:
+        print(f"Reusing saved path: {PATH_FILE}")
+    else:
+        X_train, X_val, X_test = (np.asarray(part, dtype=np.float64)
+                                  for part in (X_train, X_val, X_test))
+        path = compute_path(X_train, np.asarray(y_train), X_val, np.asarray(y_val),
+                            X_test, np.asarray(y_test), len(le.classes_), args.workers, key,
+                            use_cache=not args.recompute)
+        path['Feature'] = [feature_names[i] for i in path['Index']]
+        path['Data Key'] = key
+        path.to_csv(PATH_FILE, index=False)
+        print(f"Saved: {PATH_FILE}")
+        print(f"Saved: {CACHE_FILE}")
+
+    best = path.loc[path['Val Accuracy'].idxmax()]
+    print(f"\nBest validation accuracy {best['Val Accuracy']:.4f} at N = {int(best['Step'])}")
+    full = path['Val Accuracy'].iloc[-1]
+    for share in (0.95, 0.98, 0.99):
+        n = int(path.loc[path['Val Accuracy'] >= share * full, 'Step'].min())
+        print(f"  {share:.0%} of the 60-question accuracy with N = {n}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for n in args.write:
+        if not 1 <= n <= len(path):
+            print(f"Skipping N = {n}: outside 1..{len(path)}")
+            continue
+        print(f"Saved: {write_top_n(path, feature_names, n, args.output_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Permutation Importance (and Drop-Column Analysis) Across All Four Models
+
+The *_feature_importance.csv files use each model's native measure (XGBoost
+gain, Random Forest impurity, LR/LDA coefficients), which cannot be compared
+across models. This script scores every question the same way for every
+model: shuffle that question's answers in the test set and measure how much
+the test score drops, repeated R times.
+
+- Permuted copies are built lazily, one block of repeats for one question at
+  a time (block_size x test rows), never as 60 x R full copies of the data.
+  A block is scored with a single predict_proba call.
+- Tasks (question, block of repeats) run in a process pool. The test matrix
+  lives in shared memory, and every permutation is seeded by (question,
+  repeat), so results do not depend on the number of workers.
+- --drop-column also refits each model once per question without it and
+  reports the score lost (much slower: 60 refits per model).
+
+Models are fitted with the hyperparameters of the technique scripts
+(model_params.py, or a tuned params file with --params) on the same
+70/15/15 split, unless a trained joblib file is given with
+--model-file family=path.
+
+Usage:
+    python permutation_importance.py [--models xgb rf lr lda] [--repeats 10] [--workers 8]
+                                     [--params best_params.json]
+"""
+
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from ranking_stability import from_shared, to_shared
+from train_short_model import SCRIPT_DIR, load_and_preprocess_data, split_data
+from model_params import EARLY_STOPPING_ROUNDS, RANDOM_STATE, add_params_argument, load_params
+
+MODEL_NAMES = {
+    'xgb': 'XGBoost',
+    'rf': 'Random Forest',
+    'lr': 'Logistic Regression',
+    'lda': 'LDA'
+}
+
+# Per-worker state, set by init_worker
+_worker = {}
+
+
+def make_model(family, params):
+    """Unfitted model as configured in the technique script"""
+    if family == 'xgb':
+        return XGBClassifier(**params, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    if family == 'rf':
+        return RandomForestClassifier(**params)
+    if family == 'lr':
+        return make_pipeline(StandardScaler(), LogisticRegression(**params))
+    if family == 'lda':
+        return make_pipeline(StandardScaler(), LinearDiscriminantAnalysis(**params))
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def pool_params(family, path=None):
+    """Hyperparameters of a family (n_jobs=1: the pool provides the parallelism)"""
+    params = load_params(family, path)
+    if 'n_jobs' in params:
+        params['n_jobs'] = 1
+    return params
+
+
+def fit_model(family, params, X_train, y_train, X_val, y_val):
+    model = make_model(family, params)
+    if family == 'xgb':
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    else:
+        model.fit(X_train, y_train)
+    return model
+
+
+def single_threaded(model):
+    """Avoid oversubscribing cores: each pool worker predicts on one thread"""
+    final = model.steps[-1][1] if hasattr(model, 'steps') else model
+    if 'n_jobs' in final.get_params():
+        final.set_params(n_jobs=1)
+    return model
+
+
+def score(proba, y, metric):
+    """Higher is better for both metrics (neg_log_loss is the mean log-likelihood)"""
+    if metric == 'accuracy':
+        return float(np.mean(proba.argmax(axis=1) == y))
+    picked = proba[np.arange(len(y)), y]
+    return float(np.mean(np.log(np.clip(picked, 1e-15, 1.0))))
+
+
+def block_scores(model, X, y, column, repeats, metric, seed):
+    """Scores of X with `column` permuted, one per repeat, in one predict call
+
+    Only this block of len(repeats) permuted copies exists at any time.
+    """
+    n_rows = len(X)
+    block = np.tile(X, (len(repeats), 1))
+    for i, repeat in enumerate(repeats):
+        rng = np.random.default_rng([seed, column, repeat])
+        block[i * n_rows:(i + 1) * n_rows, column] = X[rng.permutation(n_rows), column]
+    proba = model.predict_proba(block)
+    return [score(proba[i * n_rows:(i + 1) * n_rows], y, metric) for i in range(len(repeats))]
+
+
+def init_worker(specs, models, params, metric, seed):
+    blocks = []
+    arrays = []
+    for spec in specs:
+        block, array = from_shared(spec)
+        blocks.append(block)
+        arrays.append(array)
+    _worker.update(blocks=blocks, arrays=arrays,
+                   models={family: single_threaded(model) for family, model in models.items()},
+                   params=params, metric=metric, seed=seed)
+
+
+def permutation_task(task):
+    family, column, repeats = task
+    X_train, y_train, X_val, y_val, X_test, y_test = _worker['arrays']
+    scores = block_scores(_worker['models'][family], X_test, y_test, column, repeats,
+                          _worker['metric'], _worker['seed'])
+    return family, column, repeats, scores
+
+
+def drop_column_task(task):
+    family, column = task
+    X_train, y_train, X_val, y_val, X_test, y_test = _worker['arrays']
+    keep = np.delete(np.arange(X_train.shape[1]), column)
+    model = single_threaded(fit_model(family, _worker['params'][family], X_train[:, keep], y_train,
+                                      X_val[:, keep], y_val))
+    return family, column, score(model.predict_proba(X_test[:, keep]), y_test, _worker['metric'])
+
+
+def parse_model_files(values):
+    files = {}
+    for value in values or []:
+        family, _, path = value.partition('=')
+        if family not in MODEL_NAMES or not path:
+            raise SystemExit(f"--model-file expects family=path with family in {list(MODEL_NAMES)}")
+        files[family] = path
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparable permutation importance for all models')
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_NAMES), default=list(MODEL_NAMES))
+    parser.add_argument('--model-file', action='append', metavar='FAMILY=PATH',
+                        help='Use a trained joblib model instead of fitting one (repeatable)')
+    add_params_argument(parser)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--block-size', type=int, default=5,
+                        help='Permuted copies scored per predict call')
+    parser.add_argument('--metric', choices=['accuracy', 'neg_log_loss'], default='accuracy')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--drop-column', action='store_true',
+                        help='Also refit every model without each question')
+    parser.add_argument('--output-dir', default=SCRIPT_DIR)
+    args = parser.parse_args()
+    model_files = parse_model_files(args.model_file)
+    params = {family: pool_params(family, args.params) for family in args.models}
+
+    print("=" * 60)
+    print("PERMUTATION IMPORTANCE ACROSS MODELS")
+    print(f"Models: {', '.join(MODEL_NAMES[m] for m in args.models)}")
+    print(f"{args.repeats} repeats per question, metric: {args.metric}, {args.workers} workers")
+    if args.params:
+        print(f"Tuned hyperparameters: {args.params}")
+    print("=" * 60)
+
+    X, y, feature_names = load_and_preprocess_data()
+    X_train, X_val, X_test, y_train, y_val, y_test, le = split_data(X, y)
+    arrays = [np.ascontiguousarray(X_train, dtype=np.float32), np.asarray(y_train, dtype=np.int64),
+              np.ascontiguousarray(X_val, dtype=np.float32), np.asarray(y_val, dtype=np.int64),
+              np.ascontiguousarray(X_test, dtype=np.float32), np.asarray(y_test, dtype=np.int64)]
+    X_train, y_train, X_val, y_val, X_test, y_test = arrays
+    n_features = len(feature_names)
+
+    # Fit (or load) each model once in the parent; workers receive a copy each
+    models = {}
+    baselines = {}
+    for family in args.models:
+        start = time.perf_counter()
+        if family in model_files:
+            models[family] = joblib.load(model_files[family])
+            how = f"loaded {model_files[family]}"
+        else:
+            models[family] = fit_model(family, params[family], X_train, y_train, X_val, y_val)
+            how = "fitted"
+        baselines[family] = score(models[family].predict_proba(X_test), y_test, args.metric)
+        print(f"  {MODEL_NAMES[family]:<20} {how} in {time.perf_counter() - start:.1f}s, "
+              f"test {args.metric}: {baselines[family]:.4f}")
+
+    blocks = [list(range(start, min(start + args.block_size, args.repeats)))
+              for start in range(0, args.repeats, args.block_size)]
+    tasks = [(family, column, repeats) for family in args.models
+             for column in range(n_features) for repeats in blocks]
+    permuted = {family: np.zeros((n_features, args.repeats)) for family in args.models}
+    dropped = {family: np.full(n_features, np.nan) for family in args.models}
+
+    shared = [to_shared(array) for array in arrays]
+    start = time.perf_counter()
+    try:
+        with Pool(args.workers, initializer=init_worker,
+                  initargs=([spec for _, spec in shared], models, params, args.metric,
+                            RANDOM_STATE)) as pool:
+            for done, (family, column, repeats, scores) in enumerate(
+                    pool.imap_unordered(permutation_task, tasks), 1):
+                permuted[family][column, repeats] = scores
+                if done % max(1, len(tasks) // 10) == 0 or done == len(tasks):
+                    print(f"  permutation blocks: {done:5d}/{len(tasks)}  "
+                          f"{time.perf_counter() - start:7.1f}s")
+
+            if args.drop_column:
+                drop_tasks = [(family, column) for family in args.models for column in range(n_features)]
+                for done, (family, column, value) in enumerate(
+                        pool.imap_unordered(drop_column_task, drop_tasks), 1):
+                    dropped[family][column] = value
+                    if done % max(1, len(drop_tasks) // 10) == 0 or done == len(drop_tasks):
+                        print(f"  drop-column refits:  {done:5d}/{len(drop_tasks)}  "
+                              f"{time.perf_counter() - start:7.1f}s")
+    finally:
+        for block, _ in shared:
+            block.close()
+            block.unlink()
+
+    # Long table: one row per (model, question); importance = baseline - permuted score
+    rows = []
+    for family in args.models:
+        drops = baselines[family] - permuted[family]
+        mean_drop = drops.mean(axis=1)
+        ranks = pd.Series(-mean_drop).rank(method='min').astype(int).to_numpy()
+        for column, name in enumerate(feature_names):
+            rows.append({
+                'Model': MODEL_NAMES[family],
+                'Feature': name,
+                'Index': column,
+                'Baseline': baselines[family],
+                'Importance': mean_drop[column],
+                'Importance Std': drops[column].std(),
+                'Rank': ranks[column],
+                'Drop-Column Importance': baselines[family] - dropped[family][column]
+            })
+    long_table = pd.DataFrame(rows)
+
+    # Wide table: questions x models, comparable because every model uses the same measure
+    wide = long_table.pivot(index='Feature', columns='Model', values='Importance')
+    wide = wide[[MODEL_NAMES[f] for f in args.models]]
+    wide['Mean Rank'] = long_table.pivot(index='Feature', columns='Model', values='Rank').mean(axis=1)
+    wide = wide.sort_values('Mean Rank')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    long_path = os.path.join(args.output_dir, 'permutation_importance.csv')
+    wide_path = os.path.join(args.output_dir, 'permutation_importance_table.csv')
+    long_table.to_csv(long_path, index=False)
+    wide.to_csv(wide_path)
+
+    print("\n" + "=" * 60)
+    print(f"TOP 15 QUESTIONS (mean {args.metric} drop when permuted)")
+    print("=" * 60)
+    header = ''.join(f"{MODEL_NAMES[f][:10]:>11}" for f in args.models)
+    print(f"{'Rank':>4}{header}  Question")
+    for i, (name, row) in enumerate(wide.head(15).iterrows(), 1):
+        values = ''.join(f"{row[MODEL_NAMES[f]]:>11.4f}" for f in args.models)
+        print(f"{i:>4}{values}  {name[:50]}")
+    print(f"\nTime: {time.perf_counter() - start:.1f}s")
+    print(f"Saved: {long_path}")
+    print(f"Saved: {wide_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Feature Ranking Stability via Bootstrap Resampling
+
+The top-35 list in train_short_model.py comes from a single XGBoost fit.
+This script refits the same importance model on N bootstrap resamples of
+the training set and reports, for every question, how its rank varies and
+how often it makes the top 35.
+
+- The training and validation matrices are placed in shared memory once;
+  worker processes attach to them instead of receiving copies.
+- A bootstrap resample is expressed as per-row weights (how many times each
+  row was drawn), so no resampled matrix is ever materialized.
+- Each worker builds one histogram (QuantileDMatrix) view of the data and
+  trains with tree_method='hist'. Answers take only 7 values, so a handful
+  of bins per question loses nothing against exact split finding.
+
+Uses the same data split and XGBoost parameters as train_short_model.py.
+
+Usage:
+    python ranking_stability.py [--resamples 100] [--workers 8] [--top-n 35]
+"""
+
+import argparse
+import os
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from train_short_model import (SCRIPT_DIR, TOP_N_FEATURES, XGBOOST_PARAMS,
+                               load_and_preprocess_data, split_data)
+from model_params import EARLY_STOPPING_ROUNDS
+
+# 7 Likert levels fit in 8 bins, so histogram splits are exact
+MAX_BIN = 8
+BOOTSTRAP_SEED = 42
+
+# Per-worker state, set by init_worker
+_worker = {}
+
+
+def to_shared(array):
+    """Copy an array into a new shared memory block; returns (block, spec)"""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def from_shared(spec):
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def booster_params(n_classes, threads):
+    """train_short_model's XGBOOST_PARAMS as native xgb.train parameters"""
+    return {
+        'objective': XGBOOST_PARAMS['objective'],
+        'num_class': n_classes,
+        'eta': XGBOOST_PARAMS['learning_rate'],
+        'max_depth': XGBOOST_PARAMS['max_depth'],
+        'min_child_weight': XGBOOST_PARAMS['min_child_weight'],
+        'subsample': XGBOOST_PARAMS['subsample'],
+        'colsample_bytree': XGBOOST_PARAMS['colsample_bytree'],
+        'tree_method': 'hist',
+        'max_bin': MAX_BIN,
+        'nthread': threads,
+        'verbosity': 0
+    }
+
+
+def init_worker(specs, n_classes, threads):
+    blocks = []
+    arrays = []
+    for spec in specs:
+        block, array = from_shared(spec)
+        blocks.append(block)
+        arrays.append(array)
+    X_train, y_train, X_val, y_val = arrays
+
+    dtrain = xgb.QuantileDMatrix(X_train, label=y_train, max_bin=MAX_BIN, nthread=threads)
+    dval = xgb.QuantileDMatrix(X_val, label=y_val, ref=dtrain, max_bin=MAX_BIN, nthread=threads)
+    _worker.update(blocks=blocks, n_rows=len(y_train), n_features=X_train.shape[1],
+                   dtrain=dtrain, dval=dval, params=booster_params(n_classes, threads))
+
+
+def fit_resample(resample):
+    """Gain importances (summing to 1) of one bootstrap resample"""
+    rng = np.random.default_rng([BOOTSTRAP_SEED, resample])
+    n_rows = _worker['n_rows']
+    counts = np.bincount(rng.integers(0, n_rows, n_rows), minlength=n_rows)
+
+    dtrain = _worker['dtrain']
+    dtrain.set_weight(counts.astype(np.float32))
+    params = dict(_worker['params'], seed=BOOTSTRAP_SEED + resample)
+    booster = xgb.train(params, dtrain, num_boost_round=XGBOOST_PARAMS['n_estimators'],
+                        evals=[(_worker['dval'], 'val')],
+                        early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False)
+
+    importances = np.zeros(_worker['n_features'])
+    for name, gain in booster.get_score(importance_type='gain').items():
+        importances[int(name[1:])] = gain
+    total = importances.sum()
+    return resample, importances / total if total > 0 else importances, booster.best_iteration
+
+
+def rank_matrix(importances):
+    """Ranks (1 = most important) of each question within each resample"""
+    order = np.argsort(-importances, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    rows = np.arange(importances.shape[0])[:, None]
+    ranks[rows, order] = np.arange(1, importances.shape[1] + 1)
+    return ranks
+
+
+def summarize(importances, feature_names, top_n, current_top):
+    ranks = rank_matrix(importances)
+    selected = ranks <= top_n
+    summary = pd.DataFrame({
+        'Feature': feature_names,
+        'Index': np.arange(len(feature_names)),
+        'Mean Importance': importances.mean(axis=0),
+        'Mean Rank': ranks.mean(axis=0),
+        'Median Rank': np.median(ranks, axis=0),
+        'Rank Std': ranks.std(axis=0),
+        'Rank 5%': np.percentile(ranks, 5, axis=0),
+        'Rank 95%': np.percentile(ranks, 95, axis=0),
+        'Best Rank': ranks.min(axis=0),
+        'Worst Rank': ranks.max(axis=0),
+        f'Top {top_n} Frequency': selected.mean(axis=0)
+    })
+    if current_top is not None:
+        summary[f'In Current Top {top_n}'] = [name in current_top for name in feature_names]
+    summary = summary.sort_values(['Mean Rank', 'Index']).reset_index(drop=True)
+    return summary, ranks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bootstrap stability of the XGBoost feature ranking')
+    parser.add_argument('--resamples', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--top-n', type=int, default=TOP_N_FEATURES)
+    parser.add_argument('--output-dir', default=SCRIPT_DIR)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FEATURE RANKING STABILITY (BOOTSTRAP)")
+    print(f"{args.resamples} resamples, {args.workers} workers x {args.threads_per_worker} threads")
+    print("=" * 60)
+
+    X, y, feature_names = load_and_preprocess_data()
+    X_train, X_val, X_test, y_train, y_val, y_test, le = split_data(X, y)
+
+    current_top = None
+    current_path = os.path.join(SCRIPT_DIR, f'top_{args.top_n}_features.csv')
+    if os.path.exists(current_path):
+        current_top = set(pd.read_csv(current_path)['Feature'])
+
+    arrays = [np.ascontiguousarray(X_train, dtype=np.float32), np.asarray(y_train, dtype=np.int32),
+              np.ascontiguousarray(X_val, dtype=np.float32), np.asarray(y_val, dtype=np.int32)]
+    shared = [to_shared(array) for array in arrays]
+    specs = [spec for _, spec in shared]
+
+    importances = np.zeros((args.resamples, len(feature_names)))
+    rounds = np.zeros(args.resamples, dtype=int)
+    start = time.perf_counter()
+    try:
+        with Pool(args.workers, initializer=init_worker,
+                  initargs=(specs, len(le.classes_), args.threads_per_worker)) as pool:
+            for done, (resample, values, best_iteration) in enumerate(
+                    pool.imap_unordered(fit_resample, range(args.resamples)), 1):
+                importances[resample] = values
+                rounds[resample] = best_iteration + 1
+                if done % max(1, args.resamples // 10) == 0 or done == args.resamples:
+                    elapsed = time.perf_counter() - start
+                    print(f"  {done:4d}/{args.resamples} resamples  {elapsed:7.1f}s  "
+                          f"({elapsed / done:.2f}s per resample)")
+    finally:
+        for block, _ in shared:
+            block.close()
+            block.unlink()
+    elapsed = time.perf_counter() - start
+
+    summary, ranks = summarize(importances, feature_names, args.top_n, current_top)
+    frequency = summary[f'Top {args.top_n} Frequency']
+
+    print("\n" + "=" * 60)
+    print("RANKING STABILITY")
+    print("=" * 60)
+    print(f"Time: {elapsed:.1f}s, boosting rounds per resample: "
+          f"median {int(np.median(rounds))} (min {rounds.min()}, max {rounds.max()})")
+    print(f"Always in top {args.top_n}:   {(frequency == 1.0).sum()} questions")
+    print(f"In top {args.top_n} >= 90%:   {(frequency >= 0.9).sum()} questions")
+    print(f"Borderline (10-90%):  {((frequency > 0.1) & (frequency < 0.9)).sum()} questions")
+    print(f"Never in top {args.top_n}:    {(frequency == 0.0).sum()} questions")
+    if current_top is not None:
+        unstable = summary[summary[f'In Current Top {args.top_n}'] & (frequency < 0.5)]
+        print(f"Current top {args.top_n} questions selected in < 50% of resamples: {len(unstable)}")
+
+    print(f"\n{'Rank':>4} {'Mean':>6} {'5-95%':>9} {'Freq':>6}  Question")
+    for i, row in summary.iterrows():
+        print(f"{i + 1:>4} {row['Mean Rank']:>6.1f} {int(row['Rank 5%']):>4}-{int(row['Rank 95%']):<4} "
+              f"{row[f'Top {args.top_n} Frequency']:>6.0%}  {row['Feature'][:60]}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, 'ranking_stability.csv')
+    summary.to_csv(summary_path, index=False)
+    ranks_path = os.path.join(args.output_dir, 'bootstrap_ranks.csv')
+    pd.DataFrame(ranks, columns=feature_names).to_csv(ranks_path, index_label='Resample')
+    print(f"\nSaved: {summary_path}")
+    print(f"Saved: {ranks_path} (rank of every question in every resample)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,19 @@ This script:
 4. Trains a new XGBoost model with only top 35 features
 5. Reports accuracy comparison
 6. Exports ONNX model and question list for website deployment
+
+Both XGBoost fits are checkpointed every --checkpoint-interval rounds
+(xgb_checkpoint.py) and resume from the latest checkpoint after an
+interruption. Their per-round validation loss is saved in
+checkpoints/xgb_full_eval_history.csv and checkpoints/xgb_short_eval_history.csv.
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import json
 import os
+import sys
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score
@@ -37,20 +44,14 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PARENT_DIR = os.path.dirname(SCRIPT_DIR)
 DATA_PATH = os.path.join(PARENT_DIR, '16P_eda_cleaned.csv')
 API_DIR = os.path.join(PARENT_DIR, 'mbti-quiz', 'api')
+CHECKPOINT_DIR = os.path.join(SCRIPT_DIR, 'checkpoints')
+
+sys.path.insert(0, PARENT_DIR)
+from xgb_checkpoint import DEFAULT_INTERVAL, fit_with_checkpoints
+from model_params import load_params
 
 # XGBoost parameters (same as ML_Comparison_Analysis.ipynb and Feature_Ranking_Analysis.ipynb)
-XGBOOST_PARAMS = {
-    'n_estimators': 500,
-    'learning_rate': 0.1,
-    'max_depth': 6,
-    'min_child_weight': 1,
-    'subsample': 0.8,
-    'colsample_bytree': 0.8,
-    'objective': 'multi:softprob',
-    'random_state': 42,
-    'n_jobs': -1,
-    'verbosity': 0
-}
+XGBOOST_PARAMS = load_params('xgb')
 
 # Number of top features to select
 TOP_N_FEATURES = 35
@@ -127,7 +128,9 @@ def split_data(X, y):
     return X_train, X_val, X_test, y_train, y_val, y_test, le
 
 
-def train_full_model_and_get_importance(X_train, X_val, y_train, y_val, feature_names, le):
+def train_full_model_and_get_importance(X_train, X_val, y_train, y_val, feature_names, le,
+                                        checkpoint_dir=CHECKPOINT_DIR, interval=DEFAULT_INTERVAL,
+                                        resume=True):
     """Train XGBoost on all features and extract feature importance"""
     print("\n" + "="*60)
     print("STEP 1: Training XGBoost on ALL 60 features")
@@ -137,7 +140,8 @@ def train_full_model_and_get_importance(X_train, X_val, y_train, y_val, feature_
     params['num_class'] = len(le.classes_)
     
     model = XGBClassifier(**params, early_stopping_rounds=15)
-    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    model, _ = fit_with_checkpoints(model, X_train, y_train, X_val, y_val,
+                                    checkpoint_dir, 'xgb_full', interval, resume)
     
     # Extract feature importance
     importances = model.feature_importances_
@@ -153,7 +157,8 @@ def train_full_model_and_get_importance(X_train, X_val, y_train, y_val, feature_
 
 
 def train_short_model(X_train, X_val, X_test, y_train, y_val, y_test, 
-                      top_features, le, feature_names):
+                      top_features, le, feature_names,
+                      checkpoint_dir=CHECKPOINT_DIR, interval=DEFAULT_INTERVAL, resume=True):
     """Train XGBoost on only the top N features"""
     print(f"\n" + "="*60)
     print(f"STEP 2: Training XGBoost on TOP {TOP_N_FEATURES} features")
@@ -174,7 +179,8 @@ def train_short_model(X_train, X_val, X_test, y_train, y_val, y_test,
     params['num_class'] = len(le.classes_)
     
     model_short = XGBClassifier(**params, early_stopping_rounds=15)
-    model_short.fit(X_train_short, y_train, eval_set=[(X_val_short, y_val)], verbose=False)
+    model_short, _ = fit_with_checkpoints(model_short, X_train_short, y_train, X_val_short, y_val,
+                                          checkpoint_dir, 'xgb_short', interval, resume)
     
     return model_short, top_feature_indices
 
@@ -289,6 +295,15 @@ def save_outputs(short_model, top_features, top_feature_indices, feature_names,
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Train the top-N question XGBoost model')
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    parser.add_argument('--checkpoint-interval', type=int, default=DEFAULT_INTERVAL,
+                        help='Boosting rounds between checkpoints')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore existing checkpoints')
+    args = parser.parse_args()
+    checkpoints = dict(checkpoint_dir=args.checkpoint_dir, interval=args.checkpoint_interval,
+                       resume=not args.no_resume)
+
     print("="*60)
     print("XGBOOST SHORT MODEL TRAINING")
     print(f"Selecting Top {TOP_N_FEATURES} Features")
@@ -303,7 +318,7 @@ def main():
     
     # Train full model and get feature importance
     full_model, importance_df = train_full_model_and_get_importance(
-        X_train, X_val, y_train, y_val, feature_names, le
+        X_train, X_val, y_train, y_val, feature_names, le, **checkpoints
     )
     
     # Get top N features
@@ -315,7 +330,7 @@ def main():
     # Train short model
     short_model, top_feature_indices = train_short_model(
         X_train, X_val, X_test, y_train, y_val, y_test,
-        top_features, le, feature_names
+        top_features, le, feature_names, **checkpoints
     )
     
     # Evaluate and compare
@@ -336,6 +351,8 @@ def main():
     print("\nFiles created:")
     print(f"  - {os.path.join(API_DIR, 'mbti_model_short.onnx')}")
     print(f"  - {os.path.join(API_DIR, 'top_35_questions.json')}")
+    print(f"  - {os.path.join(args.checkpoint_dir, 'xgb_full_eval_history.csv')}")
+    print(f"  - {os.path.join(args.checkpoint_dir, 'xgb_short_eval_history.csv')}")
     print("="*60)
 
 
@@ -15,17 +15,22 @@ Dataset Source:
     [Accessed: 2025].
 """
 
+import argparse
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter
 import warnings
+
+from dedup import DEFAULT_MAX_DISTANCE, deduplicate, print_report
+from eda_profile import (VALID_TYPES, answer_matrix, dimension_counts, level_counts,
+                         profile, type_counts)
+from render_figures import render_in_new_process, save_results
 warnings.filterwarnings('ignore')
 
-# Set style for better visualizations
-plt.style.use('seaborn-v0_8-whitegrid')
-sns.set_palette("husl")
+FIGURE_DATA_PATH = 'eda_figures/eda_figure_data.npz'
+
+parser = argparse.ArgumentParser(description='Data gathering and EDA of the 16P dataset')
+parser.add_argument('--no-figures', action='store_true',
+                    help='Only save the figure data; skip rendering (matplotlib is not imported)')
+args = parser.parse_args()
 
 print("=" * 80)
 print("DATA GATHERING AND EXPLORATORY DATA ANALYSIS")
@@ -84,10 +89,13 @@ print("\n\n" + "=" * 80)
 print("SECTION 2: DATA QUALITY ISSUES")
 print("=" * 80)
 
+# All checks below come from one vectorized pass (eda_profile.py)
+data_profile = profile(df)
+
 # 2.1 Check Missing Values
 print("\n2.1 Missing Values Analysis")
 print("-" * 40)
-missing_values = df.isnull().sum()
+missing_values = data_profile['missing']
 missing_count = missing_values.sum()
 if missing_count == 0:
     print("✓ No missing values found in the dataset.")
@@ -98,7 +106,7 @@ else:
 # 2.2 Check Duplicate Rows
 print("\n2.2 Duplicate Rows Analysis")
 print("-" * 40)
-duplicate_count = df.duplicated().sum()
+duplicate_count = data_profile['duplicate_rows']  # same answers and type
 if duplicate_count == 0:
     print("✓ No duplicate rows found in the dataset.")
 else:
@@ -107,8 +115,8 @@ else:
 # 2.3 Check Duplicate Response IDs
 print("\n2.3 Duplicate Response IDs")
 print("-" * 40)
-if 'Response Id' in df.columns:
-    duplicate_ids = df['Response Id'].duplicated().sum()
+if data_profile['duplicate_ids'] is not None:
+    duplicate_ids = data_profile['duplicate_ids']
     if duplicate_ids == 0:
         print("✓ All Response IDs are unique.")
     else:
@@ -120,22 +128,13 @@ print("-" * 40)
 print("Expected range for survey responses: -3 to 3 (7-point Likert scale)")
 print("\nChecking for outliers (values outside -3 to 3)...")
 
-# Get feature columns (exclude Response Id and Personality)
-feature_cols = [col for col in df.columns if col not in ['Response Id', 'Personality']]
-
 outlier_issues = []
-for col in feature_cols:
-    # Convert to numeric, coercing errors
-    numeric_col = pd.to_numeric(df[col], errors='coerce')
-    
-    # Check for values outside expected range
-    outliers = numeric_col[(numeric_col < -3) | (numeric_col > 3)]
-    if len(outliers) > 0:
-        outlier_issues.append({
-            'column': col[:40] + "..." if len(col) > 40 else col,
-            'count': len(outliers),
-            'values': outliers.unique()[:5]  # Show first 5 unique outlier values
-        })
+for col, values in data_profile['out_of_range_values'].items():
+    outlier_issues.append({
+        'column': col[:40] + "..." if len(col) > 40 else col,
+        'count': int(data_profile['out_of_range'][col]),
+        'values': values  # First 5 unique outlier values
+    })
 
 if len(outlier_issues) == 0:
     print("✓ All feature values are within the expected range (-3 to 3).")
@@ -147,10 +146,9 @@ else:
 # 2.5 Check Target Variable (Personality Types)
 print("\n2.5 Target Variable (Personality Types) Validation")
 print("-" * 40)
-valid_types = ['ESTJ', 'ENTJ', 'ESFJ', 'ENFJ', 'ISTJ', 'ISFJ', 'INTJ', 'INFJ',
-               'ESTP', 'ESFP', 'ENTP', 'ENFP', 'ISTP', 'ISFP', 'INTP', 'INFP']
-unique_personalities = df['Personality'].unique()
-invalid_types = [p for p in unique_personalities if p not in valid_types]
+valid_types = VALID_TYPES
+unique_personalities = data_profile['type_counts'].index
+invalid_types = data_profile['invalid_types']
 
 print(f"Expected 16 personality types: {len(valid_types)}")
 print(f"Found unique values: {len(unique_personalities)}")
@@ -206,12 +204,10 @@ if 'Response Id' in df_clean.columns:
 print("\n3.2 Converting Features to Numeric")
 print("-" * 40)
 feature_cols = [col for col in df_clean.columns if col != 'Personality']
-non_numeric_cols = []
-
-for col in feature_cols:
-    if df_clean[col].dtype == 'object':
-        non_numeric_cols.append(col)
-        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+answers, non_numeric_cols = answer_matrix(df_clean, feature_cols)
+if len(non_numeric_cols) > 0:
+    # One coercion for the whole answer matrix; unparseable cells become NaN
+    df_clean[feature_cols] = answers
 
 if len(non_numeric_cols) > 0:
     preprocessing_steps.append(f"Converted {len(non_numeric_cols)} non-numeric columns to numeric")
@@ -225,14 +221,27 @@ print("-" * 40)
 nan_count_after = df_clean[feature_cols].isnull().sum().sum()
 if nan_count_after > 0:
     # Fill with column means
-    for col in feature_cols:
-        if df_clean[col].isnull().any():
-            df_clean[col] = df_clean[col].fillna(df_clean[col].mean())
+    df_clean[feature_cols] = df_clean[feature_cols].fillna(df_clean[feature_cols].mean())
     preprocessing_steps.append(f"Filled {nan_count_after} NaN values with column means")
     print(f"✓ Filled {nan_count_after} NaN values with column means")
 else:
     print("✓ No NaN values to handle")
 
+# Step 4: Remove repeated submissions (exact and near-duplicate responses)
+print("\n3.4 Removing Duplicate and Near-Duplicate Responses")
+print("-" * 40)
+keep_rows, dedup_report = deduplicate(df_clean, max_distance=DEFAULT_MAX_DISTANCE)
+print_report(dedup_report)
+removed = dedup_report['rows'] - dedup_report['kept']
+if removed > 0:
+    df_clean = df_clean[keep_rows].reset_index(drop=True)
+    preprocessing_steps.append(
+        f"Removed {dedup_report['exact_duplicates']} exact and {dedup_report['near_duplicates']} "
+        f"near-duplicate responses (<= {DEFAULT_MAX_DISTANCE} answers differ, same type)")
+    print(f"✓ Removed {removed:,} repeated responses")
+else:
+    print("✓ No repeated responses to remove")
+
 # Summary of Preprocessing Steps
 print("\n" + "-" * 40)
 print("PREPROCESSING STEPS APPLIED:")
@@ -281,7 +290,8 @@ print("=" * 80)
 # 5.1 Personality Type Distribution
 print("\n5.1 Personality Type Distribution")
 print("-" * 40)
-personality_counts = df_clean['Personality'].value_counts()
+# Counted on the cleaned data: step 3.4 may have removed repeated responses
+personality_counts = type_counts(df_clean['Personality'])
 print(personality_counts)
 
 # Calculate percentages
@@ -318,20 +328,18 @@ else:
 print("\n\n5.4 MBTI Dimension Analysis")
 print("-" * 40)
 
-# Extract MBTI dimensions
-df_clean['E_I'] = df_clean['Personality'].apply(lambda x: x[0])  # Extrovert/Introvert
-df_clean['S_N'] = df_clean['Personality'].apply(lambda x: x[1])  # Sensing/Intuition
-df_clean['T_F'] = df_clean['Personality'].apply(lambda x: x[2])  # Thinking/Feeling
-df_clean['J_P'] = df_clean['Personality'].apply(lambda x: x[3])  # Judging/Perceiving
+# Extract MBTI dimensions (letter counts from the per-type counts)
+dimension_totals = dimension_counts(personality_counts)
+e_count, i_count = dimension_totals['E'], dimension_totals['I']  # Extrovert/Introvert
+s_count, n_count = dimension_totals['S'], dimension_totals['N']  # Sensing/Intuition
+t_count, f_count = dimension_totals['T'], dimension_totals['F']  # Thinking/Feeling
+j_count, p_count = dimension_totals['J'], dimension_totals['P']  # Judging/Perceiving
 
 print("Dimension Distributions:")
-print(f"  Extrovert (E) vs Introvert (I): {(df_clean['E_I'] == 'E').sum():,} vs {(df_clean['E_I'] == 'I').sum():,}")
-print(f"  Sensing (S) vs Intuition (N):   {(df_clean['S_N'] == 'S').sum():,} vs {(df_clean['S_N'] == 'N').sum():,}")
-print(f"  Thinking (T) vs Feeling (F):    {(df_clean['T_F'] == 'T').sum():,} vs {(df_clean['T_F'] == 'F').sum():,}")
-print(f"  Judging (J) vs Perceiving (P):  {(df_clean['J_P'] == 'J').sum():,} vs {(df_clean['J_P'] == 'P').sum():,}")
-
-# Drop the dimension columns for clean data
-df_clean = df_clean.drop(columns=['E_I', 'S_N', 'T_F', 'J_P'])
+print(f"  Extrovert (E) vs Introvert (I): {e_count:,} vs {i_count:,}")
+print(f"  Sensing (S) vs Intuition (N):   {s_count:,} vs {n_count:,}")
+print(f"  Thinking (T) vs Feeling (F):    {t_count:,} vs {f_count:,}")
+print(f"  Judging (J) vs Perceiving (P):  {j_count:,} vs {p_count:,}")
 
 # =============================================================================
 # SECTION 6: VISUALIZATIONS
@@ -340,138 +348,32 @@ print("\n\n" + "=" * 80)
 print("SECTION 6: GENERATING VISUALIZATIONS")
 print("=" * 80)
 
-# Create figure directory if needed
-import os
-os.makedirs('eda_figures', exist_ok=True)
-
-# Figure 1: Personality Type Distribution
-print("\nGenerating Figure 1: Personality Type Distribution...")
-fig, ax = plt.subplots(figsize=(12, 6))
-colors = sns.color_palette("husl", 16)
-bars = ax.bar(personality_counts.index, personality_counts.values, color=colors)
-ax.set_xlabel('Personality Type', fontsize=12)
-ax.set_ylabel('Count', fontsize=12)
-ax.set_title('Distribution of 16 Personality Types', fontsize=14, fontweight='bold')
-ax.tick_params(axis='x', rotation=45)
-
-# Add value labels on bars
-for bar, count in zip(bars, personality_counts.values):
-    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 50, 
-            f'{count:,}', ha='center', va='bottom', fontsize=9)
-
-plt.tight_layout()
-plt.savefig('eda_figures/01_personality_distribution.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("✓ Saved: eda_figures/01_personality_distribution.png")
-
-# Figure 2: MBTI Dimensions Pie Charts
-print("\nGenerating Figure 2: MBTI Dimensions Distribution...")
-fig, axes = plt.subplots(2, 2, figsize=(12, 10))
-
-# Re-calculate dimensions
-e_count = sum(1 for p in df['Personality'] if p[0] == 'E')
-i_count = sum(1 for p in df['Personality'] if p[0] == 'I')
-s_count = sum(1 for p in df['Personality'] if p[1] == 'S')
-n_count = sum(1 for p in df['Personality'] if p[1] == 'N')
-t_count = sum(1 for p in df['Personality'] if p[2] == 'T')
-f_count = sum(1 for p in df['Personality'] if p[2] == 'F')
-j_count = sum(1 for p in df['Personality'] if p[3] == 'J')
-p_count = sum(1 for p in df['Personality'] if p[3] == 'P')
-
-dimensions = [
-    (['Extrovert (E)', 'Introvert (I)'], [e_count, i_count], 'Energy: E vs I'),
-    (['Sensing (S)', 'Intuition (N)'], [s_count, n_count], 'Information: S vs N'),
-    (['Thinking (T)', 'Feeling (F)'], [t_count, f_count], 'Decisions: T vs F'),
-    (['Judging (J)', 'Perceiving (P)'], [j_count, p_count], 'Lifestyle: J vs P')
-]
-
-colors_pair = ['#FF6B6B', '#4ECDC4']
-for ax, (labels, sizes, title) in zip(axes.flat, dimensions):
-    wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%', 
-                                       colors=colors_pair, startangle=90)
-    ax.set_title(title, fontsize=12, fontweight='bold')
-
-plt.suptitle('MBTI Dimensions Distribution', fontsize=14, fontweight='bold', y=1.02)
-plt.tight_layout()
-plt.savefig('eda_figures/02_mbti_dimensions.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("✓ Saved: eda_figures/02_mbti_dimensions.png")
-
-# Figure 3: Response Distribution Heatmap (Sample of Questions)
-print("\nGenerating Figure 3: Response Value Distribution...")
-fig, ax = plt.subplots(figsize=(14, 8))
-
-# Get first 15 feature columns for visibility
-sample_features = feature_cols[:15]
-short_names = [col[:30] + "..." if len(col) > 30 else col for col in sample_features]
-
-# Create distribution matrix
+# What the five figures show is saved to a results file; render_figures.py
+# draws them headless, in parallel (and can redraw them later from the file)
+sample_features = feature_cols[:15]            # Figure 3: first 15 questions
 response_values = [-3, -2, -1, 0, 1, 2, 3]
-dist_matrix = np.zeros((len(sample_features), len(response_values)))
-
-for i, col in enumerate(sample_features):
-    for j, val in enumerate(response_values):
-        dist_matrix[i, j] = (df_clean[col] == val).sum()
-
-# Normalize to percentages
-dist_matrix_pct = dist_matrix / dist_matrix.sum(axis=1, keepdims=True) * 100
-
-sns.heatmap(dist_matrix_pct, annot=True, fmt='.1f', cmap='YlOrRd',
-            xticklabels=response_values, yticklabels=short_names, ax=ax)
-ax.set_xlabel('Response Value', fontsize=12)
-ax.set_ylabel('Survey Question', fontsize=12)
-ax.set_title('Response Distribution Across Questions (%)\n(Showing first 15 questions)', 
-             fontsize=14, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('eda_figures/03_response_distribution.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("✓ Saved: eda_figures/03_response_distribution.png")
-
-# Figure 4: Correlation Heatmap (Sampled Features)
-print("\nGenerating Figure 4: Feature Correlation Heatmap...")
-fig, ax = plt.subplots(figsize=(14, 12))
-
-# Select a subset of features for correlation (every 4th question)
-sample_features_corr = feature_cols[::4][:15]
-short_names_corr = [col[:25] + "..." if len(col) > 25 else col for col in sample_features_corr]
-
-corr_matrix = df_clean[sample_features_corr].corr()
-mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-
-sns.heatmap(corr_matrix, mask=mask, annot=True, fmt='.2f', cmap='RdBu_r',
-            center=0, square=True, linewidths=0.5,
-            xticklabels=short_names_corr, yticklabels=short_names_corr, ax=ax)
-ax.set_title('Feature Correlation Heatmap\n(Sampled Questions)', fontsize=14, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('eda_figures/04_correlation_heatmap.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("✓ Saved: eda_figures/04_correlation_heatmap.png")
-
-# Figure 5: Box Plot of Response Distributions
-print("\nGenerating Figure 5: Response Distribution Box Plots...")
-fig, ax = plt.subplots(figsize=(16, 6))
-
-# Select first 20 features
-sample_features_box = feature_cols[:20]
-df_melt = df_clean[sample_features_box].melt(var_name='Question', value_name='Response')
-df_melt['Question'] = df_melt['Question'].apply(lambda x: x[:20] + "..." if len(x) > 20 else x)
-
-sns.boxplot(data=df_melt, x='Question', y='Response', ax=ax, palette='Set3')
-ax.set_xticklabels(ax.get_xticklabels(), rotation=90, fontsize=8)
-ax.set_xlabel('Survey Question', fontsize=12)
-ax.set_ylabel('Response Value', fontsize=12)
-ax.set_title('Response Distribution Across Questions (Box Plots)\n(Showing first 20 questions)', 
-             fontsize=14, fontweight='bold')
-ax.axhline(y=0, color='red', linestyle='--', alpha=0.5)
-
-plt.tight_layout()
-plt.savefig('eda_figures/05_boxplots.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("✓ Saved: eda_figures/05_boxplots.png")
-
-print("\n✓ All visualizations saved to 'eda_figures/' folder")
+dist_matrix = level_counts(df_clean[sample_features].to_numpy(), response_values)
+sample_features_corr = feature_cols[::4][:15]  # Figure 4: every 4th question
+sample_features_box = feature_cols[:20]        # Figure 5: first 20 questions
+
+save_results(
+    FIGURE_DATA_PATH, 'eda',
+    type_labels=list(personality_counts.index), type_counts=personality_counts.to_numpy(),
+    dimension_counts=dict(dimension_totals),
+    distribution_features=sample_features, response_values=response_values,
+    distribution_pct=dist_matrix / dist_matrix.sum(axis=1, keepdims=True) * 100,
+    correlation_features=sample_features_corr,
+    correlation=df_clean[sample_features_corr].corr().to_numpy(),
+    box_features=sample_features_box, box_values=df_clean[sample_features_box].to_numpy()
+)
+print(f"\n✓ Saved: {FIGURE_DATA_PATH}")
+
+if args.no_figures:
+    print(f"Figures skipped; render them with: python render_figures.py {FIGURE_DATA_PATH}")
+elif render_in_new_process([FIGURE_DATA_PATH]):
+    print("\n✓ All visualizations saved to 'eda_figures/' folder")
+else:
+    print(f"⚠ Rendering failed; retry with: python render_figures.py {FIGURE_DATA_PATH}")
 
 # =============================================================================
 # SECTION 7: KEY INSIGHTS SUMMARY
@@ -624,5 +526,6 @@ Generated Files:
 • eda_figures/03_response_distribution.png
 • eda_figures/04_correlation_heatmap.png
 • eda_figures/05_boxplots.png
+• eda_figures/eda_figure_data.npz (figure data, render_figures.py)
 • 16P_eda_cleaned.csv (cleaned dataset)
 """)
@@ -0,0 +1,211 @@
+"""
+Duplicate and Near-Duplicate Response Detection
+===============================================
+
+Repeated bot or spam submissions inflate the training set with copies of
+the same answer vector, often with one or two answers changed. This stage
+finds them at the scale of millions of rows:
+
+1. Packing: every answer (-3..3) becomes a 3-bit code, 20 answers per
+   64-bit word, so a 60-answer response is three integers.
+2. Exact duplicates: a vectorized hash of the packed words plus the type,
+   confirmed against the first row with the same hash (eda_profile).
+3. Near duplicates: responses with the same type whose answers differ in at
+   most k questions. The questions are split into k + 1 bands; two such
+   responses must agree exactly on at least one band (pigeonhole), so only
+   rows sharing a band hash are compared. Rows are sorted by band hash and
+   compared with their next few neighbours in vectorized passes; the
+   Hamming distance (number of differing answers) comes from XOR and
+   popcount on the packed words.
+4. Near-duplicate pairs are joined into clusters and the earliest response
+   of each cluster is kept.
+
+Rows with an answer that is not a Likert level (NaN, out of range,
+fractional) are never flagged.
+
+Usage:
+    python dedup.py 16P.csv [--max-distance 1] [--output 16P_dedup.csv]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from eda_profile import (CHUNK_ROWS, LIKERT_LEVELS, TARGET_COLUMN, answer_matrix,
+                         duplicate_rows, row_hashes)
+
+BITS_PER_ANSWER = 3
+ANSWERS_PER_WORD = 20
+# Differing answers allowed between near duplicates (0 = exact only)
+DEFAULT_MAX_DISTANCE = 1
+# Sorted neighbours compared per row in each band; a band group larger than
+# this is compared within a sliding window of this many rows
+DEFAULT_WINDOW = 64
+
+# Lowest bit of every 3-bit field
+_FIELD_LOW_BITS = np.uint64(sum(1 << (BITS_PER_ANSWER * i) for i in range(ANSWERS_PER_WORD)))
+
+
+def answer_codes(X):
+    """(codes, valid): answers as uint8 codes 0..6, and rows whose answers are all Likert levels"""
+    low, high = LIKERT_LEVELS[0], LIKERT_LEVELS[-1]
+    codes = np.zeros(X.shape, dtype=np.uint8)
+    valid = np.ones(len(X), dtype=bool)
+    for start in range(0, len(X), CHUNK_ROWS):
+        chunk = X[start:start + CHUNK_ROWS]
+        ok = (chunk >= low) & (chunk <= high)
+        if np.issubdtype(chunk.dtype, np.floating):
+            ok &= chunk == np.round(chunk)
+        codes[start:start + CHUNK_ROWS] = np.where(ok, chunk - low, 0)
+        valid[start:start + CHUNK_ROWS] = ok.all(axis=1)
+    return codes, valid
+
+
+def pack_answers(codes):
+    """(n, ceil(n_answers / 20)) uint64 words holding 3 bits per answer"""
+    n_rows, n_answers = codes.shape
+    n_words = -(-n_answers // ANSWERS_PER_WORD)
+    # Fields do not overlap, so shifting and OR-ing is a dot product with 8^field
+    weights = np.uint64(1) << (np.uint64(BITS_PER_ANSWER) * np.arange(ANSWERS_PER_WORD, dtype=np.uint64))
+    words = np.empty((n_rows, n_words), dtype=np.uint64)
+    padded = np.zeros((min(n_rows, CHUNK_ROWS), n_words * ANSWERS_PER_WORD), dtype=np.uint64)
+    for start in range(0, n_rows, CHUNK_ROWS):
+        chunk = codes[start:start + CHUNK_ROWS]
+        block = padded[:len(chunk)]
+        block[:, :n_answers] = chunk
+        words[start:start + len(chunk)] = block.reshape(len(chunk), n_words, ANSWERS_PER_WORD) @ weights
+    return words
+
+
+def _popcount(x):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x)
+    bytes_ = x[..., None].view(np.uint8)
+    return np.unpackbits(bytes_, axis=-1).sum(axis=-1)
+
+
+def hamming(a, b):
+    """Number of differing answers between packed rows a and b (same shape)"""
+    x = a ^ b
+    nonzero_fields = (x | (x >> np.uint64(1)) | (x >> np.uint64(2))) & _FIELD_LOW_BITS
+    return _popcount(nonzero_fields).sum(axis=-1).astype(np.int64)
+
+
+def band_slices(n_answers, n_bands):
+    """n_bands contiguous answer ranges covering all answers"""
+    edges = np.linspace(0, n_answers, n_bands + 1).round().astype(int)
+    return [slice(lo, hi) for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+def near_duplicate_pairs(codes, words, labels, rows, max_distance, window=DEFAULT_WINDOW):
+    """(i, j, distance) for pairs among `rows` with 1..max_distance differing answers
+
+    labels must match too. i < j, each pair reported once.
+    """
+    found = []
+    for band in band_slices(codes.shape[1], max_distance + 1):
+        keys = row_hashes(codes[rows, band], labels[rows])
+        order = rows[np.argsort(keys, kind='stable')]
+        keys = np.sort(keys, kind='stable')
+        for offset in range(1, window + 1):
+            same = np.flatnonzero(keys[:-offset] == keys[offset:])
+            if len(same) == 0:
+                break
+            i, j = order[same], order[same + offset]
+            distance = hamming(words[i], words[j])
+            close = (distance <= max_distance) & (labels[i] == labels[j])
+            found.append(np.column_stack([np.minimum(i, j), np.maximum(i, j), distance])[close])
+
+    if not found:
+        return np.zeros((0, 3), dtype=np.int64)
+    pairs = np.concatenate(found)
+    pairs = pairs[pairs[:, 2] > 0]
+    return np.unique(pairs, axis=0)
+
+
+def deduplicate(df, max_distance=DEFAULT_MAX_DISTANCE, window=DEFAULT_WINDOW):
+    """(keep mask, report) for a DataFrame of responses
+
+    Drops exact repeats of an earlier response (answers + type), then
+    near-duplicate clusters down to their earliest response.
+    """
+    X, _ = answer_matrix(df)
+    codes, valid = answer_codes(X)
+    words = pack_answers(codes)
+    if TARGET_COLUMN in df.columns:
+        labels = pd.factorize(df[TARGET_COLUMN])[0].astype(np.int64)
+    else:
+        labels = np.zeros(len(df), dtype=np.int64)
+
+    exact = duplicate_rows(words.view(np.int64), labels) & valid
+    keep = ~exact
+    report = {'rows': len(df), 'invalid_rows': int((~valid).sum()),
+              'exact_duplicates': int(exact.sum()), 'near_duplicates': 0,
+              'near_clusters': 0, 'largest_cluster': 1, 'max_distance': max_distance}
+
+    if max_distance > 0:
+        candidates = np.flatnonzero(keep & valid)
+        pairs = near_duplicate_pairs(codes, words, labels, candidates, max_distance, window)
+        if len(pairs):
+            graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+                               shape=(len(df), len(df)))
+            _, component = connected_components(graph, directed=False)
+            in_pair = np.zeros(len(df), dtype=bool)
+            in_pair[pairs[:, :2].ravel()] = True
+            members = np.flatnonzero(in_pair)
+            first = pd.Series(members).groupby(component[members]).transform('min').to_numpy()
+            near = members[members != first]
+            keep[near] = False
+            sizes = np.bincount(component[members])
+            report.update(near_duplicates=len(near), near_clusters=int((sizes > 1).sum()),
+                          largest_cluster=int(sizes.max()), pairs=len(pairs))
+    report['kept'] = int(keep.sum())
+    return keep, report
+
+
+def print_report(report):
+    print(f"  Rows:                      {report['rows']:,}")
+    print(f"  Exact duplicates:          {report['exact_duplicates']:,}")
+    if report['max_distance'] > 0:
+        print(f"  Near duplicates (<= {report['max_distance']} answers differ): "
+              f"{report['near_duplicates']:,} in {report['near_clusters']:,} clusters "
+              f"(largest {report['largest_cluster']})")
+    if report['invalid_rows']:
+        print(f"  Not checked (non-Likert answers): {report['invalid_rows']:,}")
+    print(f"  Kept:                      {report['kept']:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exact and near-duplicate response detection')
+    parser.add_argument('data', nargs='?', default='16P.csv')
+    parser.add_argument('--encoding', default='cp1252')
+    parser.add_argument('--max-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help='Differing answers allowed between near duplicates (0 = exact only)')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW)
+    parser.add_argument('--output', help='Write the deduplicated CSV here')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("DUPLICATE / NEAR-DUPLICATE DETECTION")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    df = pd.read_csv(args.data, encoding=args.encoding)
+    print(f"Loaded {len(df):,} rows in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    keep, report = deduplicate(df, args.max_distance, args.window)
+    print(f"Checked in {time.perf_counter() - start:.1f}s")
+    print_report(report)
+
+    if args.output:
+        df[keep].to_csv(args.output, index=False)
+        print(f"Saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
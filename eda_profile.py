@@ -0,0 +1,366 @@
+"""
+Vectorized Data Profiling for the 16 Personalities Dataset
+==========================================================
+
+The data quality checks behind data_gathering_eda.py as reusable functions.
+Every check runs on the answers as one 2-D array instead of column by column
+or row by row:
+
+- answer_matrix():   the 60 question columns as a single array; non-numeric
+                     cells are coerced to NaN in one pd.to_numeric call
+- range_violations():values outside -3..3, one mask for the whole matrix
+- level_counts():    7-level response histogram of every question (bincount)
+- duplicate_rows():  exact duplicate answers + type via a vectorized row hash,
+                     confirmed by comparing each hit with its first occurrence
+- type_counts() / dimension_counts() / dimension_letters(): the string work
+                     runs on the distinct type labels only, then is mapped
+                     back to rows through their integer codes
+
+profile() runs them all and returns a dict that the EDA script prints.
+
+Usage:
+    python eda_profile.py 16P.csv [--encoding cp1252]
+    python eda_profile.py --benchmark [--rows 10000000] [--compare-legacy]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ID_COLUMN = 'Response Id'
+TARGET_COLUMN = 'Personality'
+LIKERT_LEVELS = np.arange(-3, 4)
+VALID_TYPES = ['ESTJ', 'ENTJ', 'ESFJ', 'ENFJ', 'ISTJ', 'ISFJ', 'INTJ', 'INFJ',
+               'ESTP', 'ESFP', 'ENTP', 'ENFP', 'ISTP', 'ISFP', 'INTP', 'INFP']
+# (letter, opposite letter) for each of the four MBTI dimensions
+DIMENSIONS = [('E', 'I'), ('S', 'N'), ('T', 'F'), ('J', 'P')]
+DIMENSION_COLUMNS = ['E_I', 'S_N', 'T_F', 'J_P']
+
+# Rows processed at a time where a check needs a wider temporary array
+CHUNK_ROWS = 1_000_000
+# Rows used for --compare-legacy: df.duplicated() in the original loops
+# needs ~8 bytes per cell and does not fit in memory at 10M rows
+LEGACY_ROWS = 1_000_000
+# Seed of the odd 64-bit multipliers in row_hashes(), fixed so hashes are reproducible
+_HASH_SEED = 16
+
+
+def feature_columns(df):
+    """The question columns: everything except the ID and the target"""
+    return [col for col in df.columns if col not in (ID_COLUMN, TARGET_COLUMN)]
+
+
+def answer_matrix(df, columns=None):
+    """(answers, non-numeric columns) for the question columns of df
+
+    Numeric columns are returned in their own dtype (int8 stays int8).
+    If any column is non-numeric, all answers are coerced to float64 in a
+    single pd.to_numeric call and unparseable cells become NaN.
+    """
+    columns = feature_columns(df) if columns is None else columns
+    block = df[columns]
+    non_numeric = [col for col, dtype in block.dtypes.items()
+                   if not pd.api.types.is_numeric_dtype(dtype)]
+    if not non_numeric:
+        return block.to_numpy(), non_numeric
+    values = pd.to_numeric(pd.Series(block.to_numpy(dtype=object).ravel()), errors='coerce')
+    return values.to_numpy(dtype=np.float64).reshape(block.shape), non_numeric
+
+
+def nan_counts(X):
+    """NaN count per column"""
+    if not np.issubdtype(X.dtype, np.floating):
+        return np.zeros(X.shape[1], dtype=np.int64)
+    return np.isnan(X).sum(axis=0)
+
+
+def range_violations(X, low=LIKERT_LEVELS[0], high=LIKERT_LEVELS[-1], max_values=5):
+    """(count per column, {column index: first few distinct bad values})
+
+    NaN is not a range violation (see nan_counts).
+    """
+    counts = np.zeros(X.shape[1], dtype=np.int64)
+    for start in range(0, len(X), CHUNK_ROWS):
+        chunk = X[start:start + CHUNK_ROWS]
+        counts += ((chunk < low) | (chunk > high)).sum(axis=0)
+    values = {}
+    for j in np.flatnonzero(counts):
+        column = X[:, j]
+        values[int(j)] = pd.unique(column[(column < low) | (column > high)])[:max_values]
+    return counts, values
+
+
+def level_counts(X, levels=LIKERT_LEVELS):
+    """(n_columns, n_levels) count of each Likert level per column
+
+    Cells that are not one of the levels (NaN, out of range, fractional)
+    are not counted.
+    """
+    counts = np.zeros((X.shape[1], len(levels)), dtype=np.int64)
+    for start in range(0, len(X), CHUNK_ROWS):
+        chunk = X[start:start + CHUNK_ROWS]
+        for k, level in enumerate(levels):
+            counts[:, k] += (chunk == level).sum(axis=0)
+    return counts
+
+
+def row_hashes(X, extra=None):
+    """64-bit hash of every row of X (plus an optional extra integer column)"""
+    rng = np.random.default_rng(_HASH_SEED)
+    n_columns = X.shape[1] + (extra is not None)
+    multipliers = rng.integers(0, 2 ** 63, size=n_columns, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    hashes = np.empty(len(X), dtype=np.uint64)
+    for start in range(0, len(X), CHUNK_ROWS):
+        chunk = X[start:start + CHUNK_ROWS]
+        if np.issubdtype(chunk.dtype, np.floating):
+            # Hash the float bit patterns, with -0.0 and NaN normalized
+            chunk = np.where(np.isnan(chunk), np.nan, chunk + 0.0).astype(np.float64).view(np.uint64)
+        else:
+            chunk = chunk.astype(np.int64).view(np.uint64)
+        if extra is not None:
+            codes = extra[start:start + CHUNK_ROWS].astype(np.int64).view(np.uint64)
+            chunk = np.column_stack([chunk, codes])
+        with np.errstate(over='ignore'):
+            hashes[start:start + CHUNK_ROWS] = chunk @ multipliers
+    # splitmix64 finalizer spreads the linear combination over all bits
+    with np.errstate(over='ignore'):
+        hashes ^= hashes >> np.uint64(30)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(27)
+        hashes *= np.uint64(0x94D049BB133111EB)
+        hashes ^= hashes >> np.uint64(31)
+    return hashes
+
+
+def duplicate_rows(X, labels=None):
+    """Boolean mask of rows that repeat an earlier row (like df.duplicated())
+
+    labels (e.g. type codes) are compared along with the answers. Rows with
+    equal hashes are compared with the first row of their hash group, so a
+    hash collision is never reported as a duplicate.
+    """
+    hashes = row_hashes(X, labels)
+    codes, uniques = pd.factorize(hashes)
+    first = np.empty(len(uniques), dtype=np.int64)
+    first[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)
+    candidates = np.flatnonzero(first[codes] != np.arange(len(codes)))
+
+    originals = first[codes[candidates]]
+    same = np.ones(len(candidates), dtype=bool)
+    for start in range(0, len(candidates), CHUNK_ROWS):
+        rows = candidates[start:start + CHUNK_ROWS]
+        other = originals[start:start + CHUNK_ROWS]
+        a, b = X[rows], X[other]
+        equal = (a == b) | (np.isnan(a) & np.isnan(b)) if np.issubdtype(X.dtype, np.floating) else a == b
+        block = equal.all(axis=1)
+        if labels is not None:
+            block &= labels[rows] == labels[other]
+        same[start:start + CHUNK_ROWS] = block
+
+    mask = np.zeros(len(X), dtype=bool)
+    mask[candidates[same]] = True
+    return mask
+
+
+def type_counts(personality):
+    """Rows per personality type, most common first (like value_counts())"""
+    codes, uniques = pd.factorize(personality)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return pd.Series(counts, index=pd.Index(uniques, name=TARGET_COLUMN)).sort_values(
+        ascending=False, kind='stable')
+
+
+def invalid_types(types):
+    """The labels among `types` that are not one of the 16 MBTI types"""
+    types = pd.Index(types)
+    return list(types[~types.isin(VALID_TYPES)])
+
+
+def dimension_counts(counts):
+    """{letter: rows} for all eight MBTI letters, from type_counts()"""
+    labels = pd.Index(counts.index).astype(str)
+    result = {}
+    for position, pair in enumerate(DIMENSIONS):
+        letters = labels.str[position]
+        for letter in pair:
+            result[letter] = int(counts.to_numpy()[letters == letter].sum())
+    return result
+
+
+def dimension_letters(personality):
+    """DataFrame with E_I, S_N, T_F and J_P letter columns for every row"""
+    codes, uniques = pd.factorize(personality)
+    uniques = pd.Index(uniques).astype(str)
+    columns = {}
+    for position, name in enumerate(DIMENSION_COLUMNS):
+        letters = np.append(uniques.str[position].to_numpy(dtype=object), None)
+        columns[name] = letters[codes]  # code -1 (missing) picks the trailing None
+    return pd.DataFrame(columns, index=personality.index)
+
+
+def profile(df):
+    """All data quality checks for one DataFrame of raw survey responses"""
+    columns = feature_columns(df)
+    X, non_numeric = answer_matrix(df, columns)
+    has_target = TARGET_COLUMN in df.columns
+
+    labels = None
+    counts = None
+    if has_target:
+        labels, _ = pd.factorize(df[TARGET_COLUMN])
+        counts = type_counts(df[TARGET_COLUMN])
+
+    out_of_range, bad_values = range_violations(X)
+    return {
+        'n_rows': len(df),
+        'n_columns': df.shape[1],
+        'feature_columns': columns,
+        'missing': df.isna().sum(),
+        'non_numeric_columns': non_numeric,
+        'nan_counts': pd.Series(nan_counts(X), index=columns),
+        'out_of_range': pd.Series(out_of_range, index=columns),
+        'out_of_range_values': {columns[j]: values for j, values in bad_values.items()},
+        'level_counts': pd.DataFrame(level_counts(X), index=columns, columns=LIKERT_LEVELS),
+        'duplicate_rows': int(duplicate_rows(X, labels).sum()),
+        'duplicate_ids': int(df[ID_COLUMN].duplicated().sum()) if ID_COLUMN in df.columns else None,
+        'type_counts': counts,
+        'invalid_types': invalid_types(counts.index) if has_target else [],
+        'dimension_counts': dimension_counts(counts) if has_target else None
+    }
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def write_synthetic_csv(path, n_rows, n_questions=60, seed=42, chunk_rows=CHUNK_ROWS):
+    """Random survey CSV in the 16P.csv layout, with ~1% repeated rows"""
+    rng = np.random.default_rng(seed)
+    columns = [f'Question {i + 1}' for i in range(n_questions)]
+    previous = None
+    for start in range(0, n_rows, chunk_rows):
+        n = min(chunk_rows, n_rows - start)
+        answers = rng.integers(-3, 4, size=(n, n_questions), dtype=np.int8)
+        types = np.asarray(VALID_TYPES)[rng.integers(0, len(VALID_TYPES), n)]
+        if previous is not None:
+            repeat = rng.random(n) < 0.01
+            source = rng.integers(0, len(previous[0]), repeat.sum())
+            answers[repeat] = previous[0][source]
+            types[repeat] = previous[1][source]
+        chunk = pd.DataFrame(answers, columns=columns)
+        chunk.insert(0, ID_COLUMN, np.arange(start, start + n))
+        chunk[TARGET_COLUMN] = types
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+        previous = (answers, types)
+
+
+def legacy_checks(df):
+    """The original data_gathering_eda.py loops, for comparison"""
+    columns = feature_columns(df)
+    for col in columns:
+        numeric_col = pd.to_numeric(df[col], errors='coerce')
+        numeric_col[(numeric_col < -3) | (numeric_col > 3)]
+    df.isnull().sum()
+    df.drop(columns=[ID_COLUMN]).duplicated().sum()
+    for position, pair in enumerate(DIMENSIONS):
+        for letter in pair:
+            sum(1 for p in df[TARGET_COLUMN] if p[position] == letter)
+        df[TARGET_COLUMN].apply(lambda x: x[position])
+
+
+def run_benchmark(n_rows, path, compare_legacy):
+    print("=" * 80)
+    print(f"EDA PROFILE BENCHMARK ({n_rows:,} rows)")
+    print("=" * 80)
+
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_synthetic_csv(path, n_rows)
+        print(f"Wrote {path} ({os.path.getsize(path) / 1e9:.2f} GB) in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {col: np.int8 for col in header if col not in (ID_COLUMN, TARGET_COLUMN)}
+    dtypes[TARGET_COLUMN] = 'category'
+    df = pd.read_csv(path, dtype=dtypes)
+    print(f"Loaded {len(df):,} rows in {time.perf_counter() - start:.1f}s "
+          f"({df.memory_usage(deep=True).sum() / 1e6:,.0f} MB in memory)")
+
+    total = time_profile(df)
+    print(f"  {'total':<26} {total:8.2f}s  ({len(df) / total:,.0f} rows/s)")
+
+    if compare_legacy:
+        subset = df.head(LEGACY_ROWS).copy()
+        print(f"\nOn the first {len(subset):,} rows:")
+        vectorized = time_profile(subset, verbose=False)
+        subset[TARGET_COLUMN] = subset[TARGET_COLUMN].astype(object)
+        start = time.perf_counter()
+        legacy_checks(subset)
+        legacy = time.perf_counter() - start
+        print(f"  {'vectorized':<26} {vectorized:8.2f}s")
+        print(f"  {'legacy loops':<26} {legacy:8.2f}s  ({legacy / vectorized:.1f}x slower)")
+
+
+def time_profile(df, verbose=True):
+    """Seconds spent in each vectorized check (printed), returns the total"""
+    X, _ = answer_matrix(df)
+    labels, _ = pd.factorize(df[TARGET_COLUMN])
+    steps = [
+        ('answer matrix', lambda: answer_matrix(df)),
+        ('missing values', lambda: df.isna().sum()),
+        ('range check', lambda: range_violations(X)),
+        ('level counts', lambda: level_counts(X)),
+        ('duplicate rows', lambda: duplicate_rows(X, labels)),
+        ('type + dimension counts', lambda: dimension_counts(type_counts(df[TARGET_COLUMN]))),
+        ('dimension letters', lambda: dimension_letters(df[TARGET_COLUMN])),
+    ]
+    total = 0.0
+    for name, step in steps:
+        start = time.perf_counter()
+        step()
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        if verbose:
+            print(f"  {name:<26} {elapsed:8.2f}s")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vectorized data quality profile of survey responses')
+    parser.add_argument('data', nargs='?', default='16P.csv')
+    parser.add_argument('--encoding', default='cp1252')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Profile a synthetic file instead (written if it does not exist)')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--file', help='Synthetic CSV path for --benchmark')
+    parser.add_argument('--compare-legacy', action='store_true',
+                        help='Also time the original per-column / per-row loops')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        path = args.file or os.path.join(tempfile.gettempdir(), f'16P_synthetic_{args.rows}.csv')
+        run_benchmark(args.rows, path, args.compare_legacy)
+        return
+
+    result = profile(pd.read_csv(args.data, encoding=args.encoding))
+    print(f"Rows: {result['n_rows']:,}  Columns: {result['n_columns']}")
+    print(f"Missing values: {int(result['missing'].sum())}")
+    print(f"Non-numeric question columns: {len(result['non_numeric_columns'])} "
+          f"({int(result['nan_counts'].sum())} unparseable cells)")
+    print(f"Values outside -3..3: {int(result['out_of_range'].sum())} "
+          f"in {int((result['out_of_range'] > 0).sum())} columns")
+    print(f"Duplicate rows (answers + type): {result['duplicate_rows']:,}")
+    if result['duplicate_ids'] is not None:
+        print(f"Duplicate Response IDs: {result['duplicate_ids']:,}")
+    if result['type_counts'] is not None:
+        print(f"Personality types: {len(result['type_counts'])} (invalid: {result['invalid_types']})")
+        print("Dimensions: " + ", ".join(f"{letter}={count:,}"
+                                         for letter, count in result['dimension_counts'].items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Streaming EDA Profiler with Mergeable Statistics
+================================================
+
+data_gathering_eda.py loads the whole survey into one DataFrame and, for
+speed, correlates only 15 sampled questions. This profiler reads any number
+of response files in chunks and keeps only statistics that can be merged:
+
+- per-question counts of the 7 Likert levels
+- per-type row counts
+- per-question count, mean and sum of squared deviations (Chan et al.)
+- the full 60 x 60 co-moment matrix over rows with no missing answer
+- missing / non-numeric / out-of-range cell counts
+
+Memory is bounded by the chunk size however large the input. Profiles of
+separate files (or of the same file split across machines) can be saved and
+merged later; the result is identical to profiling everything at once. The
+full correlation heatmap and response distribution for all 60 questions are
+saved from the merged statistics to a results file and drawn headless by
+render_figures.py in a separate process (skipped with --no-figures).
+
+Usage:
+    python eda_streaming.py 16P.csv [more.csv ...] [--chunk-rows 200000]
+    python eda_streaming.py logs/day1.csv --save day1.npz
+    python eda_streaming.py --load day1.npz day2.npz --figures-dir eda_figures
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from eda_profile import (LIKERT_LEVELS, TARGET_COLUMN, answer_matrix, dimension_counts,
+                         feature_columns, level_counts, range_violations)
+from render_figures import render_in_new_process, save_results
+
+CHUNK_ROWS = 200_000
+
+
+class StreamingProfile:
+    """Mergeable summary statistics of survey responses"""
+
+    def __init__(self, columns):
+        n = len(columns)
+        self.columns = list(columns)
+        self.rows = 0
+        self.level_counts = np.zeros((n, len(LIKERT_LEVELS)), dtype=np.int64)
+        self.type_counts = pd.Series(dtype=np.int64)
+        self.missing = np.zeros(n, dtype=np.int64)           # NaN after numeric coercion
+        self.out_of_range = np.zeros(n, dtype=np.int64)
+        # Per-question moments over non-missing cells
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        # Co-moments over rows with every answer present
+        self.complete_rows = 0
+        self.complete_mean = np.zeros(n)
+        self.comoment = np.zeros((n, n))
+
+    @classmethod
+    def from_chunk(cls, df):
+        """Statistics of one DataFrame of responses"""
+        columns = feature_columns(df)
+        profile = cls(columns)
+        X, _ = answer_matrix(df, columns)
+        X = X.astype(np.float64)
+        missing = np.isnan(X)
+
+        profile.rows = len(df)
+        profile.level_counts = level_counts(X)
+        profile.out_of_range = range_violations(X)[0]
+        profile.missing = missing.sum(axis=0)
+        if TARGET_COLUMN in df.columns:
+            profile.type_counts = df[TARGET_COLUMN].value_counts().astype(np.int64)
+
+        profile.count = len(df) - profile.missing
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profile.mean = np.where(profile.count > 0, np.nansum(X, axis=0) / profile.count, 0.0)
+        profile.m2 = np.nansum((X - profile.mean) ** 2, axis=0)
+
+        complete = X[~missing.any(axis=1)]
+        profile.complete_rows = len(complete)
+        if len(complete):
+            profile.complete_mean = complete.mean(axis=0)
+            centered = complete - profile.complete_mean
+            profile.comoment = centered.T @ centered
+        return profile
+
+    def merge(self, other):
+        """Combine with another profile in place (same questions); returns self"""
+        if other.columns != self.columns:
+            raise ValueError('Profiles cover different question columns')
+
+        # Per-question moments: pairwise update of count, mean and M2
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(n > 0, other.count / n, 0.0)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * weight
+        self.mean = self.mean + delta * weight
+        self.count = n
+
+        # Co-moments: the same update with the outer product of the mean shift
+        n = self.complete_rows + other.complete_rows
+        if n > 0:
+            delta = other.complete_mean - self.complete_mean
+            factor = self.complete_rows * other.complete_rows / n
+            self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * factor
+            self.complete_mean = self.complete_mean + delta * other.complete_rows / n
+        self.complete_rows = n
+
+        self.rows += other.rows
+        self.level_counts = self.level_counts + other.level_counts
+        self.missing = self.missing + other.missing
+        self.out_of_range = self.out_of_range + other.out_of_range
+        self.type_counts = self.type_counts.add(other.type_counts, fill_value=0).astype(np.int64)
+        return self
+
+    # ------------------------------------------------------------------
+    # Derived statistics
+    # ------------------------------------------------------------------
+    @property
+    def variance(self):
+        """Sample variance of each question"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.m2 / (self.count - 1)
+
+    def covariance(self):
+        return self.comoment / max(self.complete_rows - 1, 1)
+
+    def correlation(self):
+        """Pearson correlation of all question pairs (complete rows)"""
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.comoment / np.outer(std, std)
+
+    def summary(self):
+        """Per-question table: count, mean, std, missing, out of range, level shares"""
+        table = pd.DataFrame({
+            'Count': self.count,
+            'Mean': self.mean,
+            'Std': np.sqrt(self.variance),
+            'Missing': self.missing,
+            'Out of Range': self.out_of_range
+        }, index=pd.Index(self.columns, name='Question'))
+        shares = self.level_counts / np.maximum(self.level_counts.sum(axis=1, keepdims=True), 1)
+        for k, level in enumerate(LIKERT_LEVELS):
+            table[f'% {level:+d}'] = shares[:, k] * 100
+        return table
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            columns=json.dumps(self.columns),
+            type_labels=json.dumps([str(label) for label in self.type_counts.index]),
+            type_values=self.type_counts.to_numpy(dtype=np.int64),
+            rows=self.rows, complete_rows=self.complete_rows,
+            level_counts=self.level_counts, missing=self.missing, out_of_range=self.out_of_range,
+            count=self.count, mean=self.mean, m2=self.m2,
+            complete_mean=self.complete_mean, comoment=self.comoment
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            profile = cls(json.loads(str(data['columns'])))
+            profile.type_counts = pd.Series(data['type_values'],
+                                            index=json.loads(str(data['type_labels'])))
+            profile.rows = int(data['rows'])
+            profile.complete_rows = int(data['complete_rows'])
+            for name in ('level_counts', 'missing', 'out_of_range', 'count', 'mean', 'm2',
+                         'complete_mean', 'comoment'):
+                setattr(profile, name, data[name])
+        return profile
+
+
+def profile_csv(path, chunk_rows=CHUNK_ROWS, encoding='cp1252', profile=None):
+    """Stream one CSV into a profile (a new one, or merged into `profile`)"""
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, encoding=encoding):
+        chunk_profile = StreamingProfile.from_chunk(chunk)
+        profile = chunk_profile if profile is None else profile.merge(chunk_profile)
+    return profile
+
+
+def short_name(column, length):
+    return column[:length] + "..." if len(column) > length else column
+
+
+def save_figure_data(profile, figures_dir):
+    """Results file of the response distribution and correlation heatmap for all questions
+
+    render_figures.py draws them (kind 'eda_streaming'); returns its path.
+    """
+    path = os.path.join(figures_dir, 'eda_streaming_figure_data.npz')
+    save_results(
+        path, 'eda_streaming',
+        columns=profile.columns, response_values=list(LIKERT_LEVELS),
+        level_shares=profile.level_counts / np.maximum(profile.level_counts.sum(axis=1, keepdims=True), 1) * 100,
+        rows=profile.rows, complete_rows=profile.complete_rows,
+        correlation=profile.correlation()
+    )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chunked EDA profile with mergeable statistics')
+    parser.add_argument('data', nargs='*', help='Response CSV files')
+    parser.add_argument('--load', nargs='*', default=[], help='Saved profiles (.npz) to merge in')
+    parser.add_argument('--save', help='Write the merged profile to this .npz')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--encoding', default='cp1252')
+    parser.add_argument('--output-dir', default='.', help='Where eda_streaming_summary.csv goes')
+    parser.add_argument('--figures-dir', default='eda_figures')
+    parser.add_argument('--no-figures', action='store_true')
+    args = parser.parse_args()
+    if not args.data and not args.load:
+        args.data = ['16P.csv']
+
+    print("=" * 80)
+    print("STREAMING EDA PROFILE")
+    print("=" * 80)
+
+    profile = None
+    for path in args.load:
+        loaded = StreamingProfile.load(path)
+        profile = loaded if profile is None else profile.merge(loaded)
+        print(f"Loaded profile {path}: {loaded.rows:,} rows")
+    for path in args.data:
+        start = time.perf_counter()
+        rows_before = profile.rows if profile is not None else 0
+        profile = profile_csv(path, args.chunk_rows, args.encoding, profile)
+        rows = profile.rows - rows_before
+        elapsed = time.perf_counter() - start
+        print(f"Profiled {path}: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+    if args.save:
+        profile.save(args.save)
+        print(f"Saved: {args.save}")
+
+    print(f"\nRows: {profile.rows:,}  (complete: {profile.complete_rows:,})")
+    print(f"Missing / non-numeric cells: {int(profile.missing.sum()):,}")
+    print(f"Values outside -3..3: {int(profile.out_of_range.sum()):,}")
+    if len(profile.type_counts):
+        counts = profile.type_counts.sort_values(ascending=False)
+        print(f"Personality types: {len(counts)}  (imbalance {counts.max() / counts.min():.2f}:1)")
+        dims = dimension_counts(counts)
+        print("Dimensions: " + ", ".join(f"{letter}={count:,}" for letter, count in dims.items()))
+
+    corr = profile.correlation()
+    upper = np.triu_indices_from(corr, k=1)
+    order = np.argsort(-np.abs(corr[upper]))[:5]
+    print("\nStrongest question correlations:")
+    for k in order:
+        i, j = upper[0][k], upper[1][k]
+        print(f"  {corr[i, j]:+.3f}  {short_name(profile.columns[i], 35)} / {short_name(profile.columns[j], 35)}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, 'eda_streaming_summary.csv')
+    profile.summary().to_csv(summary_path)
+    print(f"\nSaved: {summary_path}")
+    figure_data_path = save_figure_data(profile, args.figures_dir)
+    print(f"Saved: {figure_data_path}")
+    if args.no_figures:
+        print(f"Figures skipped; render them with: python render_figures.py {figure_data_path}")
+    elif not render_in_new_process([figure_data_path]):
+        print(f"Rendering failed; retry with: python render_figures.py {figure_data_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Factorized vs 16-Class Model Comparison
+=======================================
+
+Trains each model family both ways on the same 70/15/15 split, the usual
+16-class model and the factorized one (four binary axis models, see
+factorized_model.py), and reports side by side:
+
+- accuracy: 16-class test accuracy, top-3, macro F1, mean per-axis accuracy
+- size: serialized model bytes and number of trees
+- latency: single-row predict_proba (p50/p95) and batch throughput
+
+Results are printed and saved to factorized_comparison.csv.
+
+Usage:
+    python compare_factorized.py [--families xgb rf lr lda] [--features-per-axis 20] [--params best_params.json]
+"""
+
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score, top_k_accuracy_score
+from xgboost import XGBClassifier
+
+from factorized_model import (AXES, DATA_PATH, FAMILIES, FEATURES_PER_AXIS, SCRIPT_DIR,
+                              FactorizedClassifier, fit_estimator, load_and_preprocess_data,
+                              make_estimator, split_data)
+from model_params import add_params_argument, load_params
+
+# Rows timed one at a time for the single-row latency
+LATENCY_ROWS = 300
+# Repeats of the batch timing (best is kept)
+BATCH_REPEATS = 3
+
+
+def xgb_size(model):
+    """(bytes, trees) of an XGBClassifier up to its best iteration"""
+    booster = model.get_booster()
+    best = getattr(model, 'best_iteration', None)
+    if best is not None:
+        booster = booster[:best + 1]
+    return len(booster.save_raw('ubj')), len(booster.get_dump())
+
+
+def model_size(model):
+    """(serialized bytes, number of trees or None) of a 16-class or factorized model"""
+    if isinstance(model, FactorizedClassifier):
+        sizes = [model_size(axis_model) for axis_model in model.axis_models]
+        trees = [t for _, t in sizes]
+        return sum(b for b, _ in sizes), (None if None in trees else sum(trees))
+    if isinstance(model, XGBClassifier):
+        return xgb_size(model)
+    final = model.steps[-1][1] if hasattr(model, 'steps') else model
+    trees = len(final.estimators_) if hasattr(final, 'estimators_') else None
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)), trees
+
+
+def time_latency(model, X):
+    """Single-row p50/p95 (microseconds) and batch rows/sec of predict_proba"""
+    rows = X[:LATENCY_ROWS]
+    model.predict_proba(rows[:1])  # warm up
+    single = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        model.predict_proba(rows[i:i + 1])
+        single.append(time.perf_counter() - start)
+    single = np.array(single) * 1e6
+
+    best = float('inf')
+    for _ in range(BATCH_REPEATS):
+        start = time.perf_counter()
+        model.predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return float(np.percentile(single, 50)), float(np.percentile(single, 95)), len(X) / best
+
+
+def axis_accuracy(pred, y_true, class_names):
+    """Mean over E/I, S/N, T/F, J/P of the accuracy of the predicted letter"""
+    names = np.asarray(class_names)
+    predicted, actual = names[pred], names[y_true]
+    return float(np.mean([np.mean([p[i] == a[i] for p, a in zip(predicted, actual)])
+                          for i in range(len(AXES))]))
+
+
+def evaluate(label, family, model, X_test, y_test, class_names, questions, train_seconds):
+    proba = model.predict_proba(X_test)
+    pred = proba.argmax(axis=1)
+    size_bytes, trees = model_size(model)
+    p50, p95, rows_per_sec = time_latency(model, X_test)
+    return {
+        'Family': family,
+        'Model': label,
+        'Questions': questions,
+        'Test Accuracy': accuracy_score(y_test, pred),
+        'Top-3 Accuracy': top_k_accuracy_score(y_test, proba, k=3,
+                                               labels=np.arange(len(class_names))),
+        'Macro F1': f1_score(y_test, pred, average='macro'),
+        'Axis Accuracy': axis_accuracy(pred, y_test, class_names),
+        'Size KB': size_bytes / 1024,
+        'Trees': trees,
+        'Train s': train_seconds,
+        'Single-row p50 us': p50,
+        'Single-row p95 us': p95,
+        'Batch rows/s': rows_per_sec
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare factorized and 16-class models')
+    parser.add_argument('--families', nargs='+', choices=FAMILIES, default=FAMILIES)
+    parser.add_argument('--features-per-axis', type=int, default=FEATURES_PER_AXIS)
+    parser.add_argument('--data', default=DATA_PATH)
+    add_params_argument(parser)
+    parser.add_argument('--output', default=os.path.join(SCRIPT_DIR, 'factorized_comparison.csv'))
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("FACTORIZED VS 16-CLASS MODEL COMPARISON")
+    print("=" * 80)
+
+    X, y, feature_names = load_and_preprocess_data(args.data)
+    X_train, X_val, X_test, y_train, y_val, y_test, le = split_data(X, y)
+    class_names = list(le.classes_)
+    X_train, X_val, X_test = (np.asarray(part, dtype=np.float32) for part in (X_train, X_val, X_test))
+
+    results = []
+    for family in args.families:
+        params = load_params(family, args.params)
+        print(f"\n[{family}] Training 16-class model...")
+        start = time.perf_counter()
+        full = fit_estimator(make_estimator(family, binary=False, n_classes=len(class_names),
+                                            params=params),
+                             X_train, y_train, X_val, y_val)
+        results.append(evaluate('16-class', family, full, X_test, y_test, class_names,
+                                len(feature_names), time.perf_counter() - start))
+
+        print(f"[{family}] Training factorized model ({args.features_per_axis} questions per axis)...")
+        start = time.perf_counter()
+        factorized = FactorizedClassifier(family, args.features_per_axis, params)
+        factorized.fit(X_train, y_train, X_val, y_val, class_names)
+        results.append(evaluate('factorized', family, factorized, X_test, y_test, class_names,
+                                factorized.n_questions, time.perf_counter() - start))
+
+    df = pd.DataFrame(results)
+    df.to_csv(args.output, index=False)
+
+    print("\n" + "=" * 80)
+    print("RESULTS (Test Set)")
+    print("=" * 80)
+    print(f"{'Family':<7} {'Model':<11} {'Qs':>3} {'Acc':>7} {'Top-3':>7} {'Axis':>7} "
+          f"{'Size KB':>9} {'Trees':>6} {'p50 us':>8} {'rows/s':>10}")
+    print("-" * 80)
+    for row in results:
+        trees = '-' if row['Trees'] is None else f"{row['Trees']}"
+        print(f"{row['Family']:<7} {row['Model']:<11} {row['Questions']:>3} "
+              f"{row['Test Accuracy']:>7.4f} {row['Top-3 Accuracy']:>7.4f} {row['Axis Accuracy']:>7.4f} "
+              f"{row['Size KB']:>9.1f} {trees:>6} {row['Single-row p50 us']:>8.1f} "
+              f"{row['Batch rows/s']:>10,.0f}")
+    print("=" * 80)
+    print(f"Saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Factorized Classifier for 16 Personality Types (MBTI)
+=====================================================
+
+Trains four binary classifiers (E/I, S/N, T/F, J/P), each on its own most
+relevant questions, and combines their probabilities into the 16-class
+distribution (see factorized_model.py). Uses the same 70/15/15 split and
+hyperparameters as the technique scripts.
+
+Usage:
+    python factorized_classifier.py [--family xgb|rf|lr|lda] [--features-per-axis 20] [--params best_params.json]
+"""
+
+import argparse
+import json
+import os
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score, classification_report, f1_score, top_k_accuracy_score
+
+from factorized_model import (AXIS_NAMES, DATA_PATH, FAMILIES, FEATURES_PER_AXIS, RANDOM_STATE,
+                              SCRIPT_DIR, FactorizedClassifier, axis_targets,
+                              load_and_preprocess_data, split_data)
+from model_params import add_params_argument, load_params
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train a factorized (per-axis) MBTI classifier')
+    parser.add_argument('--family', choices=FAMILIES, default='xgb',
+                        help='xgb (XGBoost), rf (Random Forest), lr (Logistic Regression), lda')
+    parser.add_argument('--features-per-axis', type=int, default=FEATURES_PER_AXIS)
+    parser.add_argument('--data', default=DATA_PATH)
+    add_params_argument(parser)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("FACTORIZED CLASSIFIER FOR 16 PERSONALITY TYPES")
+    print(f"Model family: {args.family}, {args.features_per_axis} questions per axis")
+    print("=" * 80)
+
+    # Load and split data (same split as every technique script)
+    print("\n[STEP 1] Loading and splitting data (70/15/15)...")
+    X, y, feature_names = load_and_preprocess_data(args.data)
+    X_train, X_val, X_test, y_train, y_val, y_test, le = split_data(X, y)
+    class_names = list(le.classes_)
+
+    # Train the four axis models
+    print("\n[STEP 2] Training one binary model per axis...")
+    model = FactorizedClassifier(args.family, args.features_per_axis,
+                                 load_params(args.family, args.params))
+    model.fit(X_train, y_train, X_val, y_val, class_names)
+    print(f"  -> Distinct questions used: {model.n_questions} of {len(feature_names)}")
+
+    # Evaluate
+    print("\n[STEP 3] Evaluating combined 16-class predictions...")
+    X_test = np.asarray(X_test, dtype=np.float32)
+    test_proba = model.predict_proba(X_test)
+    test_pred = test_proba.argmax(axis=1)
+    test_acc = accuracy_score(y_test, test_pred)
+    top3_acc = top_k_accuracy_score(y_test, test_proba, k=3, labels=np.arange(len(class_names)))
+    macro_f1 = f1_score(y_test, test_pred, average='macro')
+    axis_acc = model.axis_accuracy(X_test, axis_targets(y_test, class_names))
+
+    print(f"  Test Accuracy:  {test_acc:.4f} ({test_acc*100:.2f}%)")
+    print(f"  Top-3 Accuracy: {top3_acc:.4f} ({top3_acc*100:.2f}%)")
+    print(f"  Macro F1-Score: {macro_f1:.4f}")
+    for name, acc in zip(AXIS_NAMES, axis_acc):
+        print(f"  {name} Accuracy:  {acc:.4f}")
+
+    # Save outputs
+    print("\n[STEP 4] Saving outputs...")
+    model_path = os.path.join(SCRIPT_DIR, f'factorized_{args.family}_model.joblib')
+    joblib.dump(model, model_path)
+    print(f"  -> Saved: {model_path}")
+
+    questions_path = os.path.join(SCRIPT_DIR, f'factorized_{args.family}_questions.json')
+    with open(questions_path, 'w') as f:
+        json.dump({name: {'indices': features.tolist(),
+                          'features': [feature_names[i] for i in features]}
+                   for name, features in zip(AXIS_NAMES, model.axis_features)}, f, indent=2)
+    print(f"  -> Saved: {questions_path}")
+
+    report_path = os.path.join(SCRIPT_DIR, f'factorized_{args.family}_evaluation_report.txt')
+    with open(report_path, 'w') as f:
+        f.write("=" * 80 + "\n")
+        f.write("FACTORIZED CLASSIFIER EVALUATION REPORT\n")
+        f.write("16 Personality Types (MBTI) Classification\n")
+        f.write("=" * 80 + "\n\n")
+
+        f.write("CONFIGURATION\n")
+        f.write("-" * 40 + "\n")
+        f.write(f"Random State: {RANDOM_STATE}\n")
+        f.write(f"Model Family: {args.family}\n")
+        f.write(f"Questions per Axis: {args.features_per_axis}\n")
+        f.write(f"Distinct Questions Used: {model.n_questions}\n\n")
+
+        f.write("ACCURACY SCORES (Test Set)\n")
+        f.write("-" * 40 + "\n")
+        f.write(f"16-Class Accuracy: {test_acc:.4f} ({test_acc*100:.2f}%)\n")
+        f.write(f"Top-3 Accuracy:    {top3_acc:.4f} ({top3_acc*100:.2f}%)\n")
+        f.write(f"Macro F1-Score:    {macro_f1:.4f}\n")
+        for name, acc in zip(AXIS_NAMES, axis_acc):
+            f.write(f"{name} Accuracy:      {acc:.4f}\n")
+        f.write("\n")
+
+        f.write("CLASSIFICATION REPORT (Test Set)\n")
+        f.write("-" * 80 + "\n")
+        f.write(classification_report(y_test, test_pred, labels=np.arange(len(class_names)),
+                                      target_names=class_names, digits=4, zero_division=0))
+        f.write("\n")
+
+        f.write("QUESTIONS PER AXIS\n")
+        f.write("-" * 80 + "\n")
+        for name, features in zip(AXIS_NAMES, model.axis_features):
+            f.write(f"{name}:\n")
+            for i in features:
+                f.write(f"  [{i:2}] {feature_names[i]}\n")
+    print(f"  -> Saved: {report_path}")
+
+    print("\n" + "=" * 80)
+    print(f"✓ Factorized {args.family} model: {test_acc:.2%} test accuracy")
+    print("  Compare against the 16-class models with: python compare_factorized.py")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Factorized MBTI Classifier (E/I, S/N, T/F, J/P)
+================================================
+
+Instead of one 16-way model, trains four binary classifiers, one per MBTI
+axis, each on the questions most relevant to that axis. The 16-class
+distribution is the product of the four axis probabilities:
+
+    P(INTJ) = P(I) * P(N) * P(T) * P(J)
+
+so a factorized XGBoost model grows 4 trees per boosting round (one per
+axis) instead of 16, and each tree only looks at its axis's questions.
+
+Shared by factorized_classifier.py (training) and compare_factorized.py
+(accuracy / size / latency comparison against the 16-class models).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from xgboost import XGBClassifier
+
+# Paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+DATA_PATH = os.path.join(PARENT_DIR, '16P_eda_cleaned.csv')
+
+# Same hyperparameters as the technique scripts (model_params.py), with the
+# 16-way objective swapped for a binary one in the factorized models
+sys.path.insert(0, PARENT_DIR)
+from model_params import EARLY_STOPPING_ROUNDS, RANDOM_STATE, load_params
+
+# Data splits (same as every technique script)
+TEST_SIZE = 0.15      # 15% for test
+VAL_SIZE = 0.176      # 15% of remaining 85% ≈ 15% of total
+
+# The four MBTI axes, in type-string order; the first letter is the positive class
+AXES = [('E', 'I'), ('S', 'N'), ('T', 'F'), ('J', 'P')]
+AXIS_NAMES = ['E_I', 'S_N', 'T_F', 'J_P']
+
+# Questions kept per axis
+FEATURES_PER_AXIS = 20
+
+FAMILIES = ['xgb', 'rf', 'lr', 'lda']
+
+
+def load_and_preprocess_data(data_path=DATA_PATH):
+    """Load 16P_eda_cleaned.csv; returns (X, y, feature_names)"""
+    print(f"Loading data from: {data_path}")
+    try:
+        df = pd.read_csv(data_path)
+    except UnicodeDecodeError:
+        df = pd.read_csv(data_path, encoding='cp1252')
+
+    if 'Response Id' in df.columns:
+        df = df.drop(columns=['Response Id'])
+
+    X = df.drop(columns=['Personality'])
+    y = df['Personality']
+    feature_names = X.columns.tolist()
+    print(f"Dataset shape: {df.shape}")
+    return X, y, feature_names
+
+
+def split_data(X, y):
+    """70/15/15 stratified split, identical to the technique scripts"""
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+
+    # First split: 85% train+val, 15% test
+    X_temp, X_test, y_temp, y_test = train_test_split(
+        X, y_encoded,
+        test_size=TEST_SIZE,
+        random_state=RANDOM_STATE,
+        stratify=y_encoded
+    )
+
+    # Second split: 70% train, 15% val (of total)
+    X_train, X_val, y_train, y_val = train_test_split(
+        X_temp, y_temp,
+        test_size=VAL_SIZE,
+        random_state=RANDOM_STATE,
+        stratify=y_temp
+    )
+
+    print(f"Training set:   {len(X_train):,} samples ({len(X_train)/len(X)*100:.1f}%)")
+    print(f"Validation set: {len(X_val):,} samples ({len(X_val)/len(X)*100:.1f}%)")
+    print(f"Test set:       {len(X_test):,} samples ({len(X_test)/len(X)*100:.1f}%)")
+
+    return X_train, X_val, X_test, y_train, y_val, y_test, le
+
+
+def axis_targets(y, class_names):
+    """(n, 4) 0/1 matrix: 1 where the type has the first letter of the axis"""
+    letters = np.array([[name[i] == first for i, (first, _) in enumerate(AXES)]
+                        for name in class_names], dtype=np.int64)
+    return letters[np.asarray(y)]
+
+
+def make_estimator(family, binary=True, n_classes=16, params=None):
+    """Fresh estimator of the given family with the repo's hyperparameters
+
+    params: hyperparameters to use instead (load_params from model_params.py)
+    """
+    params = dict(params or load_params(family))
+    if family == 'xgb':
+        if binary:
+            params['objective'] = 'binary:logistic'
+        else:
+            params.update(objective='multi:softprob', num_class=n_classes)
+        return XGBClassifier(**params, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    if family == 'rf':
+        return RandomForestClassifier(**params)
+    if family == 'lr':
+        return make_pipeline(StandardScaler(), LogisticRegression(**params))
+    if family == 'lda':
+        return make_pipeline(StandardScaler(), LinearDiscriminantAnalysis(**params))
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def fit_estimator(estimator, X_train, y_train, X_val, y_val):
+    """Fit; XGBoost uses the validation set for early stopping"""
+    if isinstance(estimator, XGBClassifier):
+        estimator.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    else:
+        estimator.fit(X_train, y_train)
+    return estimator
+
+
+def feature_importances(estimator):
+    """Per-feature importance of a fitted estimator (trees or |coef|)"""
+    final = estimator.steps[-1][1] if hasattr(estimator, 'steps') else estimator
+    if hasattr(final, 'feature_importances_'):
+        return np.asarray(final.feature_importances_, dtype=np.float64)
+    # Linear models: the inputs are standardized, so |coef| is comparable
+    return np.abs(np.asarray(final.coef_, dtype=np.float64)).sum(axis=0)
+
+
+class FactorizedClassifier:
+    """Four binary axis classifiers combined into a 16-class distribution"""
+
+    def __init__(self, family='xgb', features_per_axis=FEATURES_PER_AXIS, params=None):
+        self.family = family
+        self.features_per_axis = features_per_axis
+        self.params = params
+        self.class_names = None
+        self.axis_features = []   # per axis: column indices into the 60 questions
+        self.axis_models = []
+
+    def fit(self, X_train, y_train, X_val, y_val, class_names):
+        """Select each axis's questions, then fit that axis on them only
+
+        Questions are ranked by the importance they get in a binary model
+        of the same family fitted on all questions for that axis.
+        """
+        X_train = np.asarray(X_train, dtype=np.float32)
+        X_val = np.asarray(X_val, dtype=np.float32)
+        self.class_names = list(class_names)
+        t_train = axis_targets(y_train, self.class_names)
+        t_val = axis_targets(y_val, self.class_names)
+
+        self.axis_features = []
+        self.axis_models = []
+        for axis, name in enumerate(AXIS_NAMES):
+            ranking = fit_estimator(make_estimator(self.family, params=self.params), X_train, t_train[:, axis],
+                                    X_val, t_val[:, axis])
+            order = np.argsort(-feature_importances(ranking), kind='stable')
+            features = np.sort(order[:self.features_per_axis])
+
+            model = fit_estimator(make_estimator(self.family, params=self.params),
+                                  X_train[:, features], t_train[:, axis],
+                                  X_val[:, features], t_val[:, axis])
+            self.axis_features.append(features)
+            self.axis_models.append(model)
+            print(f"  -> {name}: {len(features)} questions, "
+                  f"val accuracy {self.axis_accuracy(X_val, t_val)[axis]:.4f}")
+        return self
+
+    def axis_proba(self, X):
+        """(n, 4) probability of the first letter of each axis"""
+        X = np.asarray(X, dtype=np.float32)
+        return np.column_stack([model.predict_proba(X[:, features])[:, 1]
+                                for features, model in zip(self.axis_features, self.axis_models)])
+
+    def axis_accuracy(self, X, targets):
+        """Accuracy of each axis model that has been fitted so far"""
+        X = np.asarray(X, dtype=np.float32)
+        return [float(np.mean((model.predict_proba(X[:, features])[:, 1] >= 0.5) == targets[:, axis]))
+                for axis, (features, model) in enumerate(zip(self.axis_features, self.axis_models))]
+
+    def predict_proba(self, X):
+        """(n, 16) class probabilities in class_names order"""
+        p_first = self.axis_proba(X)
+        first = axis_targets(np.arange(len(self.class_names)), self.class_names).astype(bool)
+        # For each class and axis, P(first letter) or P(second letter)
+        per_axis = np.where(first[None, :, :], p_first[:, None, :], 1.0 - p_first[:, None, :])
+        return per_axis.prod(axis=2)
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+
+    @property
+    def n_questions(self):
+        """Distinct questions used across the four axes"""
+        return len(set(np.concatenate(self.axis_features).tolist()))
@@ -6,6 +6,10 @@ This script trains an XGBoost classifier on the 16P personality dataset
 with a 70/15/15 train/validation/test split and provides detailed evaluation.
 
 All operations use fixed random seeds for reproducibility.
+
+Training is checkpointed every --checkpoint-interval rounds (xgb_checkpoint.py)
+and resumes from the latest checkpoint if the run was interrupted. The
+validation loss of every round is kept in checkpoints/xgb_eval_history.csv.
 """
 
 import pandas as pd
@@ -22,12 +26,20 @@ from sklearn.metrics import (
     top_k_accuracy_score
 )
 from xgboost import XGBClassifier
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
+import sys
+import time
 import warnings
 import os
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xgb_checkpoint import DEFAULT_INTERVAL, fit_with_checkpoints
+from model_params import EARLY_STOPPING_ROUNDS, add_params_argument, load_params
+from render_figures import render_in_new_process, save_results
+from run_artifacts import (ARTIFACT_DIR, dataset_hash, evaluate, importance_section, load_artifact,
+                           report_from_cache, run_key, save_artifact, split_hash, write_report)
+
 # =============================================================================
 # CONFIGURATION - All random seeds for reproducibility
 # =============================================================================
@@ -38,22 +50,20 @@ np.random.seed(RANDOM_STATE)
 TEST_SIZE = 0.15      # 15% for test
 VAL_SIZE = 0.176      # 15% of remaining 85% ≈ 15% of total
 
-# XGBoost hyperparameters
-XGBOOST_PARAMS = {
-    'n_estimators': 500,
-    'learning_rate': 0.1,
-    'max_depth': 6,
-    'min_child_weight': 1,
-    'subsample': 0.8,
-    'colsample_bytree': 0.8,
-    'objective': 'multi:softprob',
-    'num_class': 16,
-    'random_state': RANDOM_STATE,
-    'n_jobs': -1,
-    'verbosity': 0
-}
-
-EARLY_STOPPING_ROUNDS = 15
+# Hyperparameters: the shared defaults (model_params.py), overridden by tuned ones
+# (best_params.json from tune_hyperparameters.py)
+parser = argparse.ArgumentParser(description='XGBoost classifier for 16 personality types')
+add_params_argument(parser)
+parser.add_argument('--checkpoint-dir', default='checkpoints')
+parser.add_argument('--checkpoint-interval', type=int, default=DEFAULT_INTERVAL,
+                    help='Boosting rounds between checkpoints')
+parser.add_argument('--no-resume', action='store_true', help='Ignore existing checkpoints')
+parser.add_argument('--no-figures', action='store_true',
+                    help='Only save the figure data; skip rendering (matplotlib is not imported)')
+parser.add_argument('--no-cache', action='store_true',
+                    help='Retrain even if a run with the same data, split and parameters is saved')
+args = parser.parse_args()
+XGBOOST_PARAMS = load_params('xgb', args.params, num_class=16)
 
 # =============================================================================
 # STEP 1: LOAD DATA
@@ -62,6 +72,10 @@ print("=" * 80)
 print("GRADIENT BOOSTING CLASSIFIER FOR 16 PERSONALITY TYPES")
 print("=" * 80)
 
+if args.params:
+    print(f"\nUsing tuned hyperparameters from: {args.params}")
+
+START_TIME = time.perf_counter()
 print("\n[STEP 1] Loading data...")
 df = pd.read_csv('16P_eda_cleaned.csv')
 print(f"  -> Loaded {len(df):,} rows and {len(df.columns)} columns")
@@ -117,6 +131,15 @@ for i, name in enumerate(class_names[:4]):  # Show first 4 as sample
     print(f"    {name}: Train={train_count}, Val={val_count}, Test={test_count}")
 print("    ...")
 
+# Unchanged data, split and hyperparameters: reuse the saved run instead of retraining
+DATASET_HASH = dataset_hash(df)
+SPLIT_HASH = split_hash(X_train.index, X_val.index, X_test.index)
+RUN_KEY = run_key('xgb', {**XGBOOST_PARAMS, 'early_stopping_rounds': EARLY_STOPPING_ROUNDS}, DATASET_HASH, SPLIT_HASH)
+cached_run = None if args.no_cache else load_artifact(ARTIFACT_DIR, 'xgb', RUN_KEY)
+if cached_run is not None:
+    report_from_cache(cached_run, 'xgb', figures=not args.no_figures)
+    sys.exit(0)
+
 # =============================================================================
 # STEP 4: TRAIN XGBOOST MODEL
 # =============================================================================
@@ -128,27 +151,33 @@ print(f"  -> early_stopping_rounds: {EARLY_STOPPING_ROUNDS}")
 
 model = XGBClassifier(**XGBOOST_PARAMS, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
 
-model.fit(
-    X_train, y_train,
-    eval_set=[(X_val, y_val)],
-    verbose=False
+fit_start = time.perf_counter()
+model, eval_history = fit_with_checkpoints(
+    model, X_train, y_train, X_val, y_val,
+    args.checkpoint_dir, 'xgb', args.checkpoint_interval, resume=not args.no_resume
 )
+fit_seconds = time.perf_counter() - fit_start
+val_loss = eval_history['validation_0']['mlogloss']
 
 best_iteration = model.best_iteration
 print(f"\n  -> Training complete!")
 print(f"  -> Best iteration: {best_iteration} (stopped early from {XGBOOST_PARAMS['n_estimators']})")
+print(f"  -> Rounds trained: {len(val_loss)}, best validation logloss: {val_loss[best_iteration]:.4f}")
+print(f"  -> Saved: {args.checkpoint_dir}/xgb_eval_history.csv")
 
 # =============================================================================
 # STEP 5: PREDICTIONS
 # =============================================================================
 print("\n[STEP 5] Making predictions...")
 
+predict_start = time.perf_counter()
 y_train_pred = model.predict(X_train)
 y_val_pred = model.predict(X_val)
 y_test_pred = model.predict(X_test)
 
 # Probability predictions for top-k accuracy
 y_test_proba = model.predict_proba(X_test)
+predict_seconds = time.perf_counter() - predict_start
 
 # =============================================================================
 # STEP 6: DETAILED EVALUATION
@@ -220,104 +249,53 @@ for i, row in importance_df.head(15).iterrows():
 # =============================================================================
 print("\n[STEP 7] Saving visualizations...")
 
-# Create output directory for figures
-os.makedirs('figures', exist_ok=True)
-
-# 7.1 Confusion Matrix Heatmap
-plt.figure(figsize=(14, 12))
-sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-            xticklabels=class_names, yticklabels=class_names)
-plt.title('Confusion Matrix - Gradient Boosting (16 Personality Types)', fontsize=14)
-plt.xlabel('Predicted', fontsize=12)
-plt.ylabel('Actual', fontsize=12)
-plt.tight_layout()
-plt.savefig('figures/xgb_confusion_matrix.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/xgb_confusion_matrix.png")
-
-# 7.2 Feature Importance Plot
-plt.figure(figsize=(12, 10))
-top_20 = importance_df.head(20)
-short_names = [f[:40] + "..." if len(f) > 40 else f for f in top_20['Feature']]
-plt.barh(range(len(top_20)), top_20['Importance'].values, color='steelblue')
-plt.yticks(range(len(top_20)), short_names)
-plt.xlabel('Importance Score', fontsize=12)
-plt.title('Top 20 Most Important Features - Gradient Boosting', fontsize=14)
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.savefig('figures/xgb_feature_importance.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/xgb_feature_importance.png")
-
-# 7.3 Per-Class Accuracy Bar Chart
-per_class_accuracy = cm.diagonal() / cm.sum(axis=1)
-plt.figure(figsize=(12, 6))
-colors = plt.cm.viridis(np.linspace(0.3, 0.9, len(class_names)))
-bars = plt.bar(class_names, per_class_accuracy, color=colors)
-plt.axhline(y=test_acc, color='red', linestyle='--', label=f'Overall Accuracy: {test_acc:.2%}')
-plt.xlabel('Personality Type', fontsize=12)
-plt.ylabel('Accuracy', fontsize=12)
-plt.title('Per-Class Accuracy - Gradient Boosting', fontsize=14)
-plt.xticks(rotation=45)
-plt.legend()
-plt.ylim(0, 1)
-for bar, acc in zip(bars, per_class_accuracy):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01, 
-             f'{acc:.1%}', ha='center', va='bottom', fontsize=8)
-plt.tight_layout()
-plt.savefig('figures/xgb_per_class_accuracy.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/xgb_per_class_accuracy.png")
+# The figures are drawn by render_figures.py (headless, in parallel) from this
+# results file, which can also be re-rendered later without retraining
+FIGURE_DATA_PATH = 'figures/xgb_figure_data.npz'
+save_results(FIGURE_DATA_PATH, 'classifier', prefix='xgb', class_names=list(class_names), cm=cm,
+             top_features=list(importance_df['Feature'].head(20)),
+             top_importance=importance_df['Importance'].head(20).to_numpy(), test_acc=test_acc,
+             val_loss=np.asarray(val_loss), best_iteration=best_iteration)
+print(f"  -> Saved: {FIGURE_DATA_PATH}")
+if args.no_figures:
+    print(f"  -> Figures skipped; render them with: python ../render_figures.py {FIGURE_DATA_PATH}")
+elif not render_in_new_process([FIGURE_DATA_PATH]):
+    print(f"  [!] Rendering failed; retry with: python ../render_figures.py {FIGURE_DATA_PATH}")
 
 # =============================================================================
 # STEP 8: SAVE DETAILED RESULTS TO FILE
 # =============================================================================
 print("\n[STEP 8] Saving detailed results to file...")
 
-with open('xgb_evaluation_report.txt', 'w') as f:
-    f.write("=" * 80 + "\n")
-    f.write("GRADIENT BOOSTING EVALUATION REPORT\n")
-    f.write("16 Personality Types (MBTI) Classification\n")
-    f.write("=" * 80 + "\n\n")
-    
-    f.write("CONFIGURATION\n")
-    f.write("-" * 40 + "\n")
-    f.write(f"Random State: {RANDOM_STATE}\n")
-    f.write(f"Data Split: 70% Train / 15% Validation / 15% Test\n")
-    f.write(f"Total Samples: {len(df):,}\n")
-    f.write(f"Training Samples: {len(X_train):,}\n")
-    f.write(f"Validation Samples: {len(X_val):,}\n")
-    f.write(f"Test Samples: {len(X_test):,}\n\n")
-    
-    f.write("XGBOOST HYPERPARAMETERS\n")
-    f.write("-" * 40 + "\n")
-    for key, value in XGBOOST_PARAMS.items():
-        f.write(f"{key}: {value}\n")
-    f.write(f"early_stopping_rounds: {EARLY_STOPPING_ROUNDS}\n")
-    f.write(f"best_iteration: {best_iteration}\n\n")
-    
-    f.write("ACCURACY SCORES\n")
-    f.write("-" * 40 + "\n")
-    f.write(f"Training Accuracy:   {train_acc:.4f} ({train_acc*100:.2f}%)\n")
-    f.write(f"Validation Accuracy: {val_acc:.4f} ({val_acc*100:.2f}%)\n")
-    f.write(f"Test Accuracy:       {test_acc:.4f} ({test_acc*100:.2f}%)\n\n")
-    
-    f.write("TOP-K ACCURACY (Test Set)\n")
-    f.write("-" * 40 + "\n")
-    for k in [1, 2, 3, 5]:
-        top_k_acc = top_k_accuracy_score(y_test, y_test_proba, k=k)
-        f.write(f"Top-{k} Accuracy: {top_k_acc:.4f} ({top_k_acc*100:.2f}%)\n")
-    f.write("\n")
-    
-    f.write("CLASSIFICATION REPORT (Test Set)\n")
-    f.write("-" * 80 + "\n")
-    f.write(classification_report(y_test, y_test_pred, target_names=class_names, digits=4))
-    f.write("\n")
-    
-    f.write("TOP 20 IMPORTANT FEATURES\n")
-    f.write("-" * 80 + "\n")
-    for i, (_, row) in enumerate(importance_df.head(20).iterrows()):
-        f.write(f"{i+1:2}. [{row['Importance']:.4f}] {row['Feature']}\n")
+# Everything the report shows goes into the run artifact; the report is written from it
+artifact = save_artifact(ARTIFACT_DIR, {
+    'model': 'xgb',
+    'key': RUN_KEY,
+    'dataset_hash': DATASET_HASH,
+    'split_hash': SPLIT_HASH,
+    'report': {
+        'title': "GRADIENT BOOSTING EVALUATION REPORT",
+        'model_name': "XGBoost Gradient Boosting Classifier",
+        'params_title': "XGBOOST HYPERPARAMETERS"
+    },
+    'config': {
+        'Random State': RANDOM_STATE,
+        'Data Split': "70% Train / 15% Validation / 15% Test",
+        'Total Samples': len(df),
+        'Training Samples': len(X_train),
+        'Validation Samples': len(X_val),
+        'Test Samples': len(X_test)
+    },
+    'params': XGBOOST_PARAMS,
+    'model_info': {'early_stopping_rounds': EARLY_STOPPING_ROUNDS, 'best_iteration': best_iteration},
+    'metrics': evaluate(class_names, y_test, y_test_pred, y_test_proba,
+                        train=(y_train, y_train_pred), validation=(y_val, y_val_pred)),
+    'feature_importance': importance_section(importance_df, "TOP 20 IMPORTANT FEATURES"),
+    'validation_mlogloss': val_loss,
+    'timings': {'fit_s': fit_seconds, 'predict_s': predict_seconds,
+                'total_s': time.perf_counter() - START_TIME}
+})
+write_report(artifact, 'xgb_evaluation_report.txt')
 
 print("  -> Saved: xgb_evaluation_report.txt")
 
@@ -346,8 +324,11 @@ OUTPUT FILES:
   • figures/xgb_confusion_matrix.png
   • figures/xgb_feature_importance.png
   • figures/xgb_per_class_accuracy.png
+  • figures/xgb_validation_curve.png
+  • figures/xgb_figure_data.npz (figure data, render_figures.py)
   • xgb_evaluation_report.txt
   • xgb_feature_importance.csv
+  • {args.checkpoint_dir}/xgb_eval_history.csv
 
 Reproducibility: All operations used random_state={RANDOM_STATE}
 """)
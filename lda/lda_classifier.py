@@ -23,12 +23,20 @@ from sklearn.metrics import (
     recall_score,
     top_k_accuracy_score
 )
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
+import sys
+import time
 import warnings
 import os
 warnings.filterwarnings('ignore')
 
+# render_figures.py lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_params import add_params_argument, load_params
+from render_figures import render_in_new_process, save_results
+from run_artifacts import (ARTIFACT_DIR, dataset_hash, evaluate, importance_section, load_artifact,
+                           report_from_cache, run_key, save_artifact, split_hash, write_report)
+
 # =============================================================================
 # CONFIGURATION - All random seeds for reproducibility
 # =============================================================================
@@ -39,13 +47,16 @@ np.random.seed(RANDOM_STATE)
 TEST_SIZE = 0.15      # 15% for test
 VAL_SIZE = 0.176      # 15% of remaining 85% ≈ 15% of total
 
-# LDA hyperparameters
-LDA_PARAMS = {
-    'solver': 'svd',              # SVD solver (doesn't require matrix inversion)
-    'n_components': None,         # Use all discriminant components (min(n_classes-1, n_features))
-    'store_covariance': False,    # Don't store covariance for memory efficiency
-    'tol': 1e-4                   # Threshold for rank estimation
-}
+# Hyperparameters: the shared defaults (model_params.py), overridden by tuned ones
+# (best_params.json from tune_hyperparameters.py)
+parser = argparse.ArgumentParser(description='LDA classifier for 16 personality types')
+add_params_argument(parser)
+parser.add_argument('--no-figures', action='store_true',
+                    help='Only save the figure data; skip rendering (matplotlib is not imported)')
+parser.add_argument('--no-cache', action='store_true',
+                    help='Retrain even if a run with the same data, split and parameters is saved')
+args = parser.parse_args()
+LDA_PARAMS = load_params('lda', args.params)
 
 # =============================================================================
 # STEP 1: LOAD DATA
@@ -54,6 +65,10 @@ print("=" * 80)
 print("LINEAR DISCRIMINANT ANALYSIS CLASSIFIER FOR 16 PERSONALITY TYPES")
 print("=" * 80)
 
+if args.params:
+    print(f"\nUsing tuned hyperparameters from: {args.params}")
+
+START_TIME = time.perf_counter()
 print("\n[STEP 1] Loading data...")
 df = pd.read_csv('16P_eda_cleaned.csv')
 print(f"  -> Loaded {len(df):,} rows and {len(df.columns)} columns")
@@ -109,6 +124,15 @@ for i, name in enumerate(class_names[:4]):  # Show first 4 as sample
     print(f"    {name}: Train={train_count}, Val={val_count}, Test={test_count}")
 print("    ...")
 
+# Unchanged data, split and hyperparameters: reuse the saved run instead of retraining
+DATASET_HASH = dataset_hash(df)
+SPLIT_HASH = split_hash(X_train.index, X_val.index, X_test.index)
+RUN_KEY = run_key('lda', LDA_PARAMS, DATASET_HASH, SPLIT_HASH)
+cached_run = None if args.no_cache else load_artifact(ARTIFACT_DIR, 'lda', RUN_KEY)
+if cached_run is not None:
+    report_from_cache(cached_run, 'lda', figures=not args.no_figures)
+    sys.exit(0)
+
 # =============================================================================
 # STEP 4: FEATURE SCALING (Important for LDA)
 # =============================================================================
@@ -128,7 +152,9 @@ print(f"  -> n_components: {LDA_PARAMS['n_components']} (will use min(n_classes-
 
 model = LinearDiscriminantAnalysis(**LDA_PARAMS)
 
+fit_start = time.perf_counter()
 model.fit(X_train_scaled, y_train)
+fit_seconds = time.perf_counter() - fit_start
 
 n_components_used = model.scalings_.shape[1]
 print(f"\n  -> Training complete!")
@@ -140,12 +166,14 @@ print(f"  -> Explained variance ratio (first 5): {model.explained_variance_ratio
 # =============================================================================
 print("\n[STEP 6] Making predictions...")
 
+predict_start = time.perf_counter()
 y_train_pred = model.predict(X_train_scaled)
 y_val_pred = model.predict(X_val_scaled)
 y_test_pred = model.predict(X_test_scaled)
 
 # Probability predictions for top-k accuracy
 y_test_proba = model.predict_proba(X_test_scaled)
+predict_seconds = time.perf_counter() - predict_start
 
 # =============================================================================
 # STEP 7: DETAILED EVALUATION
@@ -220,104 +248,54 @@ for i, row in importance_df.head(15).iterrows():
 # =============================================================================
 print("\n[STEP 8] Saving visualizations...")
 
-# Create output directory for figures
-os.makedirs('figures', exist_ok=True)
-
-# 8.1 Confusion Matrix Heatmap
-plt.figure(figsize=(14, 12))
-sns.heatmap(cm, annot=True, fmt='d', cmap='Purples',
-            xticklabels=class_names, yticklabels=class_names)
-plt.title('Confusion Matrix - LDA (16 Personality Types)', fontsize=14)
-plt.xlabel('Predicted', fontsize=12)
-plt.ylabel('Actual', fontsize=12)
-plt.tight_layout()
-plt.savefig('figures/lda_confusion_matrix.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/lda_confusion_matrix.png")
-
-# 8.2 Feature Importance Plot (Coefficient-based)
-plt.figure(figsize=(12, 10))
-top_20 = importance_df.head(20)
-short_names = [f[:40] + "..." if len(f) > 40 else f for f in top_20['Feature']]
-plt.barh(range(len(top_20)), top_20['Importance'].values, color='mediumpurple')
-plt.yticks(range(len(top_20)), short_names)
-plt.xlabel('Mean Absolute Coefficient', fontsize=12)
-plt.title('Top 20 Most Important Features - LDA', fontsize=14)
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.savefig('figures/lda_feature_importance.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/lda_feature_importance.png")
-
-# 8.3 Per-Class Accuracy Bar Chart
-per_class_accuracy = cm.diagonal() / cm.sum(axis=1)
-plt.figure(figsize=(12, 6))
-colors = plt.cm.Purples(np.linspace(0.4, 0.9, len(class_names)))
-bars = plt.bar(class_names, per_class_accuracy, color=colors)
-plt.axhline(y=test_acc, color='red', linestyle='--', label=f'Overall Accuracy: {test_acc:.2%}')
-plt.xlabel('Personality Type', fontsize=12)
-plt.ylabel('Accuracy', fontsize=12)
-plt.title('Per-Class Accuracy - LDA', fontsize=14)
-plt.xticks(rotation=45)
-plt.legend()
-plt.ylim(0, 1)
-for bar, acc in zip(bars, per_class_accuracy):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01, 
-             f'{acc:.1%}', ha='center', va='bottom', fontsize=8)
-plt.tight_layout()
-plt.savefig('figures/lda_per_class_accuracy.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/lda_per_class_accuracy.png")
+# The figures are drawn by render_figures.py (headless, in parallel) from this
+# results file, which can also be re-rendered later without retraining
+FIGURE_DATA_PATH = 'figures/lda_figure_data.npz'
+save_results(FIGURE_DATA_PATH, 'classifier', prefix='lda', class_names=list(class_names), cm=cm,
+             top_features=list(importance_df['Feature'].head(20)),
+             top_importance=importance_df['Importance'].head(20).to_numpy(), test_acc=test_acc)
+print(f"  -> Saved: {FIGURE_DATA_PATH}")
+if args.no_figures:
+    print(f"  -> Figures skipped; render them with: python ../render_figures.py {FIGURE_DATA_PATH}")
+elif not render_in_new_process([FIGURE_DATA_PATH]):
+    print(f"  [!] Rendering failed; retry with: python ../render_figures.py {FIGURE_DATA_PATH}")
 
 # =============================================================================
 # STEP 9: SAVE DETAILED RESULTS TO FILE
 # =============================================================================
 print("\n[STEP 9] Saving detailed results to file...")
 
-with open('lda_evaluation_report.txt', 'w') as f:
-    f.write("=" * 80 + "\n")
-    f.write("LINEAR DISCRIMINANT ANALYSIS (LDA) EVALUATION REPORT\n")
-    f.write("16 Personality Types (MBTI) Classification\n")
-    f.write("=" * 80 + "\n\n")
-    
-    f.write("CONFIGURATION\n")
-    f.write("-" * 40 + "\n")
-    f.write(f"Random State: {RANDOM_STATE}\n")
-    f.write(f"Data Split: 70% Train / 15% Validation / 15% Test\n")
-    f.write(f"Total Samples: {len(df):,}\n")
-    f.write(f"Training Samples: {len(X_train):,}\n")
-    f.write(f"Validation Samples: {len(X_val):,}\n")
-    f.write(f"Test Samples: {len(X_test):,}\n\n")
-    
-    f.write("LDA HYPERPARAMETERS\n")
-    f.write("-" * 40 + "\n")
-    for key, value in LDA_PARAMS.items():
-        f.write(f"{key}: {value}\n")
-    f.write(f"n_components (used): {n_components_used}\n")
-    f.write(f"explained_variance_ratio (first 5): {model.explained_variance_ratio_[:5].round(4).tolist()}\n\n")
-    
-    f.write("ACCURACY SCORES\n")
-    f.write("-" * 40 + "\n")
-    f.write(f"Training Accuracy:   {train_acc:.4f} ({train_acc*100:.2f}%)\n")
-    f.write(f"Validation Accuracy: {val_acc:.4f} ({val_acc*100:.2f}%)\n")
-    f.write(f"Test Accuracy:       {test_acc:.4f} ({test_acc*100:.2f}%)\n\n")
-    
-    f.write("TOP-K ACCURACY (Test Set)\n")
-    f.write("-" * 40 + "\n")
-    for k in [1, 2, 3, 5]:
-        top_k_acc = top_k_accuracy_score(y_test, y_test_proba, k=k)
-        f.write(f"Top-{k} Accuracy: {top_k_acc:.4f} ({top_k_acc*100:.2f}%)\n")
-    f.write("\n")
-    
-    f.write("CLASSIFICATION REPORT (Test Set)\n")
-    f.write("-" * 80 + "\n")
-    f.write(classification_report(y_test, y_test_pred, target_names=class_names, digits=4))
-    f.write("\n")
-    
-    f.write("TOP 20 IMPORTANT FEATURES (by LDA coefficient magnitude)\n")
-    f.write("-" * 80 + "\n")
-    for i, (_, row) in enumerate(importance_df.head(20).iterrows()):
-        f.write(f"{i+1:2}. [{row['Importance']:.4f}] {row['Feature']}\n")
+# Everything the report shows goes into the run artifact; the report is written from it
+artifact = save_artifact(ARTIFACT_DIR, {
+    'model': 'lda',
+    'key': RUN_KEY,
+    'dataset_hash': DATASET_HASH,
+    'split_hash': SPLIT_HASH,
+    'report': {
+        'title': "LINEAR DISCRIMINANT ANALYSIS (LDA) EVALUATION REPORT",
+        'model_name': "Linear Discriminant Analysis (LDA)",
+        'params_title': "LDA HYPERPARAMETERS"
+    },
+    'config': {
+        'Random State': RANDOM_STATE,
+        'Data Split': "70% Train / 15% Validation / 15% Test",
+        'Total Samples': len(df),
+        'Training Samples': len(X_train),
+        'Validation Samples': len(X_val),
+        'Test Samples': len(X_test)
+    },
+    'params': LDA_PARAMS,
+    'model_info': {
+        'n_components (used)': n_components_used,
+        'explained_variance_ratio (first 5)': model.explained_variance_ratio_[:5].round(4).tolist()
+    },
+    'metrics': evaluate(class_names, y_test, y_test_pred, y_test_proba,
+                        train=(y_train, y_train_pred), validation=(y_val, y_val_pred)),
+    'feature_importance': importance_section(importance_df, "TOP 20 IMPORTANT FEATURES (by LDA coefficient magnitude)"),
+    'timings': {'fit_s': fit_seconds, 'predict_s': predict_seconds,
+                'total_s': time.perf_counter() - START_TIME}
+})
+write_report(artifact, 'lda_evaluation_report.txt')
 
 print("  -> Saved: lda_evaluation_report.txt")
 
@@ -346,6 +324,7 @@ OUTPUT FILES:
   • figures/lda_confusion_matrix.png
   • figures/lda_feature_importance.png
   • figures/lda_per_class_accuracy.png
+  • figures/lda_figure_data.npz (figure data, render_figures.py)
   • lda_evaluation_report.txt
   • lda_feature_importance.csv
 
@@ -4,12 +4,23 @@ Supports both FULL (60 questions) and SHORT (35 questions) models
 Updated for Vercel deployment
 """
 
-from flask import Flask, request, jsonify
+import time
+IMPORT_STARTED = time.perf_counter()  # Before the heavy imports, for cold start timing
+
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-import json
-import numpy as np
 import os
-import onnxruntime as ort
+import sys
+import threading
+
+import fast_json
+from ingest_log import IngestionLog
+from bulk_score import (DEFAULT_BATCH_SIZE, ThroughputMeter, encode_ndjson, read_csv,
+                        read_ndjson, score_batches)
+from metadata import DEFAULT_TYPES, Metadata
+from model_bundle import LazyBundle, predict_payload, select_model
+from serving_stats import ServingStats
+from tree_shap import top_contributions
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
@@ -18,49 +29,72 @@ CORS(app)  # Enable CORS for frontend requests
 API_DIR = os.path.dirname(__file__)
 FULL_MODEL_PATH = os.path.join(API_DIR, 'mbti_model.onnx')
 SHORT_MODEL_PATH = os.path.join(API_DIR, 'mbti_model_short.onnx')
-LABELS_PATH = os.path.join(API_DIR, 'labels.json')
-TOP_35_PATH = os.path.join(API_DIR, 'top_35_questions.json')
+SHORT_PREFIX_TABLE_PATH = os.path.join(API_DIR, 'mbti_model_short_prefix.npz')
+FULL_EXPLAINER_PATH = os.path.join(API_DIR, 'mbti_model_shap.npz')
+SHORT_EXPLAINER_PATH = os.path.join(API_DIR, 'mbti_model_short_shap.npz')
+
+# Cold start options (environment variables, all off by default)
+# MBTI_LAZY_LOAD=1      load each model on first use instead of at import
+# MBTI_PREFETCH=1       with lazy loading, load the other models after the first response
+# MBTI_WARMUP_ROUTE=1   enable /api/warmup for the platform to ping
+# MBTI_INGEST_LOG=path  record answered quizzes to this SQLite file (ingest_log.py)
+LAZY_LOAD = os.environ.get('MBTI_LAZY_LOAD', '0') == '1'
+PREFETCH = os.environ.get('MBTI_PREFETCH', '0') == '1'
+WARMUP_ROUTE = os.environ.get('MBTI_WARMUP_ROUTE', '0') == '1'
+INGEST_LOG_PATH = os.environ.get('MBTI_INGEST_LOG')
+
+# Upper bound for ?batch_size= on /api/predict/bulk
+MAX_BULK_BATCH_SIZE = 8192
+
+# /api/explain: at most MBTI_EXPLAIN_CONCURRENCY explanations run at once
+# (about 2 ms of CPU each); further requests get 503 instead of queueing
+# behind them and delaying /predict
+EXPLAIN_CONCURRENCY = int(os.environ.get('MBTI_EXPLAIN_CONCURRENCY', '1'))
+DEFAULT_EXPLAIN_TOP = 5
+explain_slots = threading.BoundedSemaphore(EXPLAIN_CONCURRENCY)
 
 # Global variables for loaded models
-full_session = None
-short_session = None
+full_model = None
+short_model = None
+metadata = None
 class_labels = None
 top_35_indices = None
 init_error = None
+serving_stats = ServingStats()
+ingestion_log = IngestionLog(INGEST_LOG_PATH) if INGEST_LOG_PATH else None
 
 
 def load_models():
-    """Load both full and short models"""
-    global full_session, short_session, class_labels, top_35_indices, init_error
+    """Load metadata and, unless lazy loading is enabled, both models"""
+    global full_model, short_model, metadata, class_labels, top_35_indices, init_error
     
     try:
-        # Load full model (60 questions)
-        if os.path.exists(FULL_MODEL_PATH):
-            full_session = ort.InferenceSession(FULL_MODEL_PATH)
-            print(f"✓ Full model loaded: {FULL_MODEL_PATH}")
-        else:
-            print(f"✗ Full model not found: {FULL_MODEL_PATH}")
-        
-        # Load short model (35 questions)
-        if os.path.exists(SHORT_MODEL_PATH):
-            short_session = ort.InferenceSession(SHORT_MODEL_PATH)
-            print(f"✓ Short model loaded: {SHORT_MODEL_PATH}")
-        else:
-            print(f"✗ Short model not found: {SHORT_MODEL_PATH}")
-        
-        # Load labels
-        if os.path.exists(LABELS_PATH):
-            with open(LABELS_PATH, 'r') as f:
-                class_labels = json.load(f)
+        # Load labels and question lists (read once, served from memory)
+        metadata = Metadata(API_DIR)
+        class_labels = metadata.labels
+        if class_labels is not None:
             print(f"✓ Labels loaded: {len(class_labels)} classes")
         
-        # Load top 35 question indices
-        if os.path.exists(TOP_35_PATH):
-            with open(TOP_35_PATH, 'r') as f:
-                top_35_data = json.load(f)
-                top_35_indices = top_35_data.get('indices', [])
+        top_35_indices = metadata.top_35_indices
+        if top_35_indices is not None:
             print(f"✓ Top 35 indices loaded: {len(top_35_indices)} questions")
         
+        # Full model (60 questions) and short model (35 questions), with the
+        # optional prefix table for the short model (built by prefix_tables.py)
+        full_model = LazyBundle('full', FULL_MODEL_PATH, 60, class_labels,
+                                explainer_path=FULL_EXPLAINER_PATH)
+        short_model = LazyBundle('short', SHORT_MODEL_PATH, 35, class_labels,
+                                 prefix_table_path=SHORT_PREFIX_TABLE_PATH,
+                                 explainer_path=SHORT_EXPLAINER_PATH)
+        
+        for model in (full_model, short_model):
+            if not model.available:
+                print(f"✗ {model.model_used.capitalize()} model not found: {model.model_path}")
+            elif LAZY_LOAD:
+                print(f"… {model.model_used.capitalize()} model will load on first use")
+            else:
+                model.get()
+        
         print("Models loaded successfully!")
         
     except Exception as e:
@@ -68,8 +102,51 @@ def load_models():
         init_error = str(e)
 
 
+def prefetch_models():
+    """Load any models that are not loaded yet (runs in a background thread)"""
+    for model in (full_model, short_model):
+        try:
+            if model is not None:
+                model.get()
+        except Exception as e:
+            print(f"Error prefetching {model.model_used} model: {e}")
+
+
 # Load models at startup
 load_models()
+serving_stats.record_import(time.perf_counter() - IMPORT_STARTED)
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_timing(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        first = serving_stats.record_request(request.path, time.perf_counter() - started)
+        if first and LAZY_LOAD and PREFETCH:
+            # Start loading once the first response has been sent
+            response.call_on_close(
+                lambda: threading.Thread(target=prefetch_models, daemon=True).start()
+            )
+    return response
+
+
+def json_response(payload, status=200):
+    """JSON response encoded with fast_json (orjson when installed)"""
+    return Response(fast_json.dumps(payload), status=status, mimetype='application/json')
+
+
+def static_json_response(document):
+    """Serve a pre-serialized metadata document with ETag revalidation"""
+    status, body, headers = document.select(
+        if_none_match=request.headers.get('If-None-Match'),
+        accept_encoding=request.headers.get('Accept-Encoding')
+    )
+    return Response(body, status=status, headers=headers, mimetype='application/json')
 
 
 @app.route('/health', methods=['GET'])
@@ -78,9 +155,11 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'full_model_loaded': full_session is not None,
-        'short_model_loaded': short_session is not None,
-        'labels_loaded': class_labels is not None
+        'full_model_loaded': full_model is not None and full_model.loaded,
+        'short_model_loaded': short_model is not None and short_model.loaded,
+        'labels_loaded': class_labels is not None,
+        'lazy_load': LAZY_LOAD,
+        'ingest_log': ingestion_log.stats() if ingestion_log is not None else None
     })
 
 
@@ -93,103 +172,170 @@ def predict():
     - 60 answers: Uses full model
     - 35 answers: Uses short model (must be in correct feature order)
     - {"answers": [...], "mode": "short"}: Uses short model with index mapping
+    
+    Optional "format": "compact" (or ?format=compact) returns probabilities
+    as a list aligned with /api/types instead of a type -> value dict.
+    
+    Optional "self_reported_type" (e.g. "INTJ") is stored with the answers
+    when the ingestion log is enabled.
     """
     try:
-        data = request.get_json()
+        data = fast_json.loads(request.get_data(cache=False))
         answers = data.get('answers', [])
         mode = data.get('mode', 'auto')  # 'full', 'short', or 'auto'
+        compact = data.get('format', request.args.get('format')) == 'compact'
+        
+        # Pick the model (full, short or auto) and run inference
+        payload, status = predict_payload(full_model, short_model, answers, mode, compact)
+        if ingestion_log is not None and status == 200:
+            log_response(answers, payload, data.get('self_reported_type'))
+        return json_response(payload, status)
         
-        # Determine which model to use
-        if mode == 'short' or len(answers) == 35:
-            # Short model (35 questions)
-            if short_session is None:
-                return jsonify({'error': 'Short model not loaded'}), 500
-            
-            if len(answers) != 35:
-                return jsonify({'error': f'Short mode requires 35 answers, got {len(answers)}'}), 400
-            
-            session = short_session
-            X = np.array(answers, dtype=np.float32).reshape(1, -1)
-            model_used = 'short'
-            
-        elif mode == 'full' or len(answers) == 60:
-            # Full model (60 questions)
-            if full_session is None:
-                return jsonify({'error': 'Full model not loaded'}), 500
-            
-            if len(answers) != 60:
-                return jsonify({'error': f'Full mode requires 60 answers, got {len(answers)}'}), 400
-            
-            session = full_session
-            X = np.array(answers, dtype=np.float32).reshape(1, -1)
-            model_used = 'full'
-            
-        else:
-            return jsonify({
-                'error': f'Invalid number of answers: {len(answers)}. Expected 60 (full) or 35 (short).'
-            }), 400
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+def log_response(answers, payload, self_reported_type):
+    """Queue an answered quiz for the ingestion log (in memory only)"""
+    if self_reported_type not in (class_labels or ()):
+        self_reported_type = None
+    try:
+        ingestion_log.record(answers, payload['model_used'], payload['predicted_type'],
+                             self_reported_type)
+    except Exception as e:
+        print(f"[ingest] could not record response: {e}")
+
+
+@app.route('/predict/bulk', methods=['POST'])
+@app.route('/api/predict/bulk', methods=['POST'])
+def predict_bulk():
+    """Score a stream of answer rows, streaming NDJSON results back
+    
+    The body is NDJSON ({"answers": [...], "mode": ..., "id": ...} per line)
+    or, with Content-Type: text/csv, CSV rows of answers. Rows are read and
+    scored ?batch_size= at a time (default 1024), so memory stays flat
+    however long the upload is. Each output line is the /predict body plus
+    the row's id, or {"id": ..., "error": ...} for a row that cannot be
+    scored. ?format=compact works as for /predict.
+    """
+    try:
+        batch_size = int(request.args.get('batch_size', DEFAULT_BATCH_SIZE))
+    except ValueError:
+        return json_response({'error': 'batch_size must be an integer'}, 400)
+    batch_size = max(1, min(batch_size, MAX_BULK_BATCH_SIZE))
+    compact = request.args.get('format') == 'compact'
+    
+    lines = request.stream  # read lazily, line by line
+    records = read_csv(lines) if request.mimetype == 'text/csv' else read_ndjson(lines)
+    batches = score_batches(records, full_model, short_model, batch_size, compact,
+                            ThroughputMeter(label='bulk', stream=sys.stdout))
+    return Response(stream_with_context(encode_ndjson(batches)), mimetype='application/x-ndjson')
+
+
+@app.route('/explain', methods=['POST'])
+@app.route('/api/explain', methods=['POST'])
+def explain():
+    """Predict and explain which answers drove the prediction
+    
+    Same body as /predict, plus optional "top" (questions to return,
+    default 5) and "type" (explain this type instead of the predicted one).
+    Returns the /predict body with an "explanation": the type explained,
+    its base value and the top questions by absolute TreeSHAP contribution
+    to that type's score (log-odds), with the question text and answer.
+    """
+    try:
+        data = fast_json.loads(request.get_data(cache=False))
+        answers = data.get('answers', [])
+        mode = data.get('mode', 'auto')
+        top = max(1, min(int(data.get('top', DEFAULT_EXPLAIN_TOP)), len(answers) or 1))
         
-        # Run inference
-        input_name = session.get_inputs()[0].name
-        outputs = session.run(None, {input_name: X})
+        bundle, error, status = select_model(full_model, short_model, answers, mode)
+        if bundle is None:
+            return json_response({'error': error}, status)
+        explainer = bundle.explainer()
+        if explainer is None:
+            return json_response({'error': f'No explainer for the {bundle.model_used} model'}, 501)
         
-        # Process outputs
-        if len(outputs) >= 2:
-            probabilities = outputs[1][0]
-            if isinstance(probabilities, dict):
-                prob_list = [probabilities[i] for i in range(len(class_labels))]
-            else:
-                prob_list = probabilities
-        else:
-            prob_list = outputs[0][0]
+        explained_type = data.get('type')
+        if explained_type is not None and explained_type not in bundle.labels:
+            return json_response({'error': f'Unknown type: {explained_type}'}, 400)
         
-        prediction_idx = int(np.argmax(prob_list))
-        predicted_type = class_labels[prediction_idx]
-        confidence = float(np.max(prob_list))
+        if not explain_slots.acquire(blocking=False):
+            return json_response({'error': 'Too many explanation requests, try again shortly'}, 503)
+        try:
+            response = bundle.predict(answers)
+            explained_type = explained_type or response['predicted_type']
+            contributions, base_value = explainer.shap_values(answers,
+                                                              bundle.labels.index(explained_type))
+        finally:
+            explain_slots.release()
         
-        # Create probabilities dictionary
-        prob_dict = {
-            class_labels[i]: float(prob_list[i])
-            for i in range(len(class_labels))
+        question_ids = top_35_indices if bundle.n_answers == 35 else range(bundle.n_answers)
+        questions = metadata.all_questions if metadata is not None else None
+        response['explanation'] = {
+            'type': explained_type,
+            'base_value': base_value,
+            'units': 'log-odds',
+            'top_questions': top_contributions(contributions, answers, list(question_ids),
+                                               questions, top)
         }
-        
-        return jsonify({
-            'predicted_type': predicted_type,
-            'confidence': confidence,
-            'probabilities': prob_dict,
-            'model_used': model_used,
-            'questions_answered': len(answers)
-        })
+        return json_response(response)
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
+
+
+@app.route('/warmup', methods=['GET', 'POST'])
+@app.route('/api/warmup', methods=['GET', 'POST'])
+def warmup():
+    """Load every model and run one prediction through each (opt-in)"""
+    if not WARMUP_ROUTE:
+        return jsonify({'error': 'Not found'}), 404
+    
+    models = {}
+    for model in (full_model, short_model):
+        if model is None:
+            continue
+        bundle = model.get()
+        if bundle is not None:
+            bundle.predict([0] * model.n_answers)
+        models[model.model_used] = {
+            'loaded': model.loaded,
+            'load_ms': None if model.load_seconds is None else model.load_seconds * 1000
+        }
+    
+    return jsonify({
+        'status': 'warm',
+        'models': models,
+        'timings': serving_stats.summary()
+    })
 
 
 @app.route('/questions/short', methods=['GET'])
 @app.route('/api/questions/short', methods=['GET'])
 def get_short_questions():
     """Get the indices and details of the 35 short questions"""
-    if top_35_indices is None:
+    if metadata is None or metadata.short_questions_doc is None:
         return jsonify({'error': 'Top 35 questions not loaded'}), 500
-    
-    try:
-        with open(TOP_35_PATH, 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return static_json_response(metadata.short_questions_doc)
+
+
+@app.route('/questions', methods=['GET'])
+@app.route('/api/questions', methods=['GET'])
+def get_all_questions():
+    """Get the text of all 60 questions in model feature order"""
+    if metadata is None or metadata.all_questions_doc is None:
+        return jsonify({'error': 'Questions not loaded'}), 500
+    return static_json_response(metadata.all_questions_doc)
 
 
 @app.route('/types', methods=['GET'])
 @app.route('/api/types', methods=['GET'])
 def get_types():
     """Get all possible personality types"""
-    if class_labels is None:
-        return jsonify({
-            'types': ['INTJ', 'INTP', 'ENTJ', 'ENTP', 'INFJ', 'INFP', 'ENFJ', 'ENFP',
-                     'ISTJ', 'ISFJ', 'ESTJ', 'ESFJ', 'ISTP', 'ISFP', 'ESTP', 'ESFP']
-        })
-    return jsonify({'types': class_labels})
+    if metadata is None:
+        return jsonify({'types': DEFAULT_TYPES})
+    return static_json_response(metadata.types_doc)
 
 
 if __name__ == '__main__':
@@ -199,7 +345,12 @@ if __name__ == '__main__':
     print("Endpoints:")
     print("  GET  /health          - Health check")
     print("  POST /predict         - Predict personality (60 or 35 questions)")
+    print("  POST /predict/bulk    - Score NDJSON/CSV rows, streaming NDJSON")
+    print("  POST /explain         - Predict and list the most influential answers")
     print("  GET  /questions/short - Get short questionnaire details")
+    print("  GET  /questions       - Get all 60 questions")
     print("  GET  /types           - Get all personality types")
+    if WARMUP_ROUTE:
+        print("  GET  /warmup          - Load and warm up all models")
     print("="*50 + "\n")
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,241 @@
+"""
+ASGI variant of the MBTI prediction API
+
+Same routes and responses as app.py (/predict, /health, /types,
+/questions/short, /questions, each also under /api/), written against the
+raw ASGI interface so it needs no web framework. Request handling is async;
+inference (and lazy model loading) runs in a bounded thread pool, since
+onnxruntime releases the GIL while a session runs. Sessions run on one
+intra-op thread each, so the pool's threads do not oversubscribe the
+cores. When every inference slot and queue position is taken, /predict
+answers 503 with Retry-After instead of queueing without limit, so slow
+clients cost a coroutine rather than a worker.
+
+Usage:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+
+Environment:
+    MBTI_INFERENCE_THREADS  inference threads (default: CPU count)
+    MBTI_INFERENCE_QUEUE    requests allowed to wait for a thread (default: 512)
+    MBTI_LAZY_LOAD=1        load each model on first use (as in app.py)
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import onnxruntime as ort
+
+import fast_json
+from metadata import Metadata
+from model_bundle import LazyBundle, predict_payload
+
+# File paths
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+FULL_MODEL_PATH = os.path.join(API_DIR, 'mbti_model.onnx')
+SHORT_MODEL_PATH = os.path.join(API_DIR, 'mbti_model_short.onnx')
+SHORT_PREFIX_TABLE_PATH = os.path.join(API_DIR, 'mbti_model_short_prefix.npz')
+
+LAZY_LOAD = os.environ.get('MBTI_LAZY_LOAD', '0') == '1'
+INFERENCE_THREADS = int(os.environ.get('MBTI_INFERENCE_THREADS', os.cpu_count() or 1))
+# A prediction takes well under a millisecond, so a burst of several hundred
+# queued requests waits tens of milliseconds; 503 is for sustained overload
+INFERENCE_QUEUE = int(os.environ.get('MBTI_INFERENCE_QUEUE', 512))
+MAX_BODY_BYTES = 64 * 1024
+
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+
+# The pool runs INFERENCE_THREADS predictions at once, so each session gets a
+# single thread (as serve.py does per worker) instead of one per core
+session_options = ort.SessionOptions()
+session_options.intra_op_num_threads = 1
+session_options.inter_op_num_threads = 1
+
+# Models and metadata, loaded at import like app.py
+metadata = Metadata(API_DIR)
+full_model = LazyBundle('full', FULL_MODEL_PATH, 60, metadata.labels)
+short_model = LazyBundle('short', SHORT_MODEL_PATH, 35, metadata.labels,
+                         prefix_table_path=SHORT_PREFIX_TABLE_PATH)
+for model in (full_model, short_model):
+    model.session_options = session_options
+    if not LAZY_LOAD:
+        model.get()
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+# Predictions running or waiting for a thread; only touched on the event loop
+in_flight = 0
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def read_body(receive):
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ClientDisconnected()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+        more_body = message.get('more_body', False)
+    return b''.join(chunks)
+
+
+async def send_response(send, status, body, headers=()):
+    response_headers = [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode())]
+    response_headers += [(k.lower().encode(), v.encode()) for k, v in headers]
+    response_headers += CORS_HEADERS
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, payload, status=200, headers=()):
+    await send_response(send, status, fast_json.dumps(payload), headers)
+
+
+async def send_static(send, document, request_headers):
+    status, body, headers = document.select(
+        if_none_match=request_headers.get(b'if-none-match', b'').decode('latin-1'),
+        accept_encoding=request_headers.get(b'accept-encoding', b'').decode('latin-1')
+    )
+    await send_response(send, status, body, headers.items())
+
+
+def run_prediction(answers, mode, compact):
+    """Executor body: model selection, lazy loading and inference"""
+    return predict_payload(full_model, short_model, answers, mode, compact)
+
+
+# =============================================================================
+# Routes
+# =============================================================================
+async def health_check(scope, receive, send, request_headers):
+    await send_json(send, {
+        'status': 'healthy',
+        'full_model_loaded': full_model.loaded,
+        'short_model_loaded': short_model.loaded,
+        'labels_loaded': metadata.labels is not None,
+        'lazy_load': LAZY_LOAD,
+        'inference_in_flight': in_flight
+    })
+
+
+async def predict(scope, receive, send, request_headers):
+    global in_flight
+    try:
+        data = fast_json.loads(await read_body(receive))
+        answers = data.get('answers', [])
+        mode = data.get('mode', 'auto')  # 'full', 'short', or 'auto'
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        compact = data.get('format', query.get('format', [None])[0]) == 'compact'
+    except ClientDisconnected:
+        # Nobody is left to answer, and the partial body is not a request
+        return
+    except BodyTooLarge:
+        await send_json(send, {'error': 'Request body too large'}, 413)
+        return
+    except Exception as e:
+        await send_json(send, {'error': str(e)}, 500)
+        return
+
+    # Backpressure: refuse instead of queueing without bound
+    if in_flight >= INFERENCE_THREADS + INFERENCE_QUEUE:
+        await send_json(send, {'error': 'Server busy, please retry'}, 503, [('Retry-After', '1')])
+        return
+
+    in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        payload, status = await loop.run_in_executor(
+            executor, run_prediction, answers, mode, compact
+        )
+    except Exception as e:
+        payload, status = {'error': str(e)}, 500
+    finally:
+        in_flight -= 1
+    await send_json(send, payload, status)
+
+
+async def get_short_questions(scope, receive, send, request_headers):
+    if metadata.short_questions_doc is None:
+        await send_json(send, {'error': 'Top 35 questions not loaded'}, 500)
+        return
+    await send_static(send, metadata.short_questions_doc, request_headers)
+
+
+async def get_all_questions(scope, receive, send, request_headers):
+    if metadata.all_questions_doc is None:
+        await send_json(send, {'error': 'Questions not loaded'}, 500)
+        return
+    await send_static(send, metadata.all_questions_doc, request_headers)
+
+
+async def get_types(scope, receive, send, request_headers):
+    await send_static(send, metadata.types_doc, request_headers)
+
+
+ROUTES = {}
+for _path, _method, _handler in [
+    ('/health', 'GET', health_check),
+    ('/predict', 'POST', predict),
+    ('/questions/short', 'GET', get_short_questions),
+    ('/questions', 'GET', get_all_questions),
+    ('/types', 'GET', get_types),
+]:
+    ROUTES[(_path, _method)] = _handler
+    ROUTES[('/api' + _path, _method)] = _handler
+ROUTE_PATHS = {path for path, _ in ROUTES}
+
+
+# =============================================================================
+# ASGI entry point
+# =============================================================================
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    method = scope['method']
+    request_headers = dict(scope.get('headers', []))
+
+    if method == 'OPTIONS' and path in ROUTE_PATHS:
+        # CORS preflight, as flask-cors answers it for app.py
+        allow_headers = request_headers.get(b'access-control-request-headers', b'').decode('latin-1')
+        await send_response(send, 200, b'', [('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+                                             ('Access-Control-Allow-Headers', allow_headers)])
+        return
+
+    handler = ROUTES.get((path, method))
+    if handler is None:
+        if path in ROUTE_PATHS:
+            await send_json(send, {'error': 'Method not allowed'}, 405)
+        else:
+            await send_json(send, {'error': 'Not found'}, 404)
+        return
+    await handler(scope, receive, send, request_headers)
@@ -0,0 +1,138 @@
+"""
+Load benchmark for the pre-fork server (serve.py)
+
+Starts serve.py with 1, 2, 4, ... workers (up to --max-workers), drives it
+with concurrent client processes posting random quiz answers to
+/api/predict, and reports throughput and latency for each worker count.
+Clients run in separate processes so the load generator itself is not
+limited by one GIL; on a machine with few cores the clients compete with
+the workers, so use --clients close to the core count.
+
+Usage:
+    python bench_load.py [--max-workers 8] [--clients 8] [--seconds 10]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def wait_until_ready(port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def client(port, seconds, n_answers, seed):
+    """Post predictions for `seconds`; returns per-request latencies (s)"""
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        body = json.dumps({'answers': [rng.randint(-3, 3) for _ in range(n_answers)]})
+        start = time.perf_counter()
+        try:
+            # wsgiref speaks HTTP/1.0, so one connection per request
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            conn.request('POST', '/api/predict', body=body,
+                         headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status != 200:
+                errors += 1
+                continue
+        except OSError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_level(workers, args):
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(API_DIR, 'serve.py'),
+         '--host', '127.0.0.1', '--port', str(args.port),
+         '--workers', str(workers), '--ort-threads', str(args.ort_threads),
+         '--max-requests', '0'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_until_ready(args.port):
+            raise RuntimeError(f"serve.py with {workers} workers did not start")
+        # Let every worker finish building its sessions
+        time.sleep(1.0)
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(client, [(args.port, args.seconds, args.answers, seed)
+                                            for seed in range(args.clients)])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = np.concatenate([np.array(lat) for lat, _ in results]) * 1000
+    errors = sum(err for _, err in results)
+    return {
+        'workers': workers,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / args.seconds,
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else float('nan'),
+        'p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else float('nan')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput scaling of serve.py across workers')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--clients', type=int, default=max(2, os.cpu_count() or 1))
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--answers', type=int, default=35, choices=[35, 60])
+    parser.add_argument('--ort-threads', type=int, default=1)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    levels = []
+    workers = 1
+    while workers < args.max_workers:
+        levels.append(workers)
+        workers *= 2
+    levels.append(args.max_workers)
+
+    print("=" * 70)
+    print(f"Load benchmark: {args.clients} clients, {args.seconds:.0f}s per level, "
+          f"{args.answers} answers, {os.cpu_count()} CPUs")
+    print("=" * 70)
+    print(f"{'Workers':>8} {'Requests':>10} {'Errors':>7} {'Req/s':>10} {'Speedup':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8}")
+    print("-" * 70)
+
+    baseline = None
+    for workers in levels:
+        result = run_level(workers, args)
+        baseline = baseline or result['rps']
+        print(f"{result['workers']:>8} {result['requests']:>10,} {result['errors']:>7} "
+              f"{result['rps']:>10.1f} {result['rps'] / baseline:>7.2f}x "
+              f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Microbenchmark for the /predict hot path
+
+Compares the original per-request code (fresh np.array, get_inputs() on
+every call, dict/array output sniffing, dict comprehension over labels)
+with ModelBundle.predict(), which resolves all of that at load time and
+reuses IOBinding buffers. The bare session.run() time is shown as a floor,
+so the difference between the rows is the per-request overhead.
+
+Usage:
+    python bench_predict.py [--requests 5000]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import onnxruntime as ort
+
+from model_bundle import ModelBundle
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS = {
+    'full': (os.path.join(API_DIR, 'mbti_model.onnx'), 60),
+    'short': (os.path.join(API_DIR, 'mbti_model_short.onnx'), 35),
+}
+LABELS_PATH = os.path.join(API_DIR, 'labels.json')
+
+
+def legacy_predict(session, class_labels, answers, model_used):
+    """The per-request code path app.py used before ModelBundle"""
+    X = np.array(answers, dtype=np.float32).reshape(1, -1)
+    input_name = session.get_inputs()[0].name
+    outputs = session.run(None, {input_name: X})
+
+    if len(outputs) >= 2:
+        probabilities = outputs[1][0]
+        if isinstance(probabilities, dict):
+            prob_list = [probabilities[i] for i in range(len(class_labels))]
+        else:
+            prob_list = probabilities
+    else:
+        prob_list = outputs[0][0]
+
+    prediction_idx = int(np.argmax(prob_list))
+    return {
+        'predicted_type': class_labels[prediction_idx],
+        'confidence': float(np.max(prob_list)),
+        'probabilities': {class_labels[i]: float(prob_list[i]) for i in range(len(class_labels))},
+        'model_used': model_used,
+        'questions_answered': len(answers)
+    }
+
+
+def time_calls(fn, requests, repeats=5):
+    """Best-of-repeats mean time per call in microseconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for answers in requests:
+            fn(answers)
+        best = min(best, (time.perf_counter() - start) / len(requests) * 1e6)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /predict hot path')
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    with open(LABELS_PATH, 'r') as f:
+        class_labels = json.load(f)
+
+    rng = np.random.default_rng(42)
+    print("=" * 64)
+    print(f"{'Model':<6} {'Path':<28} {'us/request':>12} {'overhead':>12}")
+    print("-" * 64)
+
+    for model_used, (path, n_answers) in MODELS.items():
+        if not os.path.exists(path):
+            print(f"{model_used:<6} (skipped, {os.path.basename(path)} not found)")
+            continue
+
+        session = ort.InferenceSession(path)
+        bundle = ModelBundle(session, class_labels, model_used, n_answers)
+        # Requests arrive as JSON lists of ints
+        requests = rng.integers(-3, 4, size=(args.requests, n_answers)).tolist()
+
+        # Sanity check: both paths must agree
+        for answers in requests[:50]:
+            old = legacy_predict(session, class_labels, answers, model_used)
+            new = bundle.predict(answers)
+            assert old['predicted_type'] == new['predicted_type']
+            assert np.allclose(list(old['probabilities'].values()),
+                               list(new['probabilities'].values()), atol=1e-6)
+
+        X = np.zeros((1, n_answers), dtype=np.float32)
+        input_name = bundle.input_name
+        floor = time_calls(lambda answers: session.run(None, {input_name: X}), requests)
+        legacy = time_calls(lambda answers: legacy_predict(session, class_labels, answers, model_used),
+                            requests)
+        current = time_calls(bundle.predict, requests)
+
+        print(f"{model_used:<6} {'session.run only':<28} {floor:>12.1f} {'-':>12}")
+        print(f"{model_used:<6} {'legacy predict()':<28} {legacy:>12.1f} {legacy - floor:>12.1f}")
+        print(f"{model_used:<6} {'ModelBundle.predict()':<28} {current:>12.1f} {current - floor:>12.1f}")
+        print(f"{model_used:<6} {'overhead removed':<28} {legacy - current:>12.1f}")
+        print("-" * 64)
+
+    print("=" * 64)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Bulk scoring for archived MBTI quiz responses
+
+Reads newline-delimited JSON ({"answers": [...], "mode": ..., "id": ...} per
+line) or CSV rows of answers, scores them in fixed-size batches with the
+same model bundles and label order as app.py, and writes one NDJSON result
+per input row, in input order. Only one batch is held in memory at a time,
+so archives of any size stream through in constant memory.
+
+Each result is the /predict response body plus the row's id (the "id"
+field or CSV id column when present, otherwise the 1-based row number).
+Rows that cannot be scored produce {"id": ..., "error": ...} with the same
+messages /predict would return, and scoring continues.
+
+The same generators back the streaming /api/predict/bulk route in app.py.
+
+Usage:
+    python bulk_score.py responses.ndjson -o scored.ndjson
+    python bulk_score.py ../../16P_eda_cleaned.csv --batch-size 4096 --compact > scored.ndjson
+    cat responses.ndjson | python bulk_score.py - > scored.ndjson
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+import fast_json
+from model_bundle import select_model
+
+DEFAULT_BATCH_SIZE = 1024
+# Print rows/sec at most this often
+REPORT_EVERY_SECONDS = 5.0
+# CSV columns that hold an id or the label rather than an answer
+CSV_ID_COLUMNS = ('id', 'response id')
+CSV_SKIP_COLUMNS = ('personality', 'type', 'mode')
+
+
+class ThroughputMeter:
+    """Counts scored rows and prints rows/sec as they go by"""
+
+    def __init__(self, label='bulk', stream=None, every=REPORT_EVERY_SECONDS):
+        self.label = label
+        self.stream = stream or sys.stderr
+        self.every = every
+        self.rows = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def update(self, rows, errors=0):
+        self.rows += rows
+        self.errors += errors
+        now = time.perf_counter()
+        if now - self._last_report >= self.every:
+            self._last_report = now
+            self._print(now, 'progress')
+
+    def finish(self):
+        self._print(time.perf_counter(), 'done')
+
+    def _print(self, now, state):
+        elapsed = now - self.started
+        rate = self.rows / elapsed if elapsed > 0 else 0.0
+        print(f"[{self.label}] {state}: {self.rows:,} rows ({self.errors:,} errors) "
+              f"in {elapsed:.1f}s, {rate:,.0f} rows/sec", file=self.stream, flush=True)
+
+
+def _record(row_id, answers=None, mode='auto', error=None):
+    return {'id': row_id, 'answers': answers, 'mode': mode, 'error': error}
+
+
+def _as_answers(values):
+    answers = np.asarray(values, dtype=np.float32)
+    if answers.ndim != 1:
+        raise ValueError('answers must be a flat list of numbers')
+    return answers
+
+
+def read_ndjson(lines):
+    """Yield records from NDJSON lines (str or bytes); blank lines are skipped"""
+    row_number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = fast_json.loads(line)
+            if isinstance(data, list):
+                data = {'answers': data}
+            row_id = data.get('id', row_number)
+            yield _record(row_id, _as_answers(data.get('answers', [])), data.get('mode', 'auto'))
+        except Exception as e:
+            yield _record(row_number, error=str(e))
+
+
+def read_csv(lines, encoding='utf-8'):
+    """Yield records from CSV lines of answers
+
+    A header row is detected when its first answer cell is not a number;
+    an "id"/"Response Id" column is used as the row id, and label columns
+    such as "Personality" are ignored. All other columns are answers, in
+    file order. Without a header every cell is an answer, so 35-answer and
+    60-answer rows can be mixed. Undecodable bytes (the raw Kaggle CSV is cp1252) only ever
+    affect header text, so they are replaced rather than fatal.
+    """
+    reader = csv.reader(line.decode(encoding, errors='replace') if isinstance(line, bytes) else line
+                        for line in lines)
+    id_column = None
+    answer_columns = None
+    first_row = True
+    row_number = 0
+    for row in reader:
+        if not row:
+            continue
+        if first_row:
+            first_row = False
+            names = [name.strip().lower() for name in row]
+            answer_columns = [i for i, name in enumerate(names)
+                              if name not in CSV_ID_COLUMNS and name not in CSV_SKIP_COLUMNS]
+            id_column = next((i for i, name in enumerate(names) if name in CSV_ID_COLUMNS), None)
+            try:
+                float(row[answer_columns[0]])
+            except (ValueError, IndexError):
+                continue  # header row
+            # No header: every cell of a row is an answer, whatever the row's length
+            answer_columns, id_column = None, None
+
+        row_number += 1
+        row_id = row[id_column] if id_column is not None and id_column < len(row) else row_number
+        try:
+            values = row if answer_columns is None else [row[i] for i in answer_columns if i < len(row)]
+            yield _record(row_id, _as_answers(values))
+        except Exception as e:
+            yield _record(row_id, error=str(e))
+
+
+def _score_batch(batch, full_model, short_model, compact):
+    """Results for one batch of records, in input order"""
+    results = [None] * len(batch)
+    groups = {}
+    for position, record in enumerate(batch):
+        if record['error'] is None:
+            bundle, error, _ = select_model(full_model, short_model, record['answers'], record['mode'])
+        else:
+            bundle, error = None, record['error']
+        if bundle is None:
+            results[position] = {'id': record['id'], 'error': error}
+            continue
+        group = groups.setdefault(bundle.model_used, (bundle, [], []))
+        group[1].append(position)
+        group[2].append(record['answers'])
+
+    for bundle, positions, rows in groups.values():
+        probabilities = bundle.predict_proba_batch(np.stack(rows)).tolist()
+        for position, values in zip(positions, probabilities):
+            result = {'id': batch[position]['id']}
+            result.update(bundle.response(values, compact))
+            results[position] = result
+    return results
+
+
+def score_batches(records, full_model, short_model, batch_size=DEFAULT_BATCH_SIZE,
+                  compact=False, meter=None):
+    """Yield lists of results, one list per batch of `batch_size` records"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield _scored(batch, full_model, short_model, compact, meter)
+            batch = []
+    if batch:
+        yield _scored(batch, full_model, short_model, compact, meter)
+    if meter is not None:
+        meter.finish()
+
+
+def _scored(batch, full_model, short_model, compact, meter):
+    results = _score_batch(batch, full_model, short_model, compact)
+    if meter is not None:
+        meter.update(len(results), sum(1 for result in results if 'error' in result))
+    return results
+
+
+def encode_ndjson(batches):
+    """One bytes chunk of NDJSON per batch of results"""
+    for results in batches:
+        yield b''.join(fast_json.dumps(result) + b'\n' for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score archived quiz responses in bulk')
+    parser.add_argument('input', help="NDJSON or CSV file, or '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="NDJSON output file (default: stdout)")
+    parser.add_argument('--input-format', choices=['auto', 'ndjson', 'csv'], default='auto',
+                        help='Default: csv for *.csv files, ndjson otherwise')
+    parser.add_argument('--encoding', default='utf-8', help='CSV text encoding')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--compact', action='store_true',
+                        help='Probabilities as a list in /api/types order')
+    args = parser.parse_args()
+
+    input_format = args.input_format
+    if input_format == 'auto':
+        input_format = 'csv' if args.input.lower().endswith('.csv') else 'ndjson'
+
+    # Same model files, label mapping and bundles as the API; only the
+    # models the input actually needs are loaded
+    os.environ.setdefault('MBTI_LAZY_LOAD', '1')
+    os.environ['MBTI_PREFETCH'] = '0'
+    with contextlib.redirect_stdout(sys.stderr):
+        import app as api
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    sink = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        records = read_csv(source, args.encoding) if input_format == 'csv' else read_ndjson(source)
+        batches = score_batches(records, api.full_model, api.short_model, args.batch_size,
+                                args.compact, ThroughputMeter())
+        for chunk in encode_ndjson(batches):
+            sink.write(chunk)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+        else:
+            sink.flush()
+
+
+if __name__ == '__main__':
+    main()
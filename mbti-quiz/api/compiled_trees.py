@@ -0,0 +1,360 @@
+"""
+Compiled tree arrays for the XGBoost models served by the API
+
+Flattens the TreeEnsembleClassifier node of an exported ONNX model into
+plain NumPy arrays so trees can be evaluated (or partially evaluated) in
+Python without going through an onnxruntime session.
+
+Building from ONNX needs the `onnx` package (from an XGBoost booster, the
+`xgboost` package); loading a saved .npz only needs NumPy, so the
+serverless function pays for neither.
+
+Node cover (training weight reaching each node), needed for TreeSHAP, is
+not part of the ONNX export. It comes with from_xgboost() or can be
+estimated from data with with_data_cover().
+"""
+
+import json
+
+import numpy as np
+
+# Arrays written to / read from .npz files
+ARRAY_FIELDS = [
+    'feature', 'threshold', 'true_child', 'false_child',
+    'missing_true', 'branch_leq', 'is_leaf', 'leaf_value',
+    'tree_root', 'tree_class', 'base_values'
+]
+# Written and read only when present
+OPTIONAL_FIELDS = ['cover']
+
+
+def _attr_array(attrs, name, dtype):
+    """Read a list or tensor attribute (ai.onnx.ml opset 1 or 3)"""
+    from onnx import numpy_helper
+
+    if name in attrs:
+        return np.asarray(attrs[name], dtype=dtype)
+    if name + '_as_tensor' in attrs:
+        return numpy_helper.to_array(attrs[name + '_as_tensor']).astype(dtype)
+    return None
+
+
+class CompiledTrees:
+    """Flattened tree ensemble with one output class per tree
+
+    Node arrays are indexed by a global node id. Leaves point to
+    themselves as children, so a fixed number of descent steps
+    (the ensemble depth) always ends on a leaf.
+    """
+
+    def __init__(self, feature, threshold, true_child, false_child,
+                 missing_true, branch_leq, is_leaf, leaf_value,
+                 tree_root, tree_class, base_values, n_features,
+                 post_transform='SOFTMAX', cover=None):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.true_child = np.asarray(true_child, dtype=np.int32)
+        self.false_child = np.asarray(false_child, dtype=np.int32)
+        self.missing_true = np.asarray(missing_true, dtype=bool)
+        self.branch_leq = np.asarray(branch_leq, dtype=bool)
+        self.is_leaf = np.asarray(is_leaf, dtype=bool)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float32)
+        self.tree_root = np.asarray(tree_root, dtype=np.int32)
+        self.tree_class = np.asarray(tree_class, dtype=np.int32)
+        self.base_values = np.asarray(base_values, dtype=np.float32)
+        self.n_features = int(n_features)
+        self.post_transform = str(post_transform)
+        self.cover = None if cover is None else np.asarray(cover, dtype=np.float32)
+
+        self.n_trees = len(self.tree_root)
+        self.n_classes = len(self.base_values)
+        self.depth = self._max_depth()
+        # (n_trees, n_classes) one-hot used to sum leaf values per class
+        self.class_onehot = np.zeros((self.n_trees, self.n_classes), dtype=np.float32)
+        self.class_onehot[np.arange(self.n_trees), self.tree_class] = 1.0
+
+    # ------------------------------------------------------------------
+    # Construction / persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_onnx(cls, model_path):
+        """Compile the TreeEnsembleClassifier node of an ONNX model"""
+        import onnx
+        from onnx import helper
+
+        model = onnx.load(model_path)
+        node = next((n for n in model.graph.node if n.op_type == 'TreeEnsembleClassifier'), None)
+        if node is None:
+            raise ValueError(f"No TreeEnsembleClassifier node in {model_path}")
+        attrs = {a.name: helper.get_attribute_value(a) for a in node.attribute}
+
+        tree_ids = _attr_array(attrs, 'nodes_treeids', np.int64)
+        node_ids = _attr_array(attrs, 'nodes_nodeids', np.int64)
+        modes = [m.decode() if isinstance(m, bytes) else m for m in attrs['nodes_modes']]
+        unsupported = set(modes) - {'BRANCH_LT', 'BRANCH_LEQ', 'LEAF'}
+        if unsupported:
+            raise ValueError(f"Unsupported node modes: {sorted(unsupported)}")
+
+        # Map (tree id, local node id) -> global node index
+        stride = int(node_ids.max()) + 1
+        n_trees = int(tree_ids.max()) + 1
+        lookup = np.full(n_trees * stride, -1, dtype=np.int64)
+        lookup[tree_ids * stride + node_ids] = np.arange(len(node_ids))
+
+        is_leaf = np.array([m == 'LEAF' for m in modes])
+        self_index = np.arange(len(node_ids))
+        true_child = lookup[tree_ids * stride + _attr_array(attrs, 'nodes_truenodeids', np.int64)]
+        false_child = lookup[tree_ids * stride + _attr_array(attrs, 'nodes_falsenodeids', np.int64)]
+        true_child = np.where(is_leaf, self_index, true_child)
+        false_child = np.where(is_leaf, self_index, false_child)
+
+        missing = _attr_array(attrs, 'nodes_missing_value_tracks_true', np.int64)
+        if missing is None:
+            missing = np.zeros(len(node_ids), dtype=np.int64)
+
+        # Leaf weights: XGBoost multi-class exports one class per tree
+        class_nodes = lookup[_attr_array(attrs, 'class_treeids', np.int64) * stride
+                             + _attr_array(attrs, 'class_nodeids', np.int64)]
+        class_ids = _attr_array(attrs, 'class_ids', np.int64)
+        class_weights = _attr_array(attrs, 'class_weights', np.float32)
+        leaf_value = np.zeros(len(node_ids), dtype=np.float32)
+        np.add.at(leaf_value, class_nodes, class_weights)
+
+        tree_class = np.full(n_trees, -1, dtype=np.int64)
+        for t, c in zip(tree_ids[class_nodes], class_ids):
+            if tree_class[t] not in (-1, c):
+                raise ValueError("Trees contributing to several classes are not supported")
+            tree_class[t] = c
+        tree_class[tree_class < 0] = 0
+
+        # Roots are the nodes no other node points to
+        referenced = np.zeros(len(node_ids), dtype=bool)
+        referenced[true_child[~is_leaf]] = True
+        referenced[false_child[~is_leaf]] = True
+        roots = np.flatnonzero(~referenced)
+        tree_root = np.empty(n_trees, dtype=np.int64)
+        tree_root[tree_ids[roots]] = roots
+
+        n_classes = len(attrs.get('classlabels_int64s') or attrs.get('classlabels_strings'))
+        base_values = _attr_array(attrs, 'base_values', np.float32)
+        if base_values is None or len(base_values) == 0:
+            base_values = np.zeros(n_classes, dtype=np.float32)
+
+        input_shape = model.graph.input[0].type.tensor_type.shape.dim
+        n_features = input_shape[-1].dim_value or int(_attr_array(attrs, 'nodes_featureids', np.int64).max()) + 1
+        post_transform = attrs.get('post_transform', b'NONE')
+        if isinstance(post_transform, bytes):
+            post_transform = post_transform.decode()
+
+        return cls(
+            feature=np.where(is_leaf, 0, _attr_array(attrs, 'nodes_featureids', np.int64)),
+            threshold=np.where(is_leaf, 0, _attr_array(attrs, 'nodes_values', np.float32)),
+            true_child=true_child,
+            false_child=false_child,
+            missing_true=missing.astype(bool),
+            branch_leq=np.array([m == 'BRANCH_LEQ' for m in modes]),
+            is_leaf=is_leaf,
+            leaf_value=leaf_value,
+            tree_root=tree_root,
+            tree_class=tree_class,
+            base_values=base_values,
+            n_features=n_features,
+            post_transform=post_transform
+        )
+
+    @classmethod
+    def from_xgboost(cls, booster):
+        """Compile an XGBoost Booster (or XGBClassifier), including node cover"""
+        booster = booster.get_booster() if hasattr(booster, 'get_booster') else booster
+        config = json.loads(booster.save_config())
+        learner = config['learner']
+        objective = learner['objective']['name']
+        n_classes = max(int(learner['learner_model_param'].get('num_class', 0)), 1)
+        base_score = [float(v) for v in
+                      str(learner['learner_model_param']['base_score']).strip('[]').split(',')]
+
+        df = booster.trees_to_dataframe()
+        node_index = {node_id: i for i, node_id in enumerate(df['ID'])}
+        is_leaf = (df['Feature'] == 'Leaf').to_numpy()
+        self_index = np.arange(len(df))
+        feature_names = booster.feature_names
+        if feature_names:
+            feature_lookup = {name: i for i, name in enumerate(feature_names)}
+        else:
+            feature_lookup = {f'f{i}': i for i in range(booster.num_features())}
+
+        def children(column):
+            ids = df[column].to_numpy()
+            return np.array([i if leaf else node_index[c] for i, leaf, c in zip(self_index, is_leaf, ids)])
+
+        true_child = children('Yes')
+        missing_child = children('Missing')
+        tree_ids = df['Tree'].to_numpy()
+        n_trees = int(tree_ids.max()) + 1
+
+        if objective.startswith('multi:'):
+            post_transform = 'SOFTMAX'
+            base_values = (base_score * n_classes)[:n_classes] if len(base_score) == 1 else base_score
+        elif objective.startswith('binary:'):
+            post_transform = 'LOGISTIC'
+            # Margin space base value
+            p = base_score[0]
+            base_values = [np.log(p / (1 - p))] if 0 < p < 1 else [0.0]
+        else:
+            post_transform = 'NONE'
+            base_values = base_score[:1]
+
+        return cls(
+            feature=np.array([0 if leaf else feature_lookup[f] for leaf, f in zip(is_leaf, df['Feature'])]),
+            threshold=np.where(is_leaf, 0, df['Split'].fillna(0).to_numpy()),
+            true_child=true_child,
+            false_child=children('No'),
+            missing_true=(missing_child == true_child) & ~is_leaf,
+            branch_leq=np.zeros(len(df), dtype=bool),  # XGBoost splits on x < threshold
+            is_leaf=is_leaf,
+            leaf_value=np.where(is_leaf, df['Gain'].to_numpy(), 0),
+            tree_root=np.array([node_index[f'{t}-0'] for t in range(n_trees)]),
+            tree_class=np.arange(n_trees) % n_classes,
+            base_values=np.asarray(base_values, dtype=np.float32),
+            n_features=booster.num_features(),
+            post_transform=post_transform,
+            cover=df['Cover'].to_numpy()
+        )
+
+    def with_data_cover(self, X):
+        """Set cover to the number of rows of X reaching each node
+
+        For models exported without cover (ONNX); X should be
+        representative data such as the training set.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        cover = np.zeros(len(self.feature), dtype=np.float64)
+        node = np.broadcast_to(self.tree_root, (X.shape[0], self.n_trees)).copy()
+        rows = np.arange(X.shape[0])[:, None]
+        np.add.at(cover, node.ravel(), 1)
+        for _ in range(self.depth):
+            active = ~self.is_leaf[node]
+            x = X[rows, self.feature[node]]
+            t = self.threshold[node]
+            go_true = (x < t) | (self.branch_leq[node] & (x == t)) | (np.isnan(x) & self.missing_true[node])
+            node = np.where(go_true, self.true_child[node], self.false_child[node])
+            np.add.at(cover, node[active], 1)
+        self.cover = cover.astype(np.float32)
+        return self
+
+    def to_arrays(self, prefix=''):
+        """Arrays for np.savez, optionally namespaced with a key prefix"""
+        arrays = {prefix + name: getattr(self, name) for name in ARRAY_FIELDS}
+        for name in OPTIONAL_FIELDS:
+            if getattr(self, name) is not None:
+                arrays[prefix + name] = getattr(self, name)
+        arrays[prefix + 'n_features'] = np.array(self.n_features)
+        arrays[prefix + 'post_transform'] = np.array(self.post_transform)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=''):
+        """Rebuild from a mapping written by to_arrays()"""
+        kwargs = {name: arrays[prefix + name] for name in ARRAY_FIELDS}
+        kwargs.update({name: arrays[prefix + name] for name in OPTIONAL_FIELDS
+                       if prefix + name in arrays})
+        return cls(
+            n_features=int(arrays[prefix + 'n_features']),
+            post_transform=str(arrays[prefix + 'post_transform']),
+            **kwargs
+        )
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+    def _max_depth(self):
+        depth = 0
+        frontier = self.tree_root
+        while True:
+            frontier = frontier[~self.is_leaf[frontier]]
+            if len(frontier) == 0:
+                return depth
+            frontier = np.concatenate([self.true_child[frontier], self.false_child[frontier]])
+            depth += 1
+
+    def tree_features(self):
+        """Set of feature indices each tree splits on"""
+        used = [set() for _ in range(self.n_trees)]
+        frontier = self.tree_root
+        owner = np.arange(self.n_trees)
+        while len(frontier):
+            keep = ~self.is_leaf[frontier]
+            frontier, owner = frontier[keep], owner[keep]
+            for t, f in zip(owner, self.feature[frontier]):
+                used[t].add(int(f))
+            frontier, owner = (np.concatenate([self.true_child[frontier], self.false_child[frontier]]),
+                               np.concatenate([owner, owner]))
+        return used
+
+    def node_trees(self):
+        """Tree index owning each node"""
+        owner = np.zeros(len(self.feature), dtype=np.int32)
+        frontier = self.tree_root
+        trees = np.arange(self.n_trees, dtype=np.int32)
+        while len(frontier):
+            owner[frontier] = trees
+            keep = ~self.is_leaf[frontier]
+            frontier, trees = frontier[keep], trees[keep]
+            frontier, trees = (np.concatenate([self.true_child[frontier], self.false_child[frontier]]),
+                               np.concatenate([trees, trees]))
+        return owner
+
+    def node_heights(self):
+        """Levels below each node (0 for leaves)"""
+        height = np.zeros(len(self.feature), dtype=np.int32)
+        for _ in range(self.depth):
+            height = np.where(self.is_leaf, 0,
+                              1 + np.maximum(height[self.true_child], height[self.false_child]))
+        return height
+
+    def step(self, node, x):
+        """Child of each node for feature values x (leaves stay where they are)"""
+        t = self.threshold[node]
+        go_true = (x < t) | (self.branch_leq[node] & (x == t)) | (np.isnan(x) & self.missing_true[node])
+        return np.where(go_true, self.true_child[node], self.false_child[node])
+
+    def descend(self, X, rows, node):
+        """Leaf reached from each start node by the matching row of X
+
+        rows and node are equal-length arrays of (row index, start node)
+        pairs; start nodes may be anywhere in their tree.
+        """
+        for _ in range(self.depth):
+            if self.is_leaf[node].all():
+                break
+            node = self.step(node, X[rows, self.feature[node]])
+        return node
+
+    def leaves(self, X, trees=None):
+        """Leaf node reached by every row of X in every selected tree"""
+        X = np.asarray(X, dtype=np.float32)
+        roots = self.tree_root if trees is None else self.tree_root[trees]
+        node = np.broadcast_to(roots, (X.shape[0], len(roots))).copy()
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(self.depth):
+            node = self.step(node, X[rows, self.feature[node]])
+        return node
+
+    def margins(self, X, trees=None):
+        """Summed raw leaf values per class (no base value, no transform)"""
+        onehot = self.class_onehot if trees is None else self.class_onehot[trees]
+        return self.leaf_value[self.leaves(X, trees)] @ onehot
+
+    def transform(self, margins):
+        """Apply base values and the model's post transform"""
+        scores = margins + self.base_values
+        if self.post_transform == 'SOFTMAX':
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            return scores / scores.sum(axis=1, keepdims=True)
+        if self.post_transform == 'LOGISTIC':
+            return 1.0 / (1.0 + np.exp(-scores))
+        return scores
+
+    def predict_proba(self, X):
+        """Class probabilities, matching the ONNX model's probability output"""
+        return self.transform(self.margins(X))
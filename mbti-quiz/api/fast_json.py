@@ -0,0 +1,32 @@
+"""
+JSON encoding/decoding for the MBTI API
+
+Uses orjson when it is installed (pip install orjson) and falls back to the
+standard library otherwise. Both paths work on bytes so callers can pass
+request bodies straight in and write the result straight out.
+"""
+
+import json
+
+try:
+    import orjson
+    FAST_JSON = True
+except ImportError:
+    orjson = None
+    FAST_JSON = False
+
+BACKEND = 'orjson' if FAST_JSON else 'json'
+
+
+def loads(data):
+    """Parse a JSON document from bytes or str"""
+    if FAST_JSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """Serialize obj to compact UTF-8 JSON bytes"""
+    if FAST_JSON:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
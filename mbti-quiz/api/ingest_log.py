@@ -0,0 +1,254 @@
+"""
+Append-only ingestion log of quiz responses, for retraining
+
+When MBTI_INGEST_LOG is set to a file path, app.py records every answered
+quiz: the answers, which model scored them, the predicted type and the
+self-reported type when the front end sends one. record() only appends to
+an in-memory buffer; a background thread writes the buffer to an SQLite
+file in WAL mode in batched transactions, so a request never waits on
+disk. Several worker processes (serve.py) can share one log file.
+
+The buffer is bounded: if the disk cannot keep up, the oldest unflushed
+records are dropped and counted rather than growing memory without limit.
+
+The compaction job turns the log into the training format used by the
+trainers (16P_eda_cleaned.csv layout: 60 question columns + Personality).
+Only labelled responses (self-reported type) are written. A watermark file
+next to the output remembers the last record compacted, so with
+--incremental every run emits only the responses that arrived since:
+
+    python ingest_log.py compact --log ingest.sqlite --output ../../ingested_responses.csv --incremental
+"""
+
+import argparse
+import atexit
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+TARGET_COLUMN = 'Personality'
+# Flush when this many records are buffered, or after FLUSH_SECONDS
+FLUSH_ROWS = 256
+FLUSH_SECONDS = 5.0
+# Records kept in memory at most while the disk is behind
+MAX_BUFFER = 100_000
+# Records read per query when compacting
+COMPACT_BATCH = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    received REAL NOT NULL,
+    model_used TEXT NOT NULL,
+    answers BLOB NOT NULL,
+    predicted_type TEXT,
+    self_reported_type TEXT
+)
+"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute(SCHEMA)
+    connection.commit()
+    return connection
+
+
+class IngestionLog:
+    """Buffered, batched writer of answered quizzes to an SQLite WAL file"""
+
+    def __init__(self, path, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS,
+                 max_buffer=MAX_BUFFER):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.buffer = deque(maxlen=max_buffer)
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._pid = None  # the flush thread belongs to one process (serve.py forks)
+        connect(path).close()
+        atexit.register(self.close)
+
+    def record(self, answers, model_used, predicted_type, self_reported_type=None):
+        """Queue one response; never touches the disk"""
+        row = (time.time(), model_used, np.asarray(answers, dtype=np.int8).tobytes(),
+               predicted_type, self_reported_type)
+        with self._lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(row)
+            self.recorded += 1
+            pending = len(self.buffer)
+        if self._pid != os.getpid():
+            self._start()
+        if pending >= self.flush_rows:
+            self._wake.set()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+        threading.Thread(target=self._run, name='ingest-log-flush', daemon=True).start()
+
+    def _run(self):
+        connection = connect(self.path)
+        try:
+            while not self._closed:
+                self._wake.wait(self.flush_seconds)
+                self._wake.clear()
+                self._flush(connection)
+        finally:
+            connection.close()
+
+    def _flush(self, connection):
+        with self._lock:
+            rows = list(self.buffer)
+            self.buffer.clear()
+        if not rows:
+            return 0
+        try:
+            with connection:
+                connection.executemany(
+                    'INSERT INTO responses (received, model_used, answers, predicted_type, '
+                    'self_reported_type) VALUES (?, ?, ?, ?, ?)', rows)
+        except sqlite3.Error as e:
+            # Put the batch back (oldest first) and try again on the next tick
+            print(f"[ingest] flush failed, will retry: {e}")
+            with self._lock:
+                self.buffer.extendleft(reversed(rows))
+            return 0
+        self.written += len(rows)
+        return len(rows)
+
+    def close(self):
+        """Stop the flush thread and write whatever is still buffered"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        connection = connect(self.path)
+        try:
+            self._flush(connection)
+        finally:
+            connection.close()
+
+    def stats(self):
+        with self._lock:
+            return {'recorded': self.recorded, 'written': self.written,
+                    'buffered': len(self.buffer), 'dropped': self.dropped}
+
+
+# =============================================================================
+# Compaction
+# =============================================================================
+
+def load_questions(api_dir=API_DIR):
+    """(all 60 question texts, indices of the 35 short-quiz questions)"""
+    with open(os.path.join(api_dir, 'all_questions.json')) as f:
+        questions = json.load(f)
+    with open(os.path.join(api_dir, 'top_35_questions.json')) as f:
+        short_indices = json.load(f)['indices']
+    return questions, short_indices
+
+
+def compact(log_path, output_path, since_id=0, include_short=False, api_dir=API_DIR):
+    """Write labelled responses with id > since_id as training CSV
+
+    Full-quiz responses fill all 60 columns. Short-quiz responses are
+    skipped unless include_short is set, in which case the 25 unasked
+    questions are left empty. Returns (rows written, last id read).
+    """
+    questions, short_indices = load_questions(api_dir)
+    connection = connect(log_path)
+    last_id = since_id
+    written = 0
+    try:
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(questions + [TARGET_COLUMN])
+            while True:
+                rows = connection.execute(
+                    'SELECT id, answers, self_reported_type FROM responses '
+                    'WHERE id > ? ORDER BY id LIMIT ?', (last_id, COMPACT_BATCH)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                for _, blob, label in rows:
+                    if not label:
+                        continue
+                    answers = np.frombuffer(blob, dtype=np.int8)
+                    if len(answers) == len(questions):
+                        values = answers.tolist()
+                    elif include_short and len(answers) == len(short_indices):
+                        values = [''] * len(questions)
+                        for index, value in zip(short_indices, answers.tolist()):
+                            values[index] = value
+                    else:
+                        continue
+                    writer.writerow(values + [label])
+                    written += 1
+    finally:
+        connection.close()
+    return written, last_id
+
+
+def watermark_path(output_path):
+    return output_path + '.watermark.json'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingestion log tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compact_parser = commands.add_parser('compact', help='Write the log as training CSV')
+    compact_parser.add_argument('--log', default=os.environ.get('MBTI_INGEST_LOG', 'ingest.sqlite'))
+    compact_parser.add_argument('--output', required=True)
+    compact_parser.add_argument('--incremental', action='store_true',
+                                help='Only responses logged since the previous --incremental run')
+    compact_parser.add_argument('--include-short', action='store_true',
+                                help='Also write short-quiz responses (unasked questions empty)')
+    stats_parser = commands.add_parser('stats', help='Count logged responses')
+    stats_parser.add_argument('--log', default=os.environ.get('MBTI_INGEST_LOG', 'ingest.sqlite'))
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        connection = connect(args.log)
+        for model_used, total, labelled in connection.execute(
+                'SELECT model_used, COUNT(*), COUNT(self_reported_type) FROM responses GROUP BY model_used'):
+            print(f"{model_used:<6} {total:>10,} responses, {labelled:>10,} with a self-reported type")
+        connection.close()
+        return
+
+    since_id = 0
+    if args.incremental and os.path.exists(watermark_path(args.output)):
+        with open(watermark_path(args.output)) as f:
+            since_id = json.load(f)['last_id']
+    start = time.perf_counter()
+    written, last_id = compact(args.log, args.output, since_id, args.include_short)
+    if last_id == since_id:
+        print(f"No records after {since_id}")
+    else:
+        print(f"Compacted records {since_id + 1}..{last_id}: {written:,} labelled responses "
+              f"in {time.perf_counter() - start:.1f}s")
+    print(f"Saved: {args.output}")
+    if args.incremental:
+        with open(watermark_path(args.output), 'w') as f:
+            json.dump({'last_id': last_id, 'compacted_at': time.time()}, f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Static metadata for the MBTI API
+
+labels.json, top_35_questions.json and all_questions.json only change on
+deploy, so they are read once, serialized once and gzip-compressed once.
+Each document carries a strong ETag so browsers and the CDN can revalidate
+with If-None-Match and get a 304 without the body being rebuilt.
+
+Nothing here depends on Flask: select() returns (status, body, headers)
+and the web layer wraps it in its own response type.
+"""
+
+import gzip
+import hashlib
+import os
+
+import fast_json
+
+LABELS_FILE = 'labels.json'
+TOP_35_FILE = 'top_35_questions.json'
+ALL_QUESTIONS_FILE = 'all_questions.json'
+
+# Returned by /types when labels.json is missing
+DEFAULT_TYPES = ['INTJ', 'INTP', 'ENTJ', 'ENTP', 'INFJ', 'INFP', 'ENFJ', 'ENFP',
+                 'ISTJ', 'ISFJ', 'ESTJ', 'ESFJ', 'ISTP', 'ISFP', 'ESTP', 'ESFP']
+
+# Browsers revalidate after an hour; the CDN may serve stale while it does
+CACHE_CONTROL = 'public, max-age=3600, stale-while-revalidate=86400'
+
+
+def _accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip"""
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            q = params.strip().replace(' ', '')
+            return q not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def _etag_matches(if_none_match, etag):
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class StaticJSON:
+    """A JSON document serialized and compressed once"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.body = fast_json.dumps(payload)
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        # Each representation needs its own strong validator
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    def select(self, if_none_match=None, accept_encoding=None):
+        """(status, body, headers) for a GET with the given request headers"""
+        use_gzip = _accepts_gzip(accept_encoding)
+        etag = self.gzip_etag if use_gzip else self.etag
+        headers = {
+            'ETag': etag,
+            'Cache-Control': CACHE_CONTROL,
+            'Vary': 'Accept-Encoding'
+        }
+        if _etag_matches(if_none_match, etag):
+            return 304, b'', headers
+        if use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+            return 200, self.gzip_body, headers
+        return 200, self.body, headers
+
+
+class Metadata:
+    """Labels and question lists loaded from the API directory"""
+
+    def __init__(self, api_dir):
+        self.labels = self._load(api_dir, LABELS_FILE)
+        self.short_questions = self._load(api_dir, TOP_35_FILE)
+        self.all_questions = self._load(api_dir, ALL_QUESTIONS_FILE)
+
+        self.types_doc = StaticJSON({'types': self.labels or DEFAULT_TYPES})
+        self.short_questions_doc = (StaticJSON(self.short_questions)
+                                    if self.short_questions is not None else None)
+        self.all_questions_doc = (StaticJSON(self.all_questions)
+                                  if self.all_questions is not None else None)
+
+    @staticmethod
+    def _load(api_dir, filename):
+        path = os.path.join(api_dir, filename)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return fast_json.loads(f.read())
+
+    @property
+    def top_35_indices(self):
+        if self.short_questions is None:
+            return None
+        return self.short_questions.get('indices', [])
@@ -0,0 +1,241 @@
+"""
+Per-model inference bundle for the MBTI API
+
+Everything predict() needs that does not depend on the request (input and
+output names, label order, response template) is resolved once when the
+model is loaded. Each worker thread gets its own pre-allocated input and
+output buffers bound to the session through onnxruntime's IOBinding API,
+so a request only copies its answers into the buffer and runs the model.
+
+LazyBundle defers building a bundle until the first request that needs it,
+which keeps serverless cold starts from paying for models they never use.
+The TreeSHAP explainer (tree_shap.py) is deferred further, to the first
+/explain request, so plain predictions never load it.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import onnxruntime as ort
+
+from prefix_tables import PrefixTableModel
+from tree_shap import TreeShapExplainer
+
+
+class ModelBundle:
+    """ONNX session plus the metadata needed to answer /predict"""
+
+    def __init__(self, session, labels, model_used, n_answers, prefix_model=None,
+                 explainer_path=None):
+        self.session = session
+        self.labels = tuple(labels)
+        self.model_used = model_used
+        self.n_answers = n_answers
+        self.prefix_model = prefix_model
+        self.explainer_path = explainer_path
+
+        self.input_name = session.get_inputs()[0].name
+        outputs = session.get_outputs()
+        # TreeEnsembleClassifier exports [label, probabilities]
+        self.output_index = 1 if len(outputs) >= 2 else 0
+        self.output_name = outputs[self.output_index].name
+        # ZipMap exports return a list of dicts, which IOBinding cannot bind
+        self.tensor_output = outputs[self.output_index].type.startswith('tensor')
+
+        self.template = {
+            'model_used': model_used,
+            'questions_answered': n_answers
+        }
+        self._local = threading.local()
+        self._explainer = None
+        self._explainer_lock = threading.Lock()
+
+    def _buffers(self):
+        """This thread's (input buffer, output buffer, binding)"""
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            inputs = np.zeros((1, self.n_answers), dtype=np.float32)
+            outputs = np.zeros((1, len(self.labels)), dtype=np.float32)
+            binding = self.session.io_binding()
+            input_value = ort.OrtValue.ortvalue_from_numpy(inputs)
+            binding.bind_ortvalue_input(self.input_name, input_value)
+            if self.tensor_output:
+                binding.bind_output(
+                    name=self.output_name,
+                    device_type='cpu',
+                    device_id=0,
+                    element_type=np.float32,
+                    shape=outputs.shape,
+                    buffer_ptr=outputs.ctypes.data
+                )
+            # Keep input_value referenced for as long as the binding lives
+            state = self._local.state = (inputs, outputs, binding, input_value)
+        return state
+
+    def predict_proba(self, answers):
+        """Class probabilities for one answer vector, in label order
+
+        The returned array is this thread's output buffer; copy it if it
+        has to outlive the next call.
+        """
+        inputs, outputs, binding, _ = self._buffers()
+        inputs[0] = answers
+
+        if self.prefix_model is not None:
+            outputs[0] = self.prefix_model.predict_proba(inputs)[0]
+        elif self.tensor_output:
+            self.session.run_with_iobinding(binding)
+        else:
+            probabilities = self.session.run([self.output_name], {self.input_name: inputs})[0][0]
+            outputs[0] = [probabilities[i] for i in range(len(self.labels))]
+        return outputs[0]
+
+    def predict_proba_batch(self, X):
+        """Class probabilities for an (n, n_answers) array, in label order"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.prefix_model is not None:
+            return self.prefix_model.predict_proba(X).astype(np.float32)
+        probabilities = self.session.run([self.output_name], {self.input_name: X})[0]
+        if not self.tensor_output:
+            probabilities = np.array([[row[i] for i in range(len(self.labels))] for row in probabilities],
+                                     dtype=np.float32)
+        return probabilities
+
+    def response(self, values, compact=False):
+        """/predict response body for one row of probabilities (a list)"""
+        best = max(range(len(values)), key=values.__getitem__)
+
+        response = dict(self.template)
+        response['predicted_type'] = self.labels[best]
+        response['confidence'] = values[best]
+        response['probabilities'] = values if compact else dict(zip(self.labels, values))
+        return response
+
+    def predict(self, answers, compact=False):
+        """Response body for /predict
+
+        With compact=True, 'probabilities' is a list in label order (the
+        order returned by /api/types) instead of a label -> value dict.
+        """
+        return self.response(self.predict_proba(answers).tolist(), compact)
+
+    def explainer(self):
+        """The TreeSHAP explainer, loaded on first use; None if there is no explainer file"""
+        explainer = self._explainer
+        if explainer is None and self.explainer_path and os.path.exists(self.explainer_path):
+            with self._explainer_lock:
+                if self._explainer is None:
+                    start = time.perf_counter()
+                    self._explainer = TreeShapExplainer.from_file(self.explainer_path)
+                    print(f"✓ {self.model_used.capitalize()} explainer loaded: {self.explainer_path} "
+                          f"({time.perf_counter() - start:.3f}s)")
+                explainer = self._explainer
+        return explainer
+
+
+class LazyBundle:
+    """Builds a ModelBundle on first use, at most once across threads"""
+
+    def __init__(self, model_used, model_path, n_answers, labels, prefix_table_path=None,
+                 explainer_path=None):
+        self.model_used = model_used
+        self.model_path = model_path
+        self.n_answers = n_answers
+        self.labels = labels
+        self.prefix_table_path = prefix_table_path
+        self.explainer_path = explainer_path
+        # Set by preload() and by serve.py before the first get()
+        self.model_bytes = None
+        self.prefix_model = None
+        self.session_options = None
+        self.load_seconds = None
+        self._bundle = None
+        self._lock = threading.Lock()
+
+    def preload(self):
+        """Read the model bytes and prefix table without creating a session
+
+        Used by the pre-fork server: the parent preloads, forked workers
+        share these pages copy-on-write and only build their own sessions.
+        """
+        if not self.available:
+            return
+        with open(self.model_path, 'rb') as f:
+            self.model_bytes = f.read()
+        if self.prefix_table_path and os.path.exists(self.prefix_table_path):
+            self.prefix_model = PrefixTableModel.from_file(self.prefix_table_path)
+
+    @property
+    def available(self):
+        return os.path.exists(self.model_path)
+
+    @property
+    def loaded(self):
+        return self._bundle is not None
+
+    def get(self):
+        """The loaded bundle, or None if the model file does not exist"""
+        bundle = self._bundle
+        if bundle is None and self.available:
+            with self._lock:
+                if self._bundle is None:
+                    self._bundle = self._load()
+                bundle = self._bundle
+        return bundle
+
+    def _load(self):
+        if self.labels is None:
+            raise RuntimeError('Labels not loaded')
+        start = time.perf_counter()
+        session = ort.InferenceSession(self.model_bytes or self.model_path,
+                                       sess_options=self.session_options)
+        prefix_model = self.prefix_model
+        if prefix_model is None and self.prefix_table_path and os.path.exists(self.prefix_table_path):
+            prefix_model = PrefixTableModel.from_file(self.prefix_table_path)
+        bundle = ModelBundle(session, self.labels, self.model_used, self.n_answers,
+                             prefix_model=prefix_model, explainer_path=self.explainer_path)
+        self.load_seconds = time.perf_counter() - start
+
+        print(f"✓ {self.model_used.capitalize()} model loaded: {self.model_path} "
+              f"({self.load_seconds:.3f}s)")
+        if prefix_model is not None:
+            print(f"✓ {self.model_used.capitalize()} prefix table loaded: {prefix_model.prefix_len} "
+                  f"questions, {prefix_model.resolved_share:.1%} of trees determined by the table")
+        return bundle
+
+
+def select_model(full_model, short_model, answers, mode='auto'):
+    """Pick the bundle for a /predict request
+
+    Returns (bundle, None, 200), or (None, error message, status) when the
+    answers do not fit the requested mode or the model is not available.
+    full_model/short_model are LazyBundles (or None when loading failed).
+    """
+    if mode == 'short' or len(answers) == 35:
+        model, n_answers, name = short_model, 35, 'Short'
+    elif mode == 'full' or len(answers) == 60:
+        model, n_answers, name = full_model, 60, 'Full'
+    else:
+        return None, f'Invalid number of answers: {len(answers)}. Expected 60 (full) or 35 (short).', 400
+
+    if len(answers) != n_answers:
+        return None, f'{name} mode requires {n_answers} answers, got {len(answers)}', 400
+
+    bundle = model.get() if model is not None else None
+    if bundle is None:
+        return None, f'{name} model not loaded', 500
+    return bundle, None, 200
+
+
+def predict_payload(full_model, short_model, answers, mode='auto', compact=False):
+    """(response body, status) for a /predict request
+
+    Shared by the Flask app and the ASGI app so both pick models and
+    report errors the same way.
+    """
+    bundle, error, status = select_model(full_model, short_model, answers, mode)
+    if bundle is None:
+        return {'error': error}, status
+    return bundle.predict(answers, compact=compact), 200
@@ -0,0 +1,288 @@
+"""
+Prefix tables for the SHORT model (35 questions)
+
+Every answer is one of 7 Likert values (-3..3), so for the first k
+questions of the short model (the most important ones, in the order of
+top_35_questions.json) there are only 7**k possible answer prefixes.
+For each prefix, every tree is walked as far as the prefix decides it:
+splits on the first k questions are resolved, and the walk stops at the
+first split on a later question. Trees that reach a leaf are fully
+determined, so their leaf values are summed per class into the prefix's
+table row (the partial margin). For every other tree the row keeps the
+node where the walk stopped, and inference only evaluates those pruned
+subtrees.
+
+The report shows, per prefix length, the table size (sums plus entry
+nodes), the share of trees the prefix determines, the subtrees left per
+prediction and their mean depth, the latency and the largest probability
+difference from the full model. --prefix saves a table only when it
+beats the onnxruntime session; the API loads a saved table without
+timing it again.
+
+Usage:
+    python prefix_tables.py                  # report memory/latency per prefix length
+    python prefix_tables.py --prefix 5       # also write mbti_model_short_prefix.npz
+                                             # (only if it beats onnxruntime; --force to override)
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from compiled_trees import CompiledTrees
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+SHORT_MODEL_PATH = os.path.join(API_DIR, 'mbti_model_short.onnx')
+PREFIX_TABLE_PATH = os.path.join(API_DIR, 'mbti_model_short_prefix.npz')
+
+LIKERT_LEVELS = np.arange(-3, 4, dtype=np.float32)
+N_LEVELS = len(LIKERT_LEVELS)
+
+
+def prefix_grid(prefix_len, start, stop, n_features):
+    """Rows start..stop-1 of the full answer grid, padded to n_features columns
+
+    Row index i encodes the prefix as base-7 digits: answer j is
+    LIKERT_LEVELS[(i // 7**j) % 7].
+    """
+    index = np.arange(start, stop, dtype=np.int64)
+    digits = (index[:, None] // N_LEVELS ** np.arange(prefix_len)) % N_LEVELS
+    X = np.zeros((len(index), n_features), dtype=np.float32)
+    X[:, :prefix_len] = LIKERT_LEVELS[digits]
+    return X
+
+
+def resolve_prefix(trees, prefix_len, X):
+    """Node of every tree where the walk for each row of X stops
+
+    Only splits on the first prefix_len features are followed; the result
+    is a leaf, or the first node that splits on a later feature.
+    """
+    node = np.broadcast_to(trees.tree_root, (X.shape[0], trees.n_trees)).copy()
+    rows = np.arange(X.shape[0])[:, None]
+    for _ in range(trees.depth):
+        feature = trees.feature[node]
+        known = ~trees.is_leaf[node] & (feature < prefix_len)
+        if not known.any():
+            break
+        node = np.where(known, trees.step(node, X[rows, feature]), node)
+    return node
+
+
+def build_table(trees, prefix_len, block_rows=4096, memory_limit_bytes=None):
+    """(sums, offsets, entries) for all 7**k prefixes, or None over the memory limit
+
+    sums[i] is the per-class margin of the trees prefix i determines;
+    entries[offsets[i]:offsets[i + 1]] are the nodes where the other
+    trees continue.
+    """
+    n_rows = N_LEVELS ** prefix_len
+    sums = np.zeros((n_rows, trees.n_classes), dtype=np.float32)
+    counts = np.zeros(n_rows, dtype=np.int64)
+    entries = []
+    n_bytes = sums.nbytes + counts.nbytes
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        node = resolve_prefix(trees, prefix_len, prefix_grid(prefix_len, start, stop, trees.n_features))
+        done = trees.is_leaf[node]
+        sums[start:stop] = np.where(done, trees.leaf_value[node], 0) @ trees.class_onehot
+        counts[start:stop] = (~done).sum(axis=1)
+        # Boolean indexing is row-major, so each prefix's open nodes stay together
+        entries.append(node[~done].astype(np.int32))
+        n_bytes += entries[-1].nbytes
+        if memory_limit_bytes is not None and n_bytes > memory_limit_bytes:
+            return None
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return sums, offsets, np.concatenate(entries)
+
+
+class PrefixTableModel:
+    """Short model evaluated as prefix-table lookup + the pruned subtrees left"""
+
+    def __init__(self, trees, prefix_len, sums, offsets, entries):
+        self.trees = trees
+        self.prefix_len = int(prefix_len)
+        self.sums = np.asarray(sums, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.entries = np.asarray(entries, dtype=np.int32)
+        self.powers = N_LEVELS ** np.arange(self.prefix_len, dtype=np.int64)
+        self.node_class = trees.tree_class[trees.node_trees()]
+
+    @classmethod
+    def build(cls, trees, prefix_len, memory_limit_bytes=None):
+        """The table for prefix_len questions, or None if it exceeds the memory limit"""
+        table = build_table(trees, prefix_len, memory_limit_bytes=memory_limit_bytes)
+        return None if table is None else cls(trees, prefix_len, *table)
+
+    @classmethod
+    def from_file(cls, path):
+        with np.load(path) as data:
+            trees = CompiledTrees.from_arrays(data, prefix='trees_')
+            return cls(trees, data['prefix_len'], data['sums'], data['offsets'], data['entries'])
+
+    def save(self, path):
+        np.savez(
+            path,
+            prefix_len=np.array(self.prefix_len),
+            sums=self.sums,
+            offsets=self.offsets,
+            entries=self.entries,
+            **self.trees.to_arrays(prefix='trees_')
+        )
+
+    @property
+    def table_bytes(self):
+        return self.sums.nbytes + self.offsets.nbytes + self.entries.nbytes
+
+    @property
+    def open_per_prefix(self):
+        """Subtrees left to evaluate per prediction, averaged over prefixes"""
+        return len(self.entries) / len(self.sums)
+
+    @property
+    def levels_left(self):
+        """Mean depth of the subtrees left to evaluate (the full trees: trees.depth or less)"""
+        return float(self.trees.node_heights()[self.entries].mean()) if len(self.entries) else 0.0
+
+    @property
+    def resolved_share(self):
+        """Share of trees whose leaf the prefix fixes, averaged over prefixes"""
+        return 1.0 - self.open_per_prefix / self.trees.n_trees
+
+    def margins(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        prefix = X[:, :self.prefix_len]
+        # Only exact Likert answers can use the table
+        on_grid = np.all((prefix == np.rint(prefix)) & (prefix >= LIKERT_LEVELS[0])
+                         & (prefix <= LIKERT_LEVELS[-1]), axis=1)
+        if not on_grid.all():
+            margins = self.trees.margins(X)
+            if on_grid.any():
+                margins[on_grid] = self.margins(X[on_grid])
+            return margins
+
+        index = (prefix + 3).astype(np.int64) @ self.powers
+        starts = self.offsets[index]
+        counts = self.offsets[index + 1] - starts
+        rows = np.repeat(np.arange(len(X)), counts)
+        # Position in entries of each (row, open tree) pair
+        positions = np.arange(len(rows)) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        leaves = self.trees.descend(X, rows, self.entries[positions])
+        n_classes = self.trees.n_classes
+        rest = np.bincount(rows * n_classes + self.node_class[leaves],
+                           weights=self.trees.leaf_value[leaves], minlength=len(X) * n_classes)
+        return self.sums[index] + rest.reshape(len(X), n_classes)
+
+    def predict_proba(self, X):
+        return self.trees.transform(self.margins(X))
+
+
+def time_per_row(predict, X, repeats=3):
+    """Median single-row latency in microseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for row in X:
+            predict(row.reshape(1, -1))
+        timings.append((time.perf_counter() - start) / len(X) * 1e6)
+    return float(np.median(timings))
+
+
+def session_predict(session):
+    """Single-row predict function for an onnxruntime session"""
+    input_name = session.get_inputs()[0].name
+    return lambda row: session.run(None, {input_name: row})
+
+
+def compare_with_session(model, session, n_samples=200):
+    """(use the table?, summary) after timing the table against the session
+
+    Run offline by --prefix: walking the remaining subtrees in NumPy has
+    to beat onnxruntime's native tree ensemble for a table to be worth
+    shipping.
+    """
+    rng = np.random.default_rng(42)
+    X = LIKERT_LEVELS[rng.integers(0, N_LEVELS, size=(n_samples, model.trees.n_features))]
+    table_us = time_per_row(model.predict_proba, X)
+    onnx_us = time_per_row(session_predict(session), X)
+    summary = (f"determines {model.resolved_share:.1%} of trees, "
+               f"{table_us:.1f} us/row vs {onnx_us:.1f} us/row for onnxruntime")
+    return table_us < onnx_us, summary
+
+
+def report(trees, max_prefix, memory_limit_mb, n_samples=200, session=None):
+    """Print the memory/latency tradeoff for prefix lengths 0..max_prefix"""
+    rng = np.random.default_rng(42)
+    X = LIKERT_LEVELS[rng.integers(0, N_LEVELS, size=(n_samples, trees.n_features))]
+    reference = trees.predict_proba(X)
+    full_levels = float(trees.node_heights()[trees.tree_root].mean())
+
+    print("\n" + "=" * 84)
+    print(f"{'Prefix':>6} {'Rows':>10} {'Table MB':>9} {'Determined':>11} {'Left/row':>9} "
+          f"{'Levels':>7} {'Latency us':>11} {'Max |dp|':>10}")
+    print("-" * 84)
+    print(f"{0:>6} {1:>10,} {0.0:>9.2f} {0.0:>11.1%} {trees.n_trees:>9.1f} {full_levels:>7.2f} "
+          f"{time_per_row(trees.predict_proba, X):>11.1f} {0.0:>10.1e}")
+
+    for k in range(1, max_prefix + 1):
+        model = PrefixTableModel.build(trees, k, memory_limit_mb * 1024 * 1024)
+        if model is None:
+            print(f"{k:>6} {N_LEVELS ** k:>10,} {'over limit':>9}")
+            continue
+        max_diff = float(np.abs(model.predict_proba(X) - reference).max())
+        print(f"{k:>6} {N_LEVELS ** k:>10,} {model.table_bytes / 1024 / 1024:>9.2f} "
+              f"{model.resolved_share:>11.1%} {model.open_per_prefix:>9.1f} {model.levels_left:>7.2f} "
+              f"{time_per_row(model.predict_proba, X):>11.1f} {max_diff:>10.1e}")
+
+    if session is not None:
+        onnx_us = time_per_row(session_predict(session), X)
+        print("-" * 84)
+        print(f"onnxruntime session (all trees): {onnx_us:.1f} us/row")
+    print("=" * 84)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=SHORT_MODEL_PATH, help='ONNX short model')
+    parser.add_argument('--max-prefix', type=int, default=6, help='Largest prefix length to report')
+    parser.add_argument('--memory-limit-mb', type=float, default=256.0,
+                        help='Skip tables larger than this (serverless memory budget)')
+    parser.add_argument('--prefix', type=int, default=None, help='Prefix length to write to --output')
+    parser.add_argument('--output', default=PREFIX_TABLE_PATH)
+    parser.add_argument('--force', action='store_true',
+                        help='Save the --prefix table even if it is not faster than onnxruntime')
+    args = parser.parse_args()
+
+    print(f"Compiling trees from: {args.model}")
+    trees = CompiledTrees.from_onnx(args.model)
+    print(f"  -> {trees.n_trees} trees, depth {trees.depth}, {trees.n_features} features, "
+          f"{trees.n_classes} classes")
+
+    try:
+        import onnxruntime as ort
+        session = ort.InferenceSession(args.model)
+    except ImportError:
+        session = None
+
+    report(trees, args.max_prefix, args.memory_limit_mb, session=session)
+
+    if args.prefix is not None:
+        model = PrefixTableModel.build(trees, args.prefix)
+        if session is not None:
+            faster, summary = compare_with_session(model, session)
+            print(f"\n{args.prefix}-question table: {summary}")
+            if not faster and not args.force:
+                print(f"[!] Not saving it: the API loads saved tables without timing them "
+                      f"(pass --force to save it anyway)")
+                if os.path.exists(args.output):
+                    print(f"    {args.output} (from an earlier run) is still in place")
+                return
+        model.save(args.output)
+        print(f"\n✓ Saved prefix table ({args.prefix} questions, "
+              f"{model.table_bytes / 1024 / 1024:.2f} MB): {args.output}")
+
+
+if __name__ == '__main__':
+    main()
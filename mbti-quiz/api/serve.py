@@ -0,0 +1,206 @@
+"""
+Production server for the MBTI API (pre-fork, Linux/macOS)
+
+The parent imports app.py with lazy loading, reads the ONNX model bytes and
+the NumPy prefix table once, then forks the workers, which share those pages
+copy-on-write. onnxruntime thread pools do not survive fork(), so every
+worker builds its own sessions from the shared bytes with a fixed number of
+intra-op threads. All workers accept on the same listening socket.
+
+A worker exits gracefully after --max-requests requests (plus jitter) and
+the parent starts a replacement. SIGTERM/SIGINT stop all workers after
+their in-flight requests finish.
+
+Usage:
+    python serve.py --workers 4 --port 5000
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+# Sessions must not be created before fork(), so app.py always loads lazily here
+os.environ['MBTI_LAZY_LOAD'] = '1'
+os.environ.setdefault('MBTI_PREFETCH', '0')
+
+import onnxruntime as ort
+
+import app as api
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Request handler without per-request stderr logging"""
+
+    access_log = False
+
+    def log_message(self, format, *args):
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+class WorkerServer(ThreadingMixIn, WSGIServer):
+    """Threaded WSGI server on a socket inherited from the parent"""
+
+    daemon_threads = False  # let in-flight requests finish on shutdown
+    block_on_close = True
+
+    def __init__(self, sock, handler):
+        super().__init__(sock.getsockname()[:2], handler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_address = sock.getsockname()[:2]
+        host, port = self.server_address
+        self.server_name = socket.getfqdn(host)
+        self.server_port = port
+        self.setup_environ()
+
+
+def count_requests(wsgi_app, limit, on_limit):
+    """WSGI middleware that calls on_limit() once after `limit` requests"""
+    state = {'count': 0}
+    lock = threading.Lock()
+
+    def wrapped(environ, start_response):
+        with lock:
+            state['count'] += 1
+            reached = state['count'] == limit
+        if reached:
+            on_limit()
+        return wsgi_app(environ, start_response)
+
+    return wrapped
+
+
+def run_worker(sock, args, worker_id):
+    """Worker process body; never returns"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = args.ort_threads
+    options.inter_op_num_threads = 1
+    for model in (api.full_model, api.short_model):
+        if model is None:
+            continue
+        model.session_options = options
+        if not args.lazy:
+            model.get()
+
+    QuietHandler.access_log = args.access_log
+    server = WorkerServer(sock, QuietHandler)
+    stopping = threading.Event()
+
+    def stop():
+        # shutdown() blocks until serve_forever() returns, so never call it
+        # from the serving thread itself
+        if not stopping.is_set():
+            stopping.set()
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop())
+
+    max_requests = args.max_requests
+    if max_requests and args.max_requests_jitter:
+        max_requests += random.randint(0, args.max_requests_jitter)
+    wsgi_app = api.app
+    if max_requests:
+        wsgi_app = count_requests(wsgi_app, max_requests, stop)
+    server.set_app(wsgi_app)
+
+    print(f"[worker {worker_id}] pid {os.getpid()} ready "
+          f"(ort threads: {args.ort_threads}, max requests: {max_requests or 'unlimited'})")
+    sys.stdout.flush()
+    server.serve_forever()
+    server.server_close()
+    if api.ingestion_log is not None:
+        api.ingestion_log.close()  # os._exit() skips atexit handlers
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-fork production server for the MBTI API')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--ort-threads', type=int, default=1,
+                        help='onnxruntime intra-op threads per worker')
+    parser.add_argument('--max-requests', type=int, default=10000,
+                        help='Recycle a worker after this many requests (0 = never)')
+    parser.add_argument('--max-requests-jitter', type=int, default=1000,
+                        help='Random extra requests so workers do not recycle together')
+    parser.add_argument('--lazy', action='store_true',
+                        help='Build sessions on first use instead of at worker start')
+    parser.add_argument('--backlog', type=int, default=1024)
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args()
+
+    # Shared, read-only state: read once here, inherited by every worker
+    for model in (api.full_model, api.short_model):
+        if model is not None:
+            model.preload()
+    sock = socket.create_server((args.host, args.port), backlog=args.backlog)
+    # Keep the parent's objects out of later GC passes so the workers do
+    # not dirty (and copy) those pages just by collecting
+    gc.freeze()
+
+    workers = {}
+    stopping = False
+
+    def spawn(worker_id):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock, args, worker_id)
+            finally:
+                os._exit(1)
+        workers[pid] = (worker_id, time.monotonic())
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    for worker_id in range(args.workers):
+        spawn(worker_id)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in workers:
+            continue
+        worker_id, started = workers.pop(pid)
+        if stopping:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if code == 0:
+            print(f"[worker {worker_id}] recycled")
+        else:
+            print(f"[worker {worker_id}] exited with status {code}, restarting")
+            # Avoid a tight restart loop when workers fail at startup
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)
+        spawn(worker_id)
+
+    sock.close()
+    print("All workers stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Cold start and request latency bookkeeping for the MBTI API
+
+Keeps import time, the first request and steady-state requests apart, so a
+slow cold start is not averaged away by warm traffic (and vice versa).
+"""
+
+import threading
+from collections import deque
+
+import numpy as np
+
+# Log a steady-state summary every this many requests
+LOG_EVERY = 100
+# Number of recent steady-state requests kept for percentiles
+WINDOW = 1000
+
+
+class ServingStats:
+    """Import, first-request and steady-state timings of one process"""
+
+    def __init__(self):
+        self.import_seconds = None
+        self.first_request_seconds = None
+        self.first_request_path = None
+        self.steady_count = 0
+        self._recent = deque(maxlen=WINDOW)
+        self._lock = threading.Lock()
+
+    def record_import(self, seconds):
+        self.import_seconds = seconds
+        print(f"[timing] import: {seconds * 1000:.1f} ms")
+
+    def record_request(self, path, seconds):
+        """Record one request; returns True if it was the first one"""
+        with self._lock:
+            if self.first_request_seconds is None:
+                self.first_request_seconds = seconds
+                self.first_request_path = path
+                first = True
+            else:
+                self.steady_count += 1
+                self._recent.append(seconds)
+                first = False
+            log_steady = not first and self.steady_count % LOG_EVERY == 0
+
+        if first:
+            print(f"[timing] first request ({path}): {seconds * 1000:.1f} ms")
+        elif log_steady:
+            steady = self.steady_state()
+            print(f"[timing] steady state over last {steady['window']} requests: "
+                  f"p50 {steady['p50_ms']:.2f} ms, p95 {steady['p95_ms']:.2f} ms")
+        return first
+
+    def steady_state(self):
+        with self._lock:
+            recent = np.array(self._recent) * 1000
+        if len(recent) == 0:
+            return {'window': 0, 'p50_ms': None, 'p95_ms': None, 'mean_ms': None}
+        return {
+            'window': len(recent),
+            'p50_ms': float(np.percentile(recent, 50)),
+            'p95_ms': float(np.percentile(recent, 95)),
+            'mean_ms': float(recent.mean())
+        }
+
+    def summary(self):
+        return {
+            'import_ms': None if self.import_seconds is None else self.import_seconds * 1000,
+            'first_request_ms': (None if self.first_request_seconds is None
+                                 else self.first_request_seconds * 1000),
+            'first_request_path': self.first_request_path,
+            'steady_state_requests': self.steady_count,
+            'steady_state': self.steady_state()
+        }
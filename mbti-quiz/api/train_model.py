@@ -1,9 +1,32 @@
 """
 Train and save XGBoost model for MBTI prediction
+
+Full training fits the model on 16P_eda_cleaned.csv from scratch:
+
+    python train_model.py
+
+Incremental mode refreshes the deployed model with newly ingested responses
+(e.g. the output of `ingest_log.py compact --incremental`) instead: it loads
+xgb_model.joblib, holds out part of the new data for validation, and adds up
+to --rounds boosting rounds fitted on the rest through XGBoost's xgb_model
+continuation, stopping early once the validation loss stops improving. Only
+the new rows are read, so the refresh time scales with their number, not
+with the full history. Rounds that do not beat the current model on the
+validation rows are discarded. The previous model is kept as
+xgb_model.prev.joblib and the ONNX export is rebuilt with convert_to_onnx.py:
+
+    python train_model.py --incremental ../../ingested_responses.csv --rounds 50
 """
 
+import argparse
+import shutil
+import sys
+import time
+
 import pandas as pd
 import numpy as np
+from sklearn.metrics import log_loss
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from xgboost import XGBClassifier
 import joblib
@@ -15,21 +38,19 @@ PARENT_DIR = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 DATA_PATH = os.path.join(PARENT_DIR, '16P_eda_cleaned.csv')
 MODEL_PATH = os.path.join(SCRIPT_DIR, 'xgb_model.joblib')
 ENCODER_PATH = os.path.join(SCRIPT_DIR, 'label_encoder.joblib')
+PREVIOUS_MODEL_PATH = os.path.join(SCRIPT_DIR, 'xgb_model.prev.joblib')
+ONNX_PATH = os.path.join(SCRIPT_DIR, 'mbti_model.onnx')
+
+sys.path.insert(0, PARENT_DIR)
+from model_params import load_params
 
-# XGBoost parameters (same as the original training)
-XGBOOST_PARAMS = {
-    'n_estimators': 500,
-    'learning_rate': 0.1,
-    'max_depth': 6,
-    'min_child_weight': 1,
-    'subsample': 0.8,
-    'colsample_bytree': 0.8,
-    'objective': 'multi:softprob',
-    'num_class': 16,
-    'random_state': 42,
-    'n_jobs': -1,
-    'verbosity': 1
-}
+# XGBoost parameters of the technique scripts (model_params.py)
+XGBOOST_PARAMS = load_params('xgb', num_class=16, verbosity=1)
+
+# Incremental refresh: extra rounds at most, patience, share of new rows held out
+INCREMENTAL_ROUNDS = 50
+EARLY_STOPPING_ROUNDS = 10
+VALIDATION_FRACTION = 0.2
 
 
 def train_model():
@@ -93,5 +114,119 @@ def train_model():
     return model, label_encoder
 
 
+def export_onnx(model, output_path=ONNX_PATH):
+    """Rebuild the ONNX export through the same path as convert_to_onnx.py"""
+    from convert_to_onnx import convert
+    convert(model, output_path)
+
+
+def retrain_incremental(new_data_path, rounds=INCREMENTAL_ROUNDS,
+                        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                        validation_fraction=VALIDATION_FRACTION,
+                        learning_rate=None, onnx_path=ONNX_PATH):
+    print("="*50)
+    print("Incremental XGBoost Refresh")
+    print("="*50)
+    start = time.perf_counter()
+
+    model = joblib.load(MODEL_PATH)
+    label_encoder = joblib.load(ENCODER_PATH)
+    booster = model.get_booster()
+    base_rounds = booster.num_boosted_rounds()
+    print(f"\nLoaded model: {MODEL_PATH} ({base_rounds} rounds)")
+
+    # Load new data
+    print(f"Loading new data from: {new_data_path}")
+    df = pd.read_csv(new_data_path)
+    X = df.iloc[:, :-1]
+    y = df.iloc[:, -1]
+    if X.shape[1] != booster.num_features():
+        raise ValueError(f"New data has {X.shape[1]} feature columns, the model expects {booster.num_features()}")
+    # Columns are matched by position; the booster checks feature names
+    if booster.feature_names:
+        X.columns = booster.feature_names
+
+    known = y.isin(label_encoder.classes_)
+    if not known.all():
+        print(f"Skipping {int((~known).sum())} rows with unknown types: {sorted(y[~known].unique())}")
+        X, y = X[known], y[known]
+    if len(y) < 2:
+        print("Not enough new labelled rows; model unchanged.")
+        return model, label_encoder
+    y_encoded = label_encoder.transform(y)
+    print(f"New rows: {len(y):,}")
+
+    counts = np.bincount(y_encoded)
+    stratify = y_encoded if counts[counts > 0].min() >= 2 else None
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y_encoded, test_size=validation_fraction,
+        random_state=XGBOOST_PARAMS['random_state'], stratify=stratify)
+    labels = np.arange(len(label_encoder.classes_))
+    base_loss = log_loss(y_val, model.predict_proba(X_val), labels=labels)
+    base_acc = model.score(X_val, y_val)
+    print(f"Train / validation: {len(y_train):,} / {len(y_val):,}")
+    print(f"Current model on validation: logloss {base_loss:.4f}, accuracy {base_acc:.4f}")
+
+    # Continue boosting from the deployed booster
+    params = {**XGBOOST_PARAMS, 'n_estimators': rounds,
+              'early_stopping_rounds': early_stopping_rounds, 'eval_metric': 'mlogloss'}
+    if learning_rate is not None:
+        params['learning_rate'] = learning_rate
+    print(f"\nAdding up to {rounds} rounds (early stopping after {early_stopping_rounds})...")
+    refreshed = XGBClassifier(**params)
+    refreshed.fit(X_train, y_train, eval_set=[(X_val, y_val)], xgb_model=booster, verbose=False)
+
+    best_loss = refreshed.evals_result()['validation_0']['mlogloss'][refreshed.best_iteration - base_rounds]
+    added = refreshed.best_iteration + 1 - base_rounds
+    if best_loss >= base_loss:
+        print(f"No improvement on validation (best {best_loss:.4f}); model unchanged.")
+        return model, label_encoder
+
+    # Keep the trees up to the best round only, so the saved model and the
+    # ONNX export predict with exactly those
+    best = refreshed.get_booster()[:refreshed.best_iteration + 1]
+    model = XGBClassifier(**XGBOOST_PARAMS)
+    model.load_model(bytearray(best.save_raw()))
+    new_acc = model.score(X_val, y_val)
+    print(f"Added {added} rounds ({base_rounds} -> {base_rounds + added})")
+    print(f"Refreshed model on validation: logloss {best_loss:.4f}, accuracy {new_acc:.4f}")
+
+    shutil.copyfile(MODEL_PATH, PREVIOUS_MODEL_PATH)
+    print(f"\nPrevious model kept as: {PREVIOUS_MODEL_PATH}")
+    print(f"Saving model to: {MODEL_PATH}")
+    joblib.dump(model, MODEL_PATH)
+
+    if onnx_path:
+        print(f"Exporting ONNX to: {onnx_path}")
+        export_onnx(joblib.load(MODEL_PATH), onnx_path)
+
+    print("\n" + "="*50)
+    print(f"Incremental refresh complete in {time.perf_counter() - start:.1f}s")
+    print("="*50)
+    return model, label_encoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the XGBoost model, or refresh it with new data')
+    parser.add_argument('--incremental', metavar='NEW_DATA_CSV',
+                        help='Continue boosting the saved model on these responses instead of retraining')
+    parser.add_argument('--rounds', type=int, default=INCREMENTAL_ROUNDS,
+                        help='Most boosting rounds to add')
+    parser.add_argument('--early-stopping', type=int, default=EARLY_STOPPING_ROUNDS,
+                        help='Stop after this many rounds without validation improvement')
+    parser.add_argument('--validation-fraction', type=float, default=VALIDATION_FRACTION)
+    parser.add_argument('--learning-rate', type=float,
+                        help='Learning rate of the added rounds (default: the original one)')
+    parser.add_argument('--no-onnx', action='store_true', help='Do not rebuild mbti_model.onnx')
+    args = parser.parse_args()
+
+    if args.incremental:
+        retrain_incremental(args.incremental, args.rounds, args.early_stopping,
+                            args.validation_fraction, args.learning_rate,
+                            None if args.no_onnx else ONNX_PATH)
+    else:
+        train_model()
+
+
 if __name__ == '__main__':
-    train_model()
+    main()
@@ -0,0 +1,322 @@
+"""
+Exact TreeSHAP attributions for the XGBoost models served by the API
+
+Explains one prediction as per-question contributions to the predicted
+type's margin (log-odds), using path-dependent TreeSHAP (Lundberg et al.,
+Algorithm 2) on CompiledTrees arrays. Everything that does not depend on the
+answers is precomputed once per model and stored in an .npz:
+
+- one path per leaf, with the questions split on along it merged into at
+  most `depth` unique-feature slots;
+- each slot's zero fraction (the share of cover that follows the path);
+- each edge's test, so the one fractions for a row are a few vectorized
+  comparisons.
+
+Explaining a row then runs the EXTEND/UNWIND recurrences for all leaves of
+one class's trees at once, O(leaves x depth^2) NumPy work with no Python
+recursion. Padding slots (zero = one = 1) act as null players and leave the
+values unchanged. Only the explained class's trees are visited, a 16th of
+the model.
+
+Build the .npz from the trained XGBoost model (exact XGBoost cover), or from
+the served ONNX model plus representative data for the cover:
+
+    python tree_shap.py --booster xgb_model.joblib --output mbti_model_shap.npz
+    python tree_shap.py --model mbti_model_short.onnx --background ../../16P_eda_cleaned.csv \\
+        --feature-indices top_35_questions.json --output mbti_model_short_shap.npz
+    python tree_shap.py --explainer mbti_model_shap.npz --benchmark
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from compiled_trees import CompiledTrees
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Arrays written to / read from .npz files
+PATH_FIELDS = [
+    'class_offsets', 'leaf_value', 'slot_feature', 'slot_zero',
+    'edge_feature', 'edge_threshold', 'edge_go_true', 'edge_leq',
+    'edge_missing_true', 'edge_slot', 'expected_value'
+]
+
+
+def _leaf_paths(trees, tree):
+    """(leaf node, [(parent node, went true, cover ratio), ...]) for every leaf of a tree"""
+    paths = []
+    stack = [(int(trees.tree_root[tree]), [])]
+    while stack:
+        node, edges = stack.pop()
+        if trees.is_leaf[node]:
+            paths.append((node, edges))
+            continue
+        parent_cover = float(trees.cover[node])
+        for child, went_true in ((int(trees.true_child[node]), True),
+                                 (int(trees.false_child[node]), False)):
+            ratio = float(trees.cover[child]) / parent_cover if parent_cover > 0 else 0.0
+            stack.append((child, edges + [(node, went_true, ratio)]))
+    return paths
+
+
+class TreeShapExplainer:
+    """Precomputed TreeSHAP path data for one tree ensemble
+
+    Paths are grouped by class: those of class c are rows
+    class_offsets[c]:class_offsets[c + 1] of every per-path array.
+    """
+
+    def __init__(self, class_offsets, leaf_value, slot_feature, slot_zero,
+                 edge_feature, edge_threshold, edge_go_true, edge_leq,
+                 edge_missing_true, edge_slot, expected_value, n_features):
+        self.class_offsets = np.asarray(class_offsets, dtype=np.int64)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float64)
+        self.slot_feature = np.asarray(slot_feature, dtype=np.int32)
+        self.slot_zero = np.asarray(slot_zero, dtype=np.float64)
+        self.edge_feature = np.asarray(edge_feature, dtype=np.int32)
+        self.edge_threshold = np.asarray(edge_threshold, dtype=np.float32)
+        self.edge_go_true = np.asarray(edge_go_true, dtype=bool)
+        self.edge_leq = np.asarray(edge_leq, dtype=bool)
+        self.edge_missing_true = np.asarray(edge_missing_true, dtype=bool)
+        self.edge_slot = np.asarray(edge_slot, dtype=np.int32)
+        self.expected_value = np.asarray(expected_value, dtype=np.float64)
+        self.n_features = int(n_features)
+
+        self.n_slots = self.slot_feature.shape[1]
+        self.n_classes = len(self.class_offsets) - 1
+
+    # ------------------------------------------------------------------
+    # Construction / persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_trees(cls, trees):
+        """Precompute path data from CompiledTrees that carry node cover"""
+        if trees.cover is None:
+            raise ValueError("TreeSHAP needs node cover: use CompiledTrees.from_xgboost() "
+                             "or with_data_cover()")
+        depth = max(trees.depth, 1)
+        leaf_value, path_class = [], []
+        slot_feature, slot_zero = [], []
+        edges = {name: [] for name in ('feature', 'threshold', 'go_true', 'leq', 'missing_true', 'slot')}
+
+        for tree in range(trees.n_trees):
+            for leaf, path in _leaf_paths(trees, tree):
+                slots = {}
+                zeros = []
+                row = {name: [] for name in edges}
+                for node, went_true, ratio in path:
+                    feature = int(trees.feature[node])
+                    if feature not in slots:
+                        slots[feature] = len(slots)
+                        zeros.append(1.0)
+                    zeros[slots[feature]] *= ratio
+                    row['feature'].append(feature)
+                    row['threshold'].append(trees.threshold[node])
+                    row['go_true'].append(went_true)
+                    row['leq'].append(trees.branch_leq[node])
+                    row['missing_true'].append(trees.missing_true[node])
+                    row['slot'].append(slots[feature])
+
+                pad_slots = depth - len(slots)
+                slot_feature.append(list(slots) + [0] * pad_slots)
+                slot_zero.append(zeros + [1.0] * pad_slots)
+                pad_edges = depth - len(path)
+                # Padding edges always pass and write to a spare slot
+                edges['feature'].append(row['feature'] + [0] * pad_edges)
+                edges['threshold'].append(row['threshold'] + [0.0] * pad_edges)
+                edges['go_true'].append(row['go_true'] + [True] * pad_edges)
+                edges['leq'].append(row['leq'] + [False] * pad_edges)
+                edges['missing_true'].append(row['missing_true'] + [False] * pad_edges)
+                edges['slot'].append(row['slot'] + [depth] * pad_edges)
+                leaf_value.append(float(trees.leaf_value[leaf]))
+                path_class.append(int(trees.tree_class[tree]))
+
+        order = np.argsort(path_class, kind='stable')
+        path_class = np.asarray(path_class)[order]
+        leaf_value = np.asarray(leaf_value)[order]
+        slot_zero = np.asarray(slot_zero)[order]
+        class_offsets = np.searchsorted(path_class, np.arange(trees.n_classes + 1))
+
+        # E[f(x)] under the cover distribution: leaf values weighted by path probability
+        reach = leaf_value * slot_zero.prod(axis=1)
+        expected_value = trees.base_values.astype(np.float64).copy()
+        for c in range(trees.n_classes):
+            expected_value[c] += reach[class_offsets[c]:class_offsets[c + 1]].sum()
+
+        return cls(
+            class_offsets=class_offsets,
+            leaf_value=leaf_value,
+            slot_feature=np.asarray(slot_feature)[order],
+            slot_zero=slot_zero,
+            edge_feature=np.asarray(edges['feature'])[order],
+            edge_threshold=np.asarray(edges['threshold'])[order],
+            edge_go_true=np.asarray(edges['go_true'])[order],
+            edge_leq=np.asarray(edges['leq'])[order],
+            edge_missing_true=np.asarray(edges['missing_true'])[order],
+            edge_slot=np.asarray(edges['slot'])[order],
+            expected_value=expected_value,
+            n_features=trees.n_features
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        with np.load(path) as data:
+            return cls(n_features=int(data['n_features']),
+                       **{name: data[name] for name in PATH_FIELDS})
+
+    def save(self, path):
+        arrays = {name: getattr(self, name) for name in PATH_FIELDS}
+        np.savez_compressed(path, n_features=np.array(self.n_features), **arrays)
+
+    @property
+    def n_paths(self):
+        return len(self.leaf_value)
+
+    # ------------------------------------------------------------------
+    # Attribution
+    # ------------------------------------------------------------------
+    def shap_values(self, x, class_index):
+        """Per-feature contributions to class_index's margin for one row
+
+        Returns (contributions, expected value); contributions sum to the
+        row's margin minus the expected value.
+        """
+        x = np.asarray(x, dtype=np.float32).ravel()
+        paths = slice(self.class_offsets[class_index], self.class_offsets[class_index + 1])
+        leaf_value = self.leaf_value[paths]
+        zero = self.slot_zero[paths]
+        n_paths, depth = zero.shape
+
+        # One fractions: does x follow every edge of the path on that feature?
+        value = x[self.edge_feature[paths]]
+        threshold = self.edge_threshold[paths]
+        goes_true = ((value < threshold) | (self.edge_leq[paths] & (value == threshold))
+                     | (np.isnan(value) & self.edge_missing_true[paths]))
+        follows = goes_true == self.edge_go_true[paths]
+        one = np.ones((n_paths, depth + 1), dtype=bool)
+        rows = np.arange(n_paths)
+        slots = self.edge_slot[paths]
+        for e in range(slots.shape[1]):
+            one[rows, slots[:, e]] &= follows[:, e]
+        one = one[:, :depth].astype(np.float64)
+
+        # EXTEND: permutation weights after adding the root and every slot
+        weights = np.zeros((n_paths, depth + 1))
+        weights[:, 0] = 1.0
+        for l in range(1, depth + 1):
+            z, o = zero[:, l - 1], one[:, l - 1]
+            for i in range(l - 1, -1, -1):
+                weights[:, i + 1] += o * weights[:, i] * (i + 1) / (l + 1)
+                weights[:, i] = z * weights[:, i] * (l - i) / (l + 1)
+
+        # UNWIND each slot in turn and credit its feature
+        contributions = np.zeros(self.n_features)
+        safe_zero = np.where(zero > 0, zero, 1.0)
+        for k in range(depth):
+            o, z = one[:, k], zero[:, k]
+            next_portion = weights[:, depth].copy()
+            total_one = np.zeros(n_paths)
+            total_zero = np.zeros(n_paths)
+            for i in range(depth - 1, -1, -1):
+                tmp = next_portion * (depth + 1) / (i + 1)
+                total_one += tmp
+                next_portion = weights[:, i] - tmp * z * (depth - i) / (depth + 1)
+                total_zero += weights[:, i] / safe_zero[:, k] * (depth + 1) / (depth - i)
+            total = np.where(o > 0, total_one, np.where(z > 0, total_zero, 0.0))
+            np.add.at(contributions, self.slot_feature[paths, k], total * (o - z) * leaf_value)
+        return contributions, float(self.expected_value[class_index])
+
+
+def top_contributions(contributions, answers, question_ids, questions, top):
+    """The `top` questions with the largest absolute contribution"""
+    order = np.argsort(-np.abs(contributions), kind='stable')[:top]
+    result = []
+    for i in order:
+        question_id = int(question_ids[i])
+        result.append({
+            'question_index': question_id,
+            'question': questions[question_id] if questions and question_id < len(questions) else None,
+            'answer': answers[i],
+            'contribution': float(contributions[i])
+        })
+    return result
+
+
+def benchmark(explainer, n_rows=200, seed=0):
+    """Per-row explanation latency (ms) on random Likert answers"""
+    rng = np.random.default_rng(seed)
+    X = rng.integers(-3, 4, size=(n_rows, explainer.n_features)).astype(np.float32)
+    explainer.shap_values(X[0], 0)  # warm up
+    times = []
+    for i, x in enumerate(X):
+        start = time.perf_counter()
+        explainer.shap_values(x, i % explainer.n_classes)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1000
+    return {
+        'paths': explainer.n_paths,
+        'paths_per_class': explainer.n_paths / max(explainer.n_classes, 1),
+        'slots': explainer.n_slots,
+        'p50_ms': float(np.percentile(times, 50)),
+        'p95_ms': float(np.percentile(times, 95)),
+        'max_ms': float(times.max())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and benchmark TreeSHAP explainers')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--booster', help='Trained XGBoost model (joblib or XGBoost JSON/UBJ)')
+    source.add_argument('--model', help='Served ONNX model; needs --background for cover')
+    source.add_argument('--explainer', help='Existing explainer .npz (with --benchmark)')
+    parser.add_argument('--background', help='CSV of representative answers (e.g. the training data)')
+    parser.add_argument('--feature-indices',
+                        help='JSON with "indices" selecting the model inputs from the 60 questions')
+    parser.add_argument('--output', help='Explainer .npz to write')
+    parser.add_argument('--benchmark', action='store_true')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.explainer:
+        explainer = TreeShapExplainer.from_file(args.explainer)
+    else:
+        if args.booster:
+            if args.booster.endswith(('.json', '.ubj')):
+                import xgboost as xgb
+                booster = xgb.Booster(model_file=args.booster)
+            else:
+                import joblib
+                booster = joblib.load(args.booster)
+            trees = CompiledTrees.from_xgboost(booster)
+        else:
+            if not args.background:
+                parser.error('--model needs --background data to estimate node cover')
+            import pandas as pd
+            background = pd.read_csv(args.background)
+            background = background.drop(columns=[c for c in ('Response Id', 'Personality')
+                                                  if c in background.columns])
+            X = background.to_numpy(dtype=np.float32)
+            if args.feature_indices:
+                with open(args.feature_indices) as f:
+                    X = X[:, json.load(f)['indices']]
+            trees = CompiledTrees.from_onnx(args.model).with_data_cover(X)
+        explainer = TreeShapExplainer.from_trees(trees)
+        print(f"Built {explainer.n_paths:,} paths ({trees.n_trees} trees, depth {trees.depth}) "
+              f"in {time.perf_counter() - start:.1f}s")
+        if args.output:
+            explainer.save(args.output)
+            print(f"Saved: {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+    if args.benchmark:
+        result = benchmark(explainer)
+        print(f"Explain one row: p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+              f"max {result['max_ms']:.2f} ms ({result['paths_per_class']:,.0f} paths per class, "
+              f"{result['slots']} slots)")
+
+
+if __name__ == '__main__':
+    main()
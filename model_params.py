@@ -0,0 +1,82 @@
+"""
+Default Hyperparameters of the Four Model Families
+==================================================
+
+One copy of the hyperparameters shared by the technique scripts
+(random_forest, gradient_boosting, logistic_regression, lda), profile_models.py,
+the factorized models and the Feature_Selection_Analysis scripts, plus the
+one loader for tuned params files (best_params.json from
+tune_hyperparameters.py), so every script fits the same models and accepts
+the same --params file.
+
+Scripts that need a different value (RF progress output, n_jobs=1 inside a
+process pool) pass it as an override to load_params.
+
+Usage:
+    from model_params import add_params_argument, load_params
+    add_params_argument(parser)
+    RF_PARAMS = load_params('rf', args.params, verbose=1)
+"""
+
+import json
+
+RANDOM_STATE = 42
+
+DEFAULT_PARAMS = {
+    'xgb': {
+        'n_estimators': 500,
+        'learning_rate': 0.1,
+        'max_depth': 6,
+        'min_child_weight': 1,
+        'subsample': 0.8,
+        'colsample_bytree': 0.8,
+        'objective': 'multi:softprob',
+        'random_state': RANDOM_STATE,
+        'n_jobs': -1,
+        'verbosity': 0
+    },
+    'rf': {
+        'n_estimators': 100,          # Number of trees in the forest
+        'max_depth': 20,              # Maximum depth of trees
+        'min_samples_split': 5,       # Minimum samples required to split
+        'min_samples_leaf': 2,        # Minimum samples required at leaf node
+        'max_features': 'sqrt',       # Number of features to consider at each split
+        'random_state': RANDOM_STATE,
+        'n_jobs': -1                  # Use all available cores
+    },
+    # lbfgs fits a multinomial (softmax) model; multi_class is gone from newer scikit-learn
+    'lr': {
+        'solver': 'lbfgs',
+        'max_iter': 1000,             # Ensure convergence
+        'C': 1.0,                     # Regularization strength (inverse)
+        'random_state': RANDOM_STATE
+    },
+    'lda': {
+        'solver': 'svd',              # SVD solver (doesn't require matrix inversion)
+        'n_components': None,         # Use all discriminant components (min(n_classes-1, n_features))
+        'store_covariance': False,    # Don't store covariance for memory efficiency
+        'tol': 1e-4                   # Threshold for rank estimation
+    }
+}
+
+# XGBoost stops when validation logloss has not improved for this many rounds
+EARLY_STOPPING_ROUNDS = 15
+
+
+def add_params_argument(parser):
+    parser.add_argument('--params', help='Tuned hyperparameters file (tune_hyperparameters.py)')
+
+
+def load_params(family, path=None, **overrides):
+    """Default hyperparameters of a family, updated from a tuned params file, then overrides
+
+    A params file without an entry for the family leaves the defaults as they are.
+    """
+    params = dict(DEFAULT_PARAMS[family])
+    if path:
+        with open(path) as f:
+            tuned = json.load(f)
+        if family in tuned:
+            params.update(tuned[family]['params'])
+    params.update(overrides)
+    return params
@@ -0,0 +1,352 @@
+"""
+Training and Inference Resource Profile of the Four Models
+==========================================================
+
+The model reports compare accuracy only. This script measures what each
+model costs, so the choice of model for the API can weigh both:
+
+- fit: wall time, CPU time (all threads), peak resident memory (RSS)
+  during the fit and its growth over the RSS before the fit
+- model: serialized size (XGBoost: booster up to its best iteration) and trees
+- inference: single-row predict_proba latency (p50/p95/p99) and
+  throughput at several batch sizes
+
+Models use the hyperparameters of the technique scripts (model_params.py,
+or a tuned params file from tune_hyperparameters.py with --params), fitted
+on the shared 70/15/15 split (data_split_indices.json when present);
+XGBoost early-stops on the validation set. Inference is timed on the test rows.
+
+Every run (model x repeat) happens in a fresh process started with 'spawn',
+one at a time, so no two runs compete for cores or memory. The kernel's
+peak RSS (VmHWM) is reset right before the fit, so the peak covers the fit
+and not the data loading before it; where it cannot be reset (non-Linux)
+a thread samples RSS during the fit instead. The process is not a pool
+worker, so Random Forest's n_jobs=-1 can still use every core. Fit numbers
+are reported as mean and standard deviation over --repeats runs, inference
+numbers as the median.
+
+Results: a comparison table (CSV, one row per model) and every individual
+run with the machine details (JSON).
+
+Usage:
+    python profile_models.py [--models xgb rf lr lda] [--repeats 3] [--params best_params.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_params import EARLY_STOPPING_ROUNDS, add_params_argument, load_params
+from tune_hyperparameters import DATA_PATH, MODEL_NAMES, SPLITS_PATH, load_splits
+
+OUTPUT_DIR = 'All_Techniques'
+BATCH_SIZES = [1, 32, 1024, 8192]
+# Rows timed one at a time for the single-row latency
+LATENCY_ROWS = 300
+# Batches timed per batch size (at most), and repeats of that timing (best is kept)
+MAX_BATCHES = 200
+BATCH_REPEATS = 3
+
+
+# =============================================================================
+# Measurements (run in the child process)
+# =============================================================================
+
+def rss_mb():
+    """Current resident memory of this process in MB; NaN where unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return float('nan')
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS (VmHWM) to the current RSS; False where unsupported (non-Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak resident memory (VmHWM) since the last reset_peak_rss(), in MB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 2**10
+    return float('nan')
+
+
+class RssSampler(threading.Thread):
+    """Highest RSS seen by polling every interval seconds, where the peak cannot be reset"""
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, rss_mb())
+
+
+def make_model(family, params):
+    if family == 'xgb':
+        from xgboost import XGBClassifier
+        return XGBClassifier(**params, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    if family == 'rf':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(**params)
+    if family == 'lr':
+        from sklearn.linear_model import LogisticRegression
+        return make_pipeline(StandardScaler(), LogisticRegression(**params))
+    if family == 'lda':
+        from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+        return make_pipeline(StandardScaler(), LinearDiscriminantAnalysis(**params))
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def model_size(family, model):
+    """(serialized bytes, number of trees or None)"""
+    if family == 'xgb':
+        booster = model.get_booster()[:model.best_iteration + 1]
+        return len(booster.save_raw('ubj')), len(booster.get_dump())
+    trees = len(model.estimators_) if hasattr(model, 'estimators_') else None
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)), trees
+
+
+def time_single_rows(model, X):
+    """Single-row predict_proba latencies in microseconds"""
+    rows = X[:LATENCY_ROWS]
+    model.predict_proba(rows[:1])  # warm up
+    latencies = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        model.predict_proba(rows[i:i + 1])
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1e6
+
+
+def time_batches(model, X, batch_size):
+    """Rows/sec of predict_proba in batches of batch_size"""
+    if batch_size > len(X):
+        X = np.tile(X, (-(-batch_size // len(X)), 1))
+    n_batches = max(1, min(len(X) // batch_size, MAX_BATCHES))
+    best = float('inf')
+    for _ in range(BATCH_REPEATS):
+        start = time.perf_counter()
+        for b in range(n_batches):
+            model.predict_proba(X[b * batch_size:(b + 1) * batch_size])
+        best = min(best, time.perf_counter() - start)
+    return n_batches * batch_size / best
+
+
+def profile_run(task):
+    """Fit one model and time it; runs in a fresh process"""
+    family, params, repeat, arrays, batch_sizes = task
+    X_train, y_train, X_val, y_val, X_test, y_test = arrays
+    model = make_model(family, params)
+
+    # Peak RSS of the fit alone: loading the arrays and importing the
+    # libraries have already raised the process high-water mark
+    rss_before = rss_mb()
+    sampler = None if reset_peak_rss() else RssSampler()
+    if sampler is not None:
+        sampler.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    if family == 'xgb':
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    else:
+        model.fit(X_train, y_train)
+    fit_wall = time.perf_counter() - wall_start
+    fit_cpu = time.process_time() - cpu_start
+    peak = peak_rss_mb() if sampler is None else sampler.stop()
+
+    size_bytes, trees = model_size(family, model)
+    test_accuracy = float(np.mean(model.predict(X_test) == y_test))
+    latencies = time_single_rows(model, X_test)
+    return {
+        'family': family,
+        'repeat': repeat,
+        'fit_wall_s': fit_wall,
+        'fit_cpu_s': fit_cpu,
+        'rss_before_fit_mb': rss_before,
+        'peak_rss_mb': peak,
+        'fit_memory_mb': peak - rss_before,
+        'peak_rss_source': 'VmHWM' if sampler is None else 'sampled',
+        'size_bytes': size_bytes,
+        'trees': trees,
+        'test_accuracy': test_accuracy,
+        'latency_p50_us': float(np.percentile(latencies, 50)),
+        'latency_p95_us': float(np.percentile(latencies, 95)),
+        'latency_p99_us': float(np.percentile(latencies, 99)),
+        'throughput': {str(b): time_batches(model, X_test, b) for b in batch_sizes}
+    }
+
+
+def _run_child(task, connection):
+    try:
+        connection.send(('ok', profile_run(task)))
+    except BaseException:
+        import traceback
+        connection.send(('error', traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def run_isolated(context, task):
+    """profile_run(task) in a new process; returns its result"""
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_child, args=(task, sender))
+    process.start()
+    sender.close()
+    try:
+        status, result = receiver.recv()
+    except EOFError:
+        status, result = 'error', f"process exited with code {process.exitcode}"
+    process.join()
+    if status != 'ok':
+        raise RuntimeError(f"Profiling {task[0]} failed:\n{result}")
+    return result
+
+
+# =============================================================================
+# Comparison table
+# =============================================================================
+
+def summarize(runs, batch_sizes):
+    """One row per model: fit mean/std over repeats, inference medians"""
+    rows = []
+    for family in dict.fromkeys(run['family'] for run in runs):
+        own = [run for run in runs if run['family'] == family]
+
+        def values(key):
+            return np.array([run[key] for run in own], dtype=np.float64)
+
+        row = {
+            'Model': MODEL_NAMES[family],
+            'Runs': len(own),
+            'Test Accuracy': values('test_accuracy').mean(),
+            'Fit Wall s': values('fit_wall_s').mean(),
+            'Fit Wall s Std': values('fit_wall_s').std(),
+            'Fit CPU s': values('fit_cpu_s').mean(),
+            'Fit CPU s Std': values('fit_cpu_s').std(),
+            'CPU / Wall': (values('fit_cpu_s') / values('fit_wall_s')).mean(),
+            'Peak RSS MB': values('peak_rss_mb').mean(),
+            'Fit Memory MB': values('fit_memory_mb').mean(),
+            'Model Size KB': values('size_bytes').mean() / 1024,
+            'Trees': own[-1]['trees'],
+            'Single-row p50 us': np.median(values('latency_p50_us')),
+            'Single-row p95 us': np.median(values('latency_p95_us')),
+            'Single-row p99 us': np.median(values('latency_p99_us')),
+        }
+        for b in batch_sizes:
+            row[f'Rows/s @ {b}'] = float(np.median([run['throughput'][str(b)] for run in own]))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def machine_info():
+    import sklearn
+    import xgboost
+    return {'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'python': platform.python_version(),
+            'numpy': np.__version__, 'scikit-learn': sklearn.__version__,
+            'xgboost': xgboost.__version__}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resource profile of model training and inference')
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_NAMES), default=list(MODEL_NAMES))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    add_params_argument(parser)
+    parser.add_argument('--n-jobs', type=int, help='Override n_jobs of XGBoost and RF')
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--splits', default=SPLITS_PATH)
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("MODEL RESOURCE PROFILE")
+    print(f"Models: {', '.join(MODEL_NAMES[m] for m in args.models)}, {args.repeats} runs each")
+    print("=" * 80)
+
+    params = {family: load_params(family, args.params) for family in args.models}
+    if args.params:
+        print(f"  -> Tuned hyperparameters: {args.params}")
+    if args.n_jobs is not None:
+        for family in args.models:
+            if 'n_jobs' in params[family]:
+                params[family]['n_jobs'] = args.n_jobs
+
+    X_train, y_train, X_val, y_val, X_test, y_test, class_names, split_hash = load_splits(
+        args.data, args.splits)
+    print(f"  -> Training: {len(y_train):,}  Validation: {len(y_val):,}  Test: {len(y_test):,}")
+    arrays = (X_train, y_train, X_val, y_val, X_test, y_test)
+    if 'xgb' in params:
+        params['xgb']['num_class'] = len(class_names)
+
+    tasks = [(family, params[family], repeat, arrays, args.batch_sizes)
+             for repeat in range(args.repeats) for family in args.models]
+    runs = []
+    start = time.perf_counter()
+    context = multiprocessing.get_context('spawn')
+    for task in tasks:
+        run = run_isolated(context, task)
+        runs.append(run)
+        print(f"  {MODEL_NAMES[run['family']]:<20} run {run['repeat'] + 1}: "
+              f"fit {run['fit_wall_s']:7.2f}s wall, {run['fit_cpu_s']:7.2f}s CPU, "
+              f"peak {run['peak_rss_mb']:7.1f} MB (+{run['fit_memory_mb']:.1f})  ({time.perf_counter() - start:.0f}s)")
+
+    table = summarize(runs, args.batch_sizes)
+    os.makedirs(args.output_dir, exist_ok=True)
+    csv_path = os.path.join(args.output_dir, 'model_resource_profile.csv')
+    json_path = os.path.join(args.output_dir, 'model_resource_profile.json')
+    table.to_csv(csv_path, index=False)
+    with open(json_path, 'w') as f:
+        json.dump({'machine': machine_info(), 'split': split_hash, 'params': params,
+                   'batch_sizes': args.batch_sizes, 'runs': runs}, f, indent=2)
+
+    print("\n" + "=" * 80)
+    print("RESULTS")
+    print("=" * 80)
+    print(f"{'Model':<20} {'Acc':>7} {'Fit s':>8} {'CPU s':>8} {'Peak MB':>8} {'Fit MB':>7} {'Size KB':>9} "
+          f"{'p50 us':>8} {'p95 us':>8} {'rows/s @' + str(args.batch_sizes[-1]):>14}")
+    print("-" * 80)
+    for _, row in table.iterrows():
+        print(f"{row['Model']:<20} {row['Test Accuracy']:>7.4f} {row['Fit Wall s']:>8.2f} "
+              f"{row['Fit CPU s']:>8.2f} {row['Peak RSS MB']:>8.1f} {row['Fit Memory MB']:>7.1f} {row['Model Size KB']:>9.1f} "
+              f"{row['Single-row p50 us']:>8.1f} {row['Single-row p95 us']:>8.1f} "
+              f"{row[f'Rows/s @ {args.batch_sizes[-1]}']:>14,.0f}")
+    print("=" * 80)
+    print(f"Saved: {csv_path}")
+    print(f"Saved: {json_path}")
+
+
+if __name__ == '__main__':
+    main()
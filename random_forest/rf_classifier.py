@@ -7,6 +7,12 @@ with a 70/15/15 train/validation/test split and provides detailed evaluation.
 
 All operations use fixed random seeds for reproducibility.
 Uses the SAME data splits as other models (Gradient Boosting, Logistic Regression, LDA) for fair comparison.
+
+With --oob the forest is fitted on train+val (85%) and evaluated on its
+out-of-bag samples instead of a validation set: OOB accuracy, per-class OOB
+metrics and OOB permutation importance (each tree's accuracy on its own OOB
+rows with one question shuffled, averaged over trees). The test set is still
+held out and reported as usual.
 """
 
 import pandas as pd
@@ -23,12 +29,20 @@ from sklearn.metrics import (
     recall_score,
     top_k_accuracy_score
 )
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
+import sys
+import time
 import warnings
 import os
 warnings.filterwarnings('ignore')
 
+# render_figures.py lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_params import add_params_argument, load_params
+from render_figures import render_in_new_process, save_results
+from run_artifacts import (ARTIFACT_DIR, dataset_hash, evaluate, importance_section, load_artifact,
+                           report_from_cache, run_key, save_artifact, split_hash, write_report)
+
 # =============================================================================
 # CONFIGURATION - All random seeds for reproducibility
 # =============================================================================
@@ -39,17 +53,20 @@ np.random.seed(RANDOM_STATE)
 TEST_SIZE = 0.15      # 15% for test
 VAL_SIZE = 0.176      # 15% of remaining 85% ≈ 15% of total
 
-# Random Forest hyperparameters
-RF_PARAMS = {
-    'n_estimators': 100,          # Number of trees in the forest
-    'max_depth': 20,              # Maximum depth of trees
-    'min_samples_split': 5,       # Minimum samples required to split
-    'min_samples_leaf': 2,        # Minimum samples required at leaf node
-    'max_features': 'sqrt',       # Number of features to consider at each split
-    'random_state': RANDOM_STATE,
-    'n_jobs': -1,                 # Use all available cores
-    'verbose': 1                  # Show progress
-}
+# Hyperparameters: the shared defaults (model_params.py), overridden by tuned ones
+# (best_params.json from tune_hyperparameters.py)
+parser = argparse.ArgumentParser(description='Random Forest classifier for 16 personality types')
+add_params_argument(parser)
+parser.add_argument('--oob', action='store_true',
+                    help='Fit on train+val and evaluate on out-of-bag samples instead of the validation set')
+parser.add_argument('--no-figures', action='store_true',
+                    help='Only save the figure data; skip rendering (matplotlib is not imported)')
+parser.add_argument('--no-cache', action='store_true',
+                    help='Retrain even if a run with the same data, split and parameters is saved')
+args = parser.parse_args()
+RF_PARAMS = load_params('rf', args.params, verbose=1)  # verbose=1: show progress
+if args.oob:
+    RF_PARAMS['oob_score'] = True
 
 # =============================================================================
 # STEP 1: LOAD DATA
@@ -58,6 +75,10 @@ print("=" * 80)
 print("RANDOM FOREST CLASSIFIER FOR 16 PERSONALITY TYPES")
 print("=" * 80)
 
+if args.params:
+    print(f"\nUsing tuned hyperparameters from: {args.params}")
+
+START_TIME = time.perf_counter()
 print("\n[STEP 1] Loading data...")
 df = pd.read_csv('16P_eda_cleaned.csv')
 print(f"  -> Loaded {len(df):,} rows and {len(df.columns)} columns")
@@ -113,6 +134,22 @@ for i, name in enumerate(class_names[:4]):  # Show first 4 as sample
     print(f"    {name}: Train={train_count}, Val={val_count}, Test={test_count}")
 print("    ...")
 
+# OOB mode: the out-of-bag samples take the place of the validation set
+if args.oob:
+    X_fit, y_fit = X_temp, y_temp
+    print(f"\n  OOB mode: fitting on train+val ({len(X_fit):,} samples), validation by out-of-bag samples")
+else:
+    X_fit, y_fit = X_train, y_train
+
+# Unchanged data, split and hyperparameters: reuse the saved run instead of retraining
+DATASET_HASH = dataset_hash(df)
+SPLIT_HASH = split_hash(X_train.index, X_val.index, X_test.index)
+RUN_KEY = run_key('rf', RF_PARAMS, DATASET_HASH, SPLIT_HASH)
+cached_run = None if args.no_cache else load_artifact(ARTIFACT_DIR, 'rf', RUN_KEY)
+if cached_run is not None:
+    report_from_cache(cached_run, 'rf', figures=not args.no_figures)
+    sys.exit(0)
+
 # =============================================================================
 # STEP 4: TRAIN RANDOM FOREST MODEL
 # =============================================================================
@@ -124,7 +161,9 @@ print(f"  -> min_samples_split: {RF_PARAMS['min_samples_split']}")
 
 model = RandomForestClassifier(**RF_PARAMS)
 
-model.fit(X_train, y_train)
+fit_start = time.perf_counter()
+model.fit(X_fit, y_fit)
+fit_seconds = time.perf_counter() - fit_start
 
 print(f"\n  -> Training complete!")
 print(f"  -> Number of trees: {len(model.estimators_)}")
@@ -134,12 +173,21 @@ print(f"  -> Number of trees: {len(model.estimators_)}")
 # =============================================================================
 print("\n[STEP 5] Making predictions...")
 
-y_train_pred = model.predict(X_train)
-y_val_pred = model.predict(X_val)
+predict_start = time.perf_counter()
+y_train_pred = model.predict(X_fit)
 y_test_pred = model.predict(X_test)
+if args.oob:
+    # OOB votes of every fitted sample (rows never out of bag have no votes)
+    oob_proba = model.oob_decision_function_
+    oob_rows = ~np.isnan(oob_proba).any(axis=1)
+    y_oob = y_fit[oob_rows]
+    y_oob_pred = oob_proba[oob_rows].argmax(axis=1)
+else:
+    y_val_pred = model.predict(X_val)
 
 # Probability predictions for top-k accuracy
 y_test_proba = model.predict_proba(X_test)
+predict_seconds = time.perf_counter() - predict_start
 
 # =============================================================================
 # STEP 6: DETAILED EVALUATION
@@ -151,12 +199,16 @@ print("=" * 80)
 # 6.1 Overall Accuracy
 print("\n[6.1] ACCURACY SCORES")
 print("-" * 40)
-train_acc = accuracy_score(y_train, y_train_pred)
-val_acc = accuracy_score(y_val, y_val_pred)
+train_acc = accuracy_score(y_fit, y_train_pred)
 test_acc = accuracy_score(y_test, y_test_pred)
 
 print(f"  Training Accuracy:   {train_acc:.4f} ({train_acc*100:.2f}%)")
-print(f"  Validation Accuracy: {val_acc:.4f} ({val_acc*100:.2f}%)")
+if args.oob:
+    oob_acc = accuracy_score(y_oob, y_oob_pred)
+    print(f"  OOB Accuracy:        {oob_acc:.4f} ({oob_acc*100:.2f}%)")
+else:
+    val_acc = accuracy_score(y_val, y_val_pred)
+    print(f"  Validation Accuracy: {val_acc:.4f} ({val_acc*100:.2f}%)")
 print(f"  Test Accuracy:       {test_acc:.4f} ({test_acc*100:.2f}%)")
 
 # Check for overfitting
@@ -206,115 +258,111 @@ for i, row in importance_df.head(15).iterrows():
     feature_short = row['Feature'][:55] + "..." if len(row['Feature']) > 55 else row['Feature']
     print(f"  {importance_df.head(15).index.get_loc(i)+1:2}. [{row['Importance']:.4f}] {feature_short}")
 
+if args.oob:
+    # 6.7 Per-Class OOB Metrics
+    print("\n[6.7] PER-CLASS OUT-OF-BAG REPORT (train+val)")
+    print("-" * 80)
+    oob_report = classification_report(y_oob, y_oob_pred, labels=range(len(class_names)),
+                                       target_names=class_names, digits=4)
+    print(oob_report)
+
+    # 6.8 OOB Permutation Importance
+    print("\n[6.8] TOP 15 FEATURES BY OOB PERMUTATION IMPORTANCE")
+    print("-" * 60)
+    X_fit_array = np.asarray(X_fit, dtype=np.float32)
+    drops = np.zeros((len(model.estimators_), len(feature_columns)))
+    for t, (tree, in_bag) in enumerate(zip(model.estimators_, model.estimators_samples_)):
+        oob = np.ones(len(X_fit_array), dtype=bool)
+        oob[in_bag] = False
+        X_oob, y_tree = X_fit_array[oob], y_fit[oob]
+        base = np.mean(tree.predict_proba(X_oob).argmax(axis=1) == y_tree)
+        for j in range(len(feature_columns)):
+            rng = np.random.default_rng([RANDOM_STATE, t, j])
+            X_perm = X_oob.copy()
+            X_perm[:, j] = rng.permutation(X_perm[:, j])
+            drops[t, j] = base - np.mean(tree.predict_proba(X_perm).argmax(axis=1) == y_tree)
+
+    oob_importance_df = pd.DataFrame({
+        'Feature': feature_columns,
+        'OOB Permutation Importance': drops.mean(axis=0),
+        'Std Error': drops.std(axis=0) / np.sqrt(len(drops)),
+        'Impurity Importance': model.feature_importances_
+    }).sort_values('OOB Permutation Importance', ascending=False)
+
+    for rank, (_, row) in enumerate(oob_importance_df.head(15).iterrows(), 1):
+        feature_short = row['Feature'][:55] + "..." if len(row['Feature']) > 55 else row['Feature']
+        print(f"  {rank:2}. [{row['OOB Permutation Importance']:.4f} ± {row['Std Error']:.4f}] {feature_short}")
+
 # =============================================================================
 # STEP 7: SAVE VISUALIZATIONS
 # =============================================================================
 print("\n[STEP 7] Saving visualizations...")
 
-# Create output directory for figures
-os.makedirs('figures', exist_ok=True)
-
-# 7.1 Confusion Matrix Heatmap
-plt.figure(figsize=(14, 12))
-sns.heatmap(cm, annot=True, fmt='d', cmap='Greens',
-            xticklabels=class_names, yticklabels=class_names)
-plt.title('Confusion Matrix - Random Forest (16 Personality Types)', fontsize=14)
-plt.xlabel('Predicted', fontsize=12)
-plt.ylabel('Actual', fontsize=12)
-plt.tight_layout()
-plt.savefig('figures/rf_confusion_matrix.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/rf_confusion_matrix.png")
-
-# 7.2 Feature Importance Plot
-plt.figure(figsize=(12, 10))
-top_20 = importance_df.head(20)
-short_names = [f[:40] + "..." if len(f) > 40 else f for f in top_20['Feature']]
-plt.barh(range(len(top_20)), top_20['Importance'].values, color='forestgreen')
-plt.yticks(range(len(top_20)), short_names)
-plt.xlabel('Feature Importance', fontsize=12)
-plt.title('Top 20 Most Important Features - Random Forest', fontsize=14)
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.savefig('figures/rf_feature_importance.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/rf_feature_importance.png")
-
-# 7.3 Per-Class Accuracy Bar Chart
-per_class_accuracy = cm.diagonal() / cm.sum(axis=1)
-plt.figure(figsize=(12, 6))
-colors = plt.cm.Greens(np.linspace(0.4, 0.9, len(class_names)))
-bars = plt.bar(class_names, per_class_accuracy, color=colors)
-plt.axhline(y=test_acc, color='red', linestyle='--', label=f'Overall Accuracy: {test_acc:.2%}')
-plt.xlabel('Personality Type', fontsize=12)
-plt.ylabel('Accuracy', fontsize=12)
-plt.title('Per-Class Accuracy - Random Forest', fontsize=14)
-plt.xticks(rotation=45)
-plt.legend()
-plt.ylim(0, 1)
-for bar, acc in zip(bars, per_class_accuracy):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01, 
-             f'{acc:.1%}', ha='center', va='bottom', fontsize=8)
-plt.tight_layout()
-plt.savefig('figures/rf_per_class_accuracy.png', dpi=150)
-plt.close()
-print("  -> Saved: figures/rf_per_class_accuracy.png")
+# The figures are drawn by render_figures.py (headless, in parallel) from this
+# results file, which can also be re-rendered later without retraining
+FIGURE_DATA_PATH = 'figures/rf_figure_data.npz'
+save_results(FIGURE_DATA_PATH, 'classifier', prefix='rf', class_names=list(class_names), cm=cm,
+             top_features=list(importance_df['Feature'].head(20)),
+             top_importance=importance_df['Importance'].head(20).to_numpy(), test_acc=test_acc)
+print(f"  -> Saved: {FIGURE_DATA_PATH}")
+if args.no_figures:
+    print(f"  -> Figures skipped; render them with: python ../render_figures.py {FIGURE_DATA_PATH}")
+elif not render_in_new_process([FIGURE_DATA_PATH]):
+    print(f"  [!] Rendering failed; retry with: python ../render_figures.py {FIGURE_DATA_PATH}")
 
 # =============================================================================
 # STEP 8: SAVE DETAILED RESULTS TO FILE
 # =============================================================================
 print("\n[STEP 8] Saving detailed results to file...")
 
-with open('rf_evaluation_report.txt', 'w') as f:
-    f.write("=" * 80 + "\n")
-    f.write("RANDOM FOREST EVALUATION REPORT\n")
-    f.write("16 Personality Types (MBTI) Classification\n")
-    f.write("=" * 80 + "\n\n")
-    
-    f.write("CONFIGURATION\n")
-    f.write("-" * 40 + "\n")
-    f.write(f"Random State: {RANDOM_STATE}\n")
-    f.write(f"Data Split: 70% Train / 15% Validation / 15% Test\n")
-    f.write(f"Total Samples: {len(df):,}\n")
-    f.write(f"Training Samples: {len(X_train):,}\n")
-    f.write(f"Validation Samples: {len(X_val):,}\n")
-    f.write(f"Test Samples: {len(X_test):,}\n\n")
-    
-    f.write("RANDOM FOREST HYPERPARAMETERS\n")
-    f.write("-" * 40 + "\n")
-    for key, value in RF_PARAMS.items():
-        if key != 'verbose':  # Skip verbose in report
-            f.write(f"{key}: {value}\n")
-    f.write(f"n_trees (actual): {len(model.estimators_)}\n\n")
-    
-    f.write("ACCURACY SCORES\n")
-    f.write("-" * 40 + "\n")
-    f.write(f"Training Accuracy:   {train_acc:.4f} ({train_acc*100:.2f}%)\n")
-    f.write(f"Validation Accuracy: {val_acc:.4f} ({val_acc*100:.2f}%)\n")
-    f.write(f"Test Accuracy:       {test_acc:.4f} ({test_acc*100:.2f}%)\n\n")
-    
-    f.write("TOP-K ACCURACY (Test Set)\n")
-    f.write("-" * 40 + "\n")
-    for k in [1, 2, 3, 5]:
-        top_k_acc = top_k_accuracy_score(y_test, y_test_proba, k=k)
-        f.write(f"Top-{k} Accuracy: {top_k_acc:.4f} ({top_k_acc*100:.2f}%)\n")
-    f.write("\n")
-    
-    f.write("CLASSIFICATION REPORT (Test Set)\n")
-    f.write("-" * 80 + "\n")
-    f.write(classification_report(y_test, y_test_pred, target_names=class_names, digits=4))
-    f.write("\n")
-    
-    f.write("TOP 20 IMPORTANT FEATURES (by Random Forest importance)\n")
-    f.write("-" * 80 + "\n")
-    for i, (_, row) in enumerate(importance_df.head(20).iterrows()):
-        f.write(f"{i+1:2}. [{row['Importance']:.4f}] {row['Feature']}\n")
+# Everything the report shows goes into the run artifact; the report is written from it
+artifact = {
+    'model': 'rf',
+    'key': RUN_KEY,
+    'dataset_hash': DATASET_HASH,
+    'split_hash': SPLIT_HASH,
+    'report': {
+        'title': "RANDOM FOREST EVALUATION REPORT",
+        'model_name': "Random Forest Classifier",
+        'params_title': "RANDOM FOREST HYPERPARAMETERS"
+    },
+    'config': {
+        'Random State': RANDOM_STATE,
+        'Data Split': ("85% Train+Validation (OOB evaluation) / 15% Test" if args.oob
+                       else "70% Train / 15% Validation / 15% Test"),
+        'Total Samples': len(df),
+        'Training Samples': len(X_fit),
+        **({'OOB-Evaluated Samples': len(y_oob)} if args.oob else {'Validation Samples': len(X_val)}),
+        'Test Samples': len(X_test)
+    },
+    'params': {key: value for key, value in RF_PARAMS.items() if key != 'verbose'},
+    'model_info': {'n_trees (actual)': len(model.estimators_)},
+    'metrics': evaluate(class_names, y_test, y_test_pred, y_test_proba, train=(y_fit, y_train_pred),
+                        **({'oob': (y_oob, y_oob_pred)} if args.oob else {'validation': (y_val, y_val_pred)})),
+    'feature_importance': importance_section(importance_df, "TOP 20 IMPORTANT FEATURES (by Random Forest importance)"),
+    'timings': {'fit_s': fit_seconds, 'predict_s': predict_seconds,
+                'total_s': time.perf_counter() - START_TIME}
+}
+if args.oob:
+    artifact['oob'] = {
+        'classification_report': classification_report(
+            y_oob, y_oob_pred, labels=range(len(class_names)), target_names=class_names,
+            digits=4, output_dict=True),
+        'permutation_importance': importance_section(
+            oob_importance_df, "TOP 20 FEATURES BY OOB PERMUTATION IMPORTANCE (mean accuracy drop per tree)",
+            columns=('Feature', 'OOB Permutation Importance', 'Std Error'))
+    }
+artifact = save_artifact(ARTIFACT_DIR, artifact)
+write_report(artifact, 'rf_evaluation_report.txt')
 
 print("  -> Saved: rf_evaluation_report.txt")
 
 # Save feature importance to CSV
 importance_df.to_csv('rf_feature_importance.csv', index=False)
 print("  -> Saved: rf_feature_importance.csv")
+if args.oob:
+    oob_importance_df.to_csv('rf_oob_permutation_importance.csv', index=False)
+    print("  -> Saved: rf_oob_permutation_importance.csv")
 
 # =============================================================================
 # SUMMARY
@@ -322,13 +370,17 @@ print("  -> Saved: rf_feature_importance.csv")
 print("\n" + "=" * 80)
 print("SUMMARY")
 print("=" * 80)
+split_summary = ("85% Train+Validation (OOB evaluation) / 15% Test" if args.oob
+                 else "70% Train / 15% Validation / 15% Test")
+oob_summary = f"  • OOB Accuracy: {oob_acc:.2%}\n" if args.oob else ""
+oob_files = "  • rf_oob_permutation_importance.csv\n" if args.oob else ""
 print(f"""
 Model: Random Forest Classifier
 Dataset: 16P_eda_cleaned.csv ({len(df):,} samples)
-Split: 70% Train / 15% Validation / 15% Test
+Split: {split_summary}
 
 RESULTS:
-  • Test Accuracy: {test_acc:.2%}
+{oob_summary}  • Test Accuracy: {test_acc:.2%}
   • Top-3 Accuracy: {top_k_accuracy_score(y_test, y_test_proba, k=3):.2%}
   • Macro F1-Score: {f1_score(y_test, y_test_pred, average='macro'):.4f}
   • Number of Trees: {len(model.estimators_)}
@@ -337,9 +389,10 @@ OUTPUT FILES:
   • figures/rf_confusion_matrix.png
   • figures/rf_feature_importance.png
   • figures/rf_per_class_accuracy.png
+  • figures/rf_figure_data.npz (figure data, render_figures.py)
   • rf_evaluation_report.txt
   • rf_feature_importance.csv
-
+{oob_files}
 Reproducibility: All operations used random_state={RANDOM_STATE}
 NOTE: Uses SAME data splits as Gradient Boosting, Logistic Regression, and LDA for fair comparison
 """)
@@ -0,0 +1,351 @@
+"""
+Headless Figure Rendering from Saved Results
+============================================
+
+The four classifier scripts, data_gathering_eda.py and eda_streaming.py do
+not draw their figures themselves. They save what the figures show
+(confusion matrix, top features, validation curve, EDA counts and matrices)
+to a small .npz results file, then hand it to this script in a separate
+process. With --no-figures that step is skipped, and the training run never
+imports matplotlib or seaborn.
+
+Every figure is one task in a process pool and is drawn with the
+non-interactive Agg backend, so no display is needed and the figures of
+one or several results files render in parallel. Figures can be redrawn
+at any time from the results files, without retraining.
+
+Usage:
+    python render_figures.py random_forest/figures/rf_figure_data.npz [more.npz ...] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DPI = 150
+EDA_STYLE = 'seaborn-v0_8-whitegrid'
+
+# Model name and colors of each classifier's figures
+CLASSIFIER_STYLES = {
+    'rf': {
+        'name': 'Random Forest',
+        'cmap': 'Greens',
+        'bar_color': 'forestgreen',
+        'importance_label': 'Feature Importance',
+        'class_colors': ('Greens', 0.4, 0.9)
+    },
+    'xgb': {
+        'name': 'Gradient Boosting',
+        'cmap': 'Blues',
+        'bar_color': 'steelblue',
+        'importance_label': 'Importance Score',
+        'class_colors': ('viridis', 0.3, 0.9)
+    },
+    'lr': {
+        'name': 'Logistic Regression',
+        'cmap': 'Greens',
+        'bar_color': 'forestgreen',
+        'importance_label': 'Mean Absolute Coefficient',
+        'class_colors': ('Greens', 0.4, 0.9)
+    },
+    'lda': {
+        'name': 'LDA',
+        'cmap': 'Purples',
+        'bar_color': 'mediumpurple',
+        'importance_label': 'Mean Absolute Coefficient',
+        'class_colors': ('Purples', 0.4, 0.9)
+    }
+}
+
+EDA_FIGURES = ['01_personality_distribution', '02_mbti_dimensions', '03_response_distribution',
+               '04_correlation_heatmap', '05_boxplots']
+# eda_streaming.py: all questions, from the merged statistics
+STREAMING_FIGURES = ['06_response_distribution_all', '07_correlation_heatmap_full']
+
+
+# =============================================================================
+# Results files (no plotting libraries needed)
+# =============================================================================
+
+def _json_default(value):
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def save_results(path, kind, **values):
+    """Write a results file; lists and dicts are stored as JSON strings"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    encoded = {key: json.dumps(value, default=_json_default) for key, value in values.items()
+               if isinstance(value, (list, tuple, dict))}
+    arrays = {key: np.asarray(value) for key, value in values.items() if key not in encoded}
+    np.savez_compressed(path, kind=kind, json_keys=json.dumps(sorted(encoded)), **encoded, **arrays)
+
+
+def load_results(path):
+    with np.load(path) as data:
+        json_keys = json.loads(str(data['json_keys']))
+        return {key: json.loads(str(data[key])) if key in json_keys else data[key]
+                for key in data.files if key != 'json_keys'}
+
+
+def short_name(text, length):
+    return text[:length] + "..." if len(text) > length else text
+
+
+def figure_jobs(results_path, output_dir=None):
+    """(figure, results path, output path) for every figure of a results file"""
+    results = load_results(results_path)
+    output_dir = output_dir or os.path.dirname(results_path) or '.'
+    kind = str(results['kind'])
+    if kind == 'classifier':
+        prefix = str(results['prefix'])
+        figures = ['confusion_matrix', 'feature_importance', 'per_class_accuracy']
+        if 'val_loss' in results:
+            figures.append('validation_curve')
+        return [(figure, results_path, os.path.join(output_dir, f"{prefix}_{figure}.png"))
+                for figure in figures]
+    if kind in ('eda', 'eda_streaming'):
+        figures = EDA_FIGURES if kind == 'eda' else STREAMING_FIGURES
+        return [(figure, results_path, os.path.join(output_dir, f"{figure}.png"))
+                for figure in figures]
+    raise ValueError(f"Unknown results kind in {results_path}: {kind}")
+
+
+# =============================================================================
+# Classifier figures
+# =============================================================================
+
+def confusion_matrix_figure(plt, sns, results, style):
+    plt.figure(figsize=(14, 12))
+    sns.heatmap(results['cm'], annot=True, fmt='d', cmap=style['cmap'],
+                xticklabels=results['class_names'], yticklabels=results['class_names'])
+    plt.title(f"Confusion Matrix - {style['name']} (16 Personality Types)", fontsize=14)
+    plt.xlabel('Predicted', fontsize=12)
+    plt.ylabel('Actual', fontsize=12)
+
+
+def feature_importance_figure(plt, sns, results, style):
+    features, importance = results['top_features'], results['top_importance']
+    plt.figure(figsize=(12, 10))
+    plt.barh(range(len(features)), importance, color=style['bar_color'])
+    plt.yticks(range(len(features)), [short_name(f, 40) for f in features])
+    plt.xlabel(style['importance_label'], fontsize=12)
+    plt.title(f"Top {len(features)} Most Important Features - {style['name']}", fontsize=14)
+    plt.gca().invert_yaxis()
+
+
+def per_class_accuracy_figure(plt, sns, results, style):
+    cm, class_names = results['cm'], results['class_names']
+    test_acc = float(results['test_acc'])
+    per_class_accuracy = cm.diagonal() / cm.sum(axis=1)
+    colormap, low, high = style['class_colors']
+    plt.figure(figsize=(12, 6))
+    colors = plt.get_cmap(colormap)(np.linspace(low, high, len(class_names)))
+    bars = plt.bar(class_names, per_class_accuracy, color=colors)
+    plt.axhline(y=test_acc, color='red', linestyle='--', label=f'Overall Accuracy: {test_acc:.2%}')
+    plt.xlabel('Personality Type', fontsize=12)
+    plt.ylabel('Accuracy', fontsize=12)
+    plt.title(f"Per-Class Accuracy - {style['name']}", fontsize=14)
+    plt.xticks(rotation=45)
+    plt.legend()
+    plt.ylim(0, 1)
+    for bar, acc in zip(bars, per_class_accuracy):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01,
+                 f'{acc:.1%}', ha='center', va='bottom', fontsize=8)
+
+
+def validation_curve_figure(plt, sns, results, style):
+    val_loss, best_iteration = results['val_loss'], int(results['best_iteration'])
+    plt.figure(figsize=(10, 6))
+    plt.plot(np.arange(1, len(val_loss) + 1), val_loss, color=style['bar_color'])
+    plt.axvline(x=best_iteration + 1, color='red', linestyle='--',
+                label=f'Best iteration: {best_iteration} (logloss {val_loss[best_iteration]:.4f})')
+    plt.xlabel('Boosting Round', fontsize=12)
+    plt.ylabel('Validation Log Loss', fontsize=12)
+    plt.title(f"Validation Loss per Round - {style['name']}", fontsize=14)
+    plt.legend()
+
+
+# =============================================================================
+# EDA figures
+# =============================================================================
+
+def personality_distribution_figure(plt, sns, results):
+    labels, counts = results['type_labels'], results['type_counts']
+    fig, ax = plt.subplots(figsize=(12, 6))
+    bars = ax.bar(labels, counts, color=sns.color_palette("husl", 16))
+    ax.set_xlabel('Personality Type', fontsize=12)
+    ax.set_ylabel('Count', fontsize=12)
+    ax.set_title('Distribution of 16 Personality Types', fontsize=14, fontweight='bold')
+    ax.tick_params(axis='x', rotation=45)
+    for bar, count in zip(bars, counts):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 50,
+                f'{count:,}', ha='center', va='bottom', fontsize=9)
+
+
+def mbti_dimensions_figure(plt, sns, results):
+    counts = results['dimension_counts']
+    dimensions = [
+        (['Extrovert (E)', 'Introvert (I)'], [counts['E'], counts['I']], 'Energy: E vs I'),
+        (['Sensing (S)', 'Intuition (N)'], [counts['S'], counts['N']], 'Information: S vs N'),
+        (['Thinking (T)', 'Feeling (F)'], [counts['T'], counts['F']], 'Decisions: T vs F'),
+        (['Judging (J)', 'Perceiving (P)'], [counts['J'], counts['P']], 'Lifestyle: J vs P')
+    ]
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    for ax, (labels, sizes, title) in zip(axes.flat, dimensions):
+        ax.pie(sizes, labels=labels, autopct='%1.1f%%', colors=['#FF6B6B', '#4ECDC4'], startangle=90)
+        ax.set_title(title, fontsize=12, fontweight='bold')
+    plt.suptitle('MBTI Dimensions Distribution', fontsize=14, fontweight='bold', y=1.02)
+
+
+def response_distribution_figure(plt, sns, results):
+    features = results['distribution_features']
+    fig, ax = plt.subplots(figsize=(14, 8))
+    sns.heatmap(results['distribution_pct'], annot=True, fmt='.1f', cmap='YlOrRd',
+                xticklabels=results['response_values'],
+                yticklabels=[short_name(f, 30) for f in features], ax=ax)
+    ax.set_xlabel('Response Value', fontsize=12)
+    ax.set_ylabel('Survey Question', fontsize=12)
+    ax.set_title(f'Response Distribution Across Questions (%)\n(Showing first {len(features)} questions)',
+                 fontsize=14, fontweight='bold')
+
+
+def correlation_heatmap_figure(plt, sns, results):
+    corr_matrix = results['correlation']
+    names = [short_name(f, 25) for f in results['correlation_features']]
+    fig, ax = plt.subplots(figsize=(14, 12))
+    sns.heatmap(corr_matrix, mask=np.triu(np.ones_like(corr_matrix, dtype=bool)), annot=True,
+                fmt='.2f', cmap='RdBu_r', center=0, square=True, linewidths=0.5,
+                xticklabels=names, yticklabels=names, ax=ax)
+    ax.set_title('Feature Correlation Heatmap\n(Sampled Questions)', fontsize=14, fontweight='bold')
+
+
+def boxplots_figure(plt, sns, results):
+    import pandas as pd
+    features = results['box_features']
+    values = results['box_values']
+    df_melt = pd.DataFrame({
+        'Question': np.repeat([short_name(f, 20) for f in features], len(values)),
+        'Response': values.T.ravel()
+    })
+    fig, ax = plt.subplots(figsize=(16, 6))
+    sns.boxplot(data=df_melt, x='Question', y='Response', hue='Question', legend=False,
+                ax=ax, palette='Set3')
+    ax.tick_params(axis='x', rotation=90, labelsize=8)
+    ax.set_xlabel('Survey Question', fontsize=12)
+    ax.set_ylabel('Response Value', fontsize=12)
+    ax.set_title(f'Response Distribution Across Questions (Box Plots)\n(Showing first {len(features)} questions)',
+                 fontsize=14, fontweight='bold')
+    ax.axhline(y=0, color='red', linestyle='--', alpha=0.5)
+
+
+def response_distribution_all_figure(plt, sns, results):
+    columns = results['columns']
+    fig, ax = plt.subplots(figsize=(12, 20))
+    sns.heatmap(results['level_shares'], annot=True, fmt='.0f', cmap='YlOrRd', annot_kws={'fontsize': 7},
+                xticklabels=results['response_values'], yticklabels=[short_name(c, 40) for c in columns],
+                ax=ax)
+    ax.set_xlabel('Response Value', fontsize=12)
+    ax.set_ylabel('Survey Question', fontsize=12)
+    ax.set_title(f'Response Distribution Across All {len(columns)} Questions (%)\n'
+                 f"({int(results['rows']):,} responses)", fontsize=14, fontweight='bold')
+    ax.tick_params(axis='y', labelsize=7)
+
+
+def correlation_heatmap_full_figure(plt, sns, results):
+    corr = results['correlation']
+    names = [short_name(c, 25) for c in results['columns']]
+    fig, ax = plt.subplots(figsize=(20, 18))
+    sns.heatmap(corr, mask=np.triu(np.ones_like(corr, dtype=bool)), cmap='RdBu_r', center=0,
+                vmin=-1, vmax=1, square=True, linewidths=0.2, xticklabels=names, yticklabels=names, ax=ax)
+    ax.tick_params(labelsize=6)
+    ax.set_title(f'Feature Correlation Heatmap (All Questions)\n'
+                 f"({int(results['complete_rows']):,} complete responses)", fontsize=14, fontweight='bold')
+
+
+CLASSIFIER_FIGURES = {
+    'confusion_matrix': confusion_matrix_figure,
+    'feature_importance': feature_importance_figure,
+    'per_class_accuracy': per_class_accuracy_figure,
+    'validation_curve': validation_curve_figure
+}
+EDA_FIGURE_FUNCTIONS = dict(zip(EDA_FIGURES, [
+    personality_distribution_figure, mbti_dimensions_figure, response_distribution_figure,
+    correlation_heatmap_figure, boxplots_figure
+]))
+EDA_FIGURE_FUNCTIONS.update(zip(STREAMING_FIGURES, [
+    response_distribution_all_figure, correlation_heatmap_full_figure
+]))
+
+
+# =============================================================================
+# Rendering
+# =============================================================================
+
+def render_job(job):
+    """Draw one figure and save it; runs in a pool worker"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    figure, results_path, output_path = job
+    results = load_results(results_path)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    if str(results['kind']) == 'eda':
+        with plt.style.context(EDA_STYLE), sns.color_palette("husl"):
+            EDA_FIGURE_FUNCTIONS[figure](plt, sns, results)
+            plt.tight_layout()
+            plt.savefig(output_path, dpi=DPI, bbox_inches='tight')
+    elif str(results['kind']) == 'eda_streaming':
+        # Full-size heatmaps: the default style, without grid lines over the cells
+        EDA_FIGURE_FUNCTIONS[figure](plt, sns, results)
+        plt.tight_layout()
+        plt.savefig(output_path, dpi=DPI, bbox_inches='tight')
+    else:
+        CLASSIFIER_FIGURES[figure](plt, sns, results, CLASSIFIER_STYLES[str(results['prefix'])])
+        plt.tight_layout()
+        plt.savefig(output_path, dpi=DPI)
+    plt.close('all')
+    return output_path
+
+
+def render(results_paths, output_dir=None, workers=None):
+    """Render every figure of the results files in a process pool; returns the paths"""
+    jobs = [job for path in results_paths for job in figure_jobs(path, output_dir)]
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_job, jobs))
+
+
+def render_in_new_process(results_paths, workers=None):
+    """Run this script on the results files and wait for it
+
+    Used by the training scripts: the pool is started from this script's
+    __main__, so its workers never re-import (and re-run) the caller.
+    """
+    command = [sys.executable, os.path.abspath(__file__), *results_paths]
+    if workers:
+        command += ['--workers', str(workers)]
+    return subprocess.run(command).returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render figures from saved results files (headless)')
+    parser.add_argument('results', nargs='+', help='Results files (.npz) written by the scripts')
+    parser.add_argument('--output-dir', help='Where the figures go (default: next to each results file)')
+    parser.add_argument('--workers', type=int, help='Rendering processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    for path in render(args.results, args.output_dir, args.workers):
+        print(f"  -> Saved: {path}")
+
+
+if __name__ == '__main__':
+    main()
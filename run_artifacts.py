@@ -0,0 +1,372 @@
+"""
+Machine-Readable Run Artifacts with Run Caching
+===============================================
+
+Each technique script (random_forest, gradient_boosting, logistic_regression,
+lda) saves one JSON artifact per run to runs/<model>_<key>.json:
+
+- config: random state, split and sample counts
+- dataset hash (cell values and column names) and split hash (row indices
+  of the train / validation / test sets)
+- hyperparameters and fitted-model details (trees, best iteration, ...)
+- metrics: accuracies, top-k accuracy, macro / weighted scores, the
+  per-class classification report and the confusion matrix
+- feature importance and timings (fit, evaluation, whole run)
+
+The key is a content hash of (model, dataset, split, hyperparameters). The
+*_evaluation_report.txt files are written from the artifact. When a script
+runs again with unchanged inputs it finds the artifact, skips training, and
+regenerates its report, importance CSV, figure data and figures from it
+(--no-cache retrains).
+
+Run from the repository root, this script collects artifacts into one
+comparison table (Parquet when pyarrow or fastparquet is installed, else CSV):
+
+Usage:
+    python run_artifacts.py */runs/*.json [--output All_Techniques/run_comparison.parquet]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from render_figures import render_in_new_process, save_results
+from sklearn.metrics import (
+    accuracy_score,
+    classification_report,
+    confusion_matrix,
+    f1_score,
+    precision_score,
+    recall_score,
+    top_k_accuracy_score
+)
+
+ARTIFACT_DIR = 'runs'
+# Bump when the artifact layout changes; older artifacts are then ignored
+ARTIFACT_VERSION = 2
+TOP_K = [1, 2, 3, 5]
+# Parameters that do not change the fitted model
+IGNORED_PARAMS = ('n_jobs', 'verbose', 'verbosity')
+
+
+# =============================================================================
+# Hashes and keys
+# =============================================================================
+
+def dataset_hash(df):
+    """Hash of a DataFrame's cell values and column names"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def split_hash(*indices):
+    """Hash of the row indices of each split (train, validation, test)"""
+    digest = hashlib.sha256()
+    for index in indices:
+        digest.update(np.asarray(index, dtype=np.int64).tobytes())
+        digest.update(b'|')
+    return digest.hexdigest()[:16]
+
+
+def run_key(model, params, data_hash, splits_hash):
+    """Content hash of (model, dataset, split, hyperparameters)"""
+    keep = {k: v for k, v in params.items() if k not in IGNORED_PARAMS}
+    payload = json.dumps([ARTIFACT_VERSION, model, data_hash, splits_hash, keep],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def artifact_path(directory, model, key):
+    return os.path.join(directory, f"{model}_{key}.json")
+
+
+# =============================================================================
+# Building, saving and loading
+# =============================================================================
+
+def evaluate(class_names, y_test, y_test_pred, y_test_proba, **accuracy_sets):
+    """Metrics section of an artifact
+
+    accuracy_sets: name -> (y_true, y_pred), e.g. train=(y_train, y_train_pred);
+    each becomes '<name>_accuracy'.
+    """
+    labels = np.arange(len(class_names))
+    metrics = {f"{name}_accuracy": float(accuracy_score(y_true, y_pred))
+               for name, (y_true, y_pred) in accuracy_sets.items()}
+    metrics['test_accuracy'] = float(accuracy_score(y_test, y_test_pred))
+    metrics['class_names'] = [str(name) for name in class_names]
+    metrics['top_k_accuracy'] = {
+        str(k): float(top_k_accuracy_score(y_test, y_test_proba, k=k, labels=labels))
+        for k in TOP_K if k <= len(class_names)
+    }
+    metrics['macro_precision'] = float(precision_score(y_test, y_test_pred, average='macro'))
+    metrics['macro_recall'] = float(recall_score(y_test, y_test_pred, average='macro'))
+    metrics['macro_f1'] = float(f1_score(y_test, y_test_pred, average='macro'))
+    metrics['weighted_f1'] = float(f1_score(y_test, y_test_pred, average='weighted'))
+    metrics['classification_report'] = classification_report(
+        y_test, y_test_pred, labels=labels, target_names=list(class_names), digits=4, output_dict=True)
+    metrics['confusion_matrix'] = confusion_matrix(y_test, y_test_pred, labels=labels).tolist()
+    return metrics
+
+
+def importance_section(importance_df, title, columns=('Feature', 'Importance')):
+    """Feature importance table (already sorted) for an artifact"""
+    return {'title': title, 'columns': list(importance_df.columns),
+            'rows': importance_df[list(importance_df.columns)].values.tolist(),
+            'report_columns': list(columns)}
+
+
+def save_artifact(directory, artifact):
+    """Write an artifact; returns it as read back (plain JSON types)"""
+    os.makedirs(directory, exist_ok=True)
+    artifact = {'version': ARTIFACT_VERSION,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'), **artifact}
+    text = json.dumps(artifact, indent=2, default=_json_default)
+    path = artifact_path(directory, artifact['model'], artifact['key'])
+    with open(path + '.tmp', 'w') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+    print(f"  -> Saved: {path}")
+    return json.loads(text)
+
+
+def load_artifact(directory, model, key):
+    """The artifact of an earlier run with the same key, or None"""
+    path = artifact_path(directory, model, key)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        artifact = json.load(f)
+    if artifact.get('version') != ARTIFACT_VERSION or artifact.get('key') != key:
+        return None
+    return artifact
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+# =============================================================================
+# Text report
+# =============================================================================
+
+def format_classification_report(report, digits=4):
+    """classification_report(..., output_dict=True) back in sklearn's text layout"""
+    averages = ('accuracy', 'macro avg', 'weighted avg', 'micro avg', 'samples avg')
+    classes = [name for name in report if name not in averages]
+    width = max(len(name) for name in classes + ['weighted avg'])
+    headers = ['precision', 'recall', 'f1-score', 'support']
+    text = ("{:>{width}s} " + " {:>9}" * len(headers)).format('', *headers, width=width) + "\n\n"
+    row_format = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+    for name in classes:
+        row = report[name]
+        text += row_format.format(name, row['precision'], row['recall'], row['f1-score'],
+                                  int(row['support']), width=width, digits=digits)
+    text += "\n"
+    total = int(report['weighted avg']['support'])
+    for name in averages:
+        if name not in report:
+            continue
+        if name == 'accuracy':
+            text += ("{:>{width}s} " + " {:>9}" * 2 + " {:>9.{digits}f} {:>9}\n").format(
+                name, '', '', report[name], total, width=width, digits=digits)
+        else:
+            row = report[name]
+            text += row_format.format(name, row['precision'], row['recall'], row['f1-score'],
+                                      int(row['support']), width=width, digits=digits)
+    return text
+
+
+def _config_value(value):
+    return f"{value:,}" if isinstance(value, int) and not isinstance(value, bool) else value
+
+
+def _importance_lines(section, limit=20):
+    columns = section['columns']
+    value, *spread = [columns.index(c) for c in section['report_columns'][1:]]
+    feature = columns.index(section['report_columns'][0])
+    lines = []
+    for i, row in enumerate(section['rows'][:limit]):
+        score = f"{row[value]:.4f}" + "".join(f" ± {row[j]:.4f}" for j in spread)
+        lines.append(f"{i+1:2}. [{score}] {row[feature]}\n")
+    return lines
+
+
+def write_report(artifact, path):
+    """The *_evaluation_report.txt of a run, from its artifact"""
+    report = artifact['report']
+    metrics = artifact['metrics']
+    with open(path, 'w') as f:
+        f.write("=" * 80 + "\n")
+        f.write(f"{report['title']}\n")
+        f.write("16 Personality Types (MBTI) Classification\n")
+        f.write("=" * 80 + "\n\n")
+
+        f.write("CONFIGURATION\n")
+        f.write("-" * 40 + "\n")
+        for label, value in artifact['config'].items():
+            f.write(f"{label}: {_config_value(value)}\n")
+        f.write("\n")
+
+        f.write(f"{report['params_title']}\n")
+        f.write("-" * 40 + "\n")
+        for key, value in artifact['params'].items():
+            f.write(f"{key}: {value}\n")
+        for key, value in artifact['model_info'].items():
+            f.write(f"{key}: {value}\n")
+        f.write("\n")
+
+        f.write("ACCURACY SCORES\n")
+        f.write("-" * 40 + "\n")
+        for key, label in [('train_accuracy', 'Training Accuracy:   '),
+                           ('validation_accuracy', 'Validation Accuracy: '),
+                           ('oob_accuracy', 'OOB Accuracy:        '),
+                           ('test_accuracy', 'Test Accuracy:       ')]:
+            if key in metrics:
+                f.write(f"{label}{metrics[key]:.4f} ({metrics[key]*100:.2f}%)\n")
+        f.write("\n")
+
+        f.write("TOP-K ACCURACY (Test Set)\n")
+        f.write("-" * 40 + "\n")
+        for k, top_k_acc in metrics['top_k_accuracy'].items():
+            f.write(f"Top-{k} Accuracy: {top_k_acc:.4f} ({top_k_acc*100:.2f}%)\n")
+        f.write("\n")
+
+        f.write("CLASSIFICATION REPORT (Test Set)\n")
+        f.write("-" * 80 + "\n")
+        f.write(format_classification_report(metrics['classification_report']))
+        f.write("\n")
+
+        f.write(f"{artifact['feature_importance']['title']}\n")
+        f.write("-" * 80 + "\n")
+        f.writelines(_importance_lines(artifact['feature_importance']))
+
+        if 'oob' in artifact:
+            f.write("\n")
+            f.write("OUT-OF-BAG CLASSIFICATION REPORT (Train+Validation)\n")
+            f.write("-" * 80 + "\n")
+            f.write(format_classification_report(artifact['oob']['classification_report']))
+            f.write("\n")
+
+            f.write(f"{artifact['oob']['permutation_importance']['title']}\n")
+            f.write("-" * 80 + "\n")
+            f.writelines(_importance_lines(artifact['oob']['permutation_importance']))
+
+
+def importance_frame(section):
+    return pd.DataFrame(section['rows'], columns=section['columns'])
+
+
+def save_figure_data(artifact, path):
+    """The figure results file of a run (see render_figures.py), from its artifact"""
+    metrics = artifact['metrics']
+    section = artifact['feature_importance']
+    feature, value = (section['columns'].index(c) for c in section['report_columns'][:2])
+    rows = section['rows'][:20]
+    values = {}
+    if 'validation_mlogloss' in artifact:
+        values['val_loss'] = np.asarray(artifact['validation_mlogloss'])
+        values['best_iteration'] = artifact['model_info']['best_iteration']
+    save_results(path, 'classifier', prefix=artifact['model'], class_names=metrics['class_names'],
+                 cm=np.asarray(metrics['confusion_matrix']),
+                 top_features=[row[feature] for row in rows],
+                 top_importance=np.array([row[value] for row in rows]),
+                 test_acc=metrics['test_accuracy'], **values)
+
+
+def report_from_cache(artifact, prefix, figures=True):
+    """Regenerate a cached run's report, importance CSV(s) and figures and summarize it"""
+    metrics = artifact['metrics']
+    print(f"\n  -> Found run {artifact['key']} from {artifact['created']} "
+          f"(same data, split and hyperparameters); skipping training")
+    write_report(artifact, f"{prefix}_evaluation_report.txt")
+    print(f"  -> Saved: {prefix}_evaluation_report.txt")
+    importance_frame(artifact['feature_importance']).to_csv(f"{prefix}_feature_importance.csv", index=False)
+    print(f"  -> Saved: {prefix}_feature_importance.csv")
+    if 'oob' in artifact:
+        importance_frame(artifact['oob']['permutation_importance']).to_csv(
+            f"{prefix}_oob_permutation_importance.csv", index=False)
+        print(f"  -> Saved: {prefix}_oob_permutation_importance.csv")
+
+    figure_data_path = f"figures/{prefix}_figure_data.npz"
+    save_figure_data(artifact, figure_data_path)
+    print(f"  -> Saved: {figure_data_path}")
+    if not figures:
+        print(f"  -> Figures skipped; render them with: python ../render_figures.py {figure_data_path}")
+    elif not render_in_new_process([figure_data_path]):
+        print(f"  [!] Rendering failed; retry with: python ../render_figures.py {figure_data_path}")
+
+    print("\n" + "=" * 80)
+    print("SUMMARY (cached run)")
+    print("=" * 80)
+    print(f"""
+Model: {artifact['report']['model_name']}
+Run: {artifact_path(ARTIFACT_DIR, artifact['model'], artifact['key'])}
+Dataset hash: {artifact['dataset_hash']}  Split hash: {artifact['split_hash']}
+
+RESULTS:
+  • Test Accuracy: {metrics['test_accuracy']:.2%}
+  • Top-3 Accuracy: {metrics['top_k_accuracy']['3']:.2%}
+  • Macro F1-Score: {metrics['macro_f1']:.4f}
+  • Original fit time: {artifact['timings']['fit_s']:.1f}s
+
+Use --no-cache to retrain.
+""")
+    print("=" * 80)
+
+
+# =============================================================================
+# Comparison table
+# =============================================================================
+
+def comparison_row(artifact):
+    metrics = artifact['metrics']
+    row = {'model': artifact['model'], 'key': artifact['key'], 'created': artifact['created'],
+           'dataset_hash': artifact['dataset_hash'], 'split_hash': artifact['split_hash'],
+           'params': json.dumps(artifact['params'], sort_keys=True)}
+    row.update({name: value for name, value in metrics.items() if isinstance(value, float)})
+    row.update({f"top_{k}_accuracy": value for k, value in metrics['top_k_accuracy'].items()})
+    row.update(artifact['timings'])
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Collect run artifacts into one comparison table')
+    parser.add_argument('artifacts', nargs='*', help='Artifact JSON files (default: */runs/*.json)')
+    parser.add_argument('--output', default=os.path.join('All_Techniques', 'run_comparison.parquet'))
+    args = parser.parse_args()
+
+    paths = args.artifacts or sorted(glob.glob(os.path.join('*', ARTIFACT_DIR, '*.json')))
+    rows = []
+    for path in paths:
+        with open(path) as f:
+            rows.append(comparison_row(json.load(f)))
+    if not rows:
+        print("No run artifacts found")
+        return
+    table = pd.DataFrame(rows).sort_values(['model', 'created'])
+    print(table[['model', 'key', 'created', 'test_accuracy', 'macro_f1', 'fit_s']].to_string(index=False))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    try:
+        table.to_parquet(args.output, index=False)
+        print(f"\nSaved: {args.output}")
+    except ImportError:
+        output = os.path.splitext(args.output)[0] + '.csv'
+        table.to_csv(output, index=False)
+        print(f"\nSaved: {output} (no Parquet engine installed)")
+
+
+if __name__ == '__main__':
+    main()
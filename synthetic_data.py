@@ -0,0 +1,253 @@
+"""
+Synthetic Survey Response Generator
+===================================
+
+Fits a per-type model of the survey answers on 16P_eda_cleaned.csv and
+samples any number of realistic (answers, Personality) rows from it, for
+benchmarking training, EDA and the API at 1M-100M rows.
+
+Model (a Gaussian copula per personality type):
+- type priors from the class counts
+- for every type and question, the probabilities of the 7 answer levels
+  (add-half smoothed), stored as cut points on a standard normal scale
+- for every type, the 60 x 60 correlation of the answers' normal scores,
+  kept as its Cholesky factor
+
+Sampling draws a type, a correlated normal vector z = L e, and reads each
+answer off the cut points. Rows are generated in blocks with one RNG per
+block, seeded from (seed, block index), so a given seed and block size
+always produce the same file.
+
+Output is either CSV in the 16P_eda_cleaned.csv layout (add --with-id for
+the raw 16P.csv layout), written with vectorized byte assembly, or a binary
+dataset: <prefix>.answers.npy (int8, rows x 60), <prefix>.labels.npy
+(uint8 type index) and <prefix>.json (question and type names). The
+binary files can be memory-mapped with load_binary().
+
+Usage:
+    python synthetic_data.py --rows 1000000 --seed 42 --output synthetic_1M.csv
+    python synthetic_data.py --rows 100000000 --format binary --output synthetic_100M
+    python synthetic_data.py --fit-only --data 16P_eda_cleaned.csv --model synthetic_model.npz
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+
+from eda_profile import (ID_COLUMN, LIKERT_LEVELS, TARGET_COLUMN, answer_matrix,
+                         feature_columns, level_counts)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(SCRIPT_DIR, '16P_eda_cleaned.csv')
+MODEL_PATH = os.path.join(SCRIPT_DIR, 'synthetic_model.npz')
+BLOCK_ROWS = 250_000
+# Added to every level count before computing the marginals
+SMOOTHING = 0.5
+# Shrinkage of the correlation matrices toward the identity (keeps them positive definite)
+SHRINKAGE = 1e-3
+
+
+class ResponseModel:
+    """Per-type Gaussian copula over the 7-level answers"""
+
+    def __init__(self, columns, classes, priors, cut_points, cholesky):
+        self.columns = list(columns)
+        self.classes = list(classes)
+        self.priors = np.asarray(priors, dtype=np.float64)
+        self.cut_points = np.asarray(cut_points, dtype=np.float64)   # (types, questions, 6)
+        self.cholesky = np.asarray(cholesky, dtype=np.float64)       # (types, questions, questions)
+
+    @classmethod
+    def fit(cls, df):
+        columns = feature_columns(df)
+        X, _ = answer_matrix(df, columns)
+        X = np.asarray(X, dtype=np.float64)
+        labels, classes = pd.factorize(df[TARGET_COLUMN], sort=True)
+        n_levels = len(LIKERT_LEVELS)
+
+        priors = np.bincount(labels, minlength=len(classes)) / len(labels)
+        cut_points = np.zeros((len(classes), len(columns), n_levels - 1))
+        cholesky = np.zeros((len(classes), len(columns), len(columns)))
+        for c in range(len(classes)):
+            X_c = X[labels == c]
+            probabilities = level_counts(X_c) + SMOOTHING
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            cdf = np.cumsum(probabilities, axis=1)
+            cut_points[c] = ndtri(cdf[:, :-1])
+
+            # Normal score of each level: the middle of its probability interval
+            scores = ndtri(cdf - probabilities / 2)
+            codes = np.clip(np.nan_to_num(X_c - LIKERT_LEVELS[0]), 0, n_levels - 1).astype(int)
+            Z = np.take_along_axis(scores.T, codes, axis=0)
+            corr = np.nan_to_num(np.corrcoef(Z, rowvar=False))
+            np.fill_diagonal(corr, 1.0)
+            corr = (1 - SHRINKAGE) * corr + SHRINKAGE * np.eye(len(columns))
+            cholesky[c] = np.linalg.cholesky(corr)
+        return cls(columns, classes, priors, cut_points, cholesky)
+
+    def save(self, path):
+        np.savez_compressed(path, columns=json.dumps(self.columns), classes=json.dumps(self.classes),
+                            priors=self.priors, cut_points=self.cut_points, cholesky=self.cholesky)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(json.loads(str(data['columns'])), json.loads(str(data['classes'])),
+                       data['priors'], data['cut_points'], data['cholesky'])
+
+    def sample_block(self, n_rows, rng):
+        """(answers int8 (n_rows, questions), type index uint8 (n_rows,))"""
+        labels = rng.choice(len(self.classes), size=n_rows, p=self.priors).astype(np.uint8)
+        z = rng.standard_normal((n_rows, len(self.columns)))
+        answers = np.full(z.shape, LIKERT_LEVELS[0], dtype=np.int8)
+        for c in range(len(self.classes)):
+            rows = np.flatnonzero(labels == c)
+            if len(rows) == 0:
+                continue
+            z_c = z[rows] @ self.cholesky[c].T
+            levels = np.zeros(z_c.shape, dtype=np.int8)
+            for k in range(self.cut_points.shape[2]):
+                levels += z_c > self.cut_points[c, :, k]
+            answers[rows] += levels
+        return answers, labels
+
+    def sample(self, n_rows, seed=42, block_rows=BLOCK_ROWS):
+        """Yield (start row, answers, labels) blocks covering n_rows rows"""
+        for block, start in enumerate(range(0, n_rows, block_rows)):
+            rng = np.random.default_rng([seed, block])
+            answers, labels = self.sample_block(min(block_rows, n_rows - start), rng)
+            yield start, answers, labels
+
+
+# =============================================================================
+# Output formats
+# =============================================================================
+
+def _digits(values, width):
+    """(n, width) ASCII digits of non-negative integers, leading zeros as 0 bytes"""
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    digits = (values[:, None] // powers) % 10
+    significant = np.cumsum(digits > 0, axis=1) > 0
+    significant[:, -1] = True
+    return np.where(significant, digits + ord('0'), 0).astype(np.uint8)
+
+
+def csv_block(answers, labels, class_names, ids=None):
+    """CSV lines for one block as bytes, built without per-row Python work
+
+    Every row is laid out in fixed-width byte slots (sign, digit, comma per
+    answer); unused slots hold 0 bytes and are dropped at the end.
+    """
+    n_rows, n_answers = answers.shape
+    parts = []
+    if ids is not None:
+        parts += [_digits(ids, 12), np.full((n_rows, 1), ord(','), dtype=np.uint8)]
+    cells = np.zeros((n_rows, n_answers, 3), dtype=np.uint8)
+    cells[:, :, 0] = np.where(answers < 0, ord('-'), 0)
+    cells[:, :, 1] = np.abs(answers) + ord('0')
+    cells[:, :, 2] = ord(',')
+    parts.append(cells.reshape(n_rows, -1))
+    names = np.frombuffer(''.join(class_names).encode('ascii'), dtype=np.uint8).reshape(len(class_names), -1)
+    parts.append(names[labels])
+    parts.append(np.full((n_rows, 1), ord('\n'), dtype=np.uint8))
+    rows = np.concatenate(parts, axis=1).ravel()
+    return rows[rows != 0].tobytes()
+
+
+def write_csv(model, path, n_rows, seed, block_rows, with_id=False, on_block=None):
+    if len({len(name) for name in model.classes}) != 1:
+        raise ValueError('CSV writer expects equal-length type names')
+    header = ([ID_COLUMN] if with_id else []) + model.columns + [TARGET_COLUMN]
+    with open(path, 'wb') as f:
+        f.write(pd.DataFrame(columns=header).to_csv(index=False).encode('utf-8'))
+        for start, answers, labels in model.sample(n_rows, seed, block_rows):
+            ids = np.arange(start, start + len(labels)) if with_id else None
+            f.write(csv_block(answers, labels, model.classes, ids))
+            if on_block:
+                on_block(start + len(labels))
+
+
+def write_binary(model, prefix, n_rows, seed, block_rows, on_block=None):
+    answers_out = np.lib.format.open_memmap(f'{prefix}.answers.npy', mode='w+', dtype=np.int8,
+                                            shape=(n_rows, len(model.columns)))
+    labels_out = np.lib.format.open_memmap(f'{prefix}.labels.npy', mode='w+', dtype=np.uint8,
+                                           shape=(n_rows,))
+    for start, answers, labels in model.sample(n_rows, seed, block_rows):
+        answers_out[start:start + len(labels)] = answers
+        labels_out[start:start + len(labels)] = labels
+        if on_block:
+            on_block(start + len(labels))
+    answers_out.flush()
+    labels_out.flush()
+    with open(f'{prefix}.json', 'w') as f:
+        json.dump({'rows': n_rows, 'seed': seed, 'block_rows': block_rows,
+                   'columns': model.columns, 'classes': model.classes}, f, indent=2)
+
+
+def load_binary(prefix, mmap_mode='r'):
+    """(answers, labels, metadata) of a binary dataset, memory-mapped by default"""
+    with open(f'{prefix}.json') as f:
+        metadata = json.load(f)
+    answers = np.load(f'{prefix}.answers.npy', mmap_mode=mmap_mode)
+    labels = np.load(f'{prefix}.labels.npy', mmap_mode=mmap_mode)
+    return answers, labels, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic survey responses')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=['csv', 'binary'], default='csv')
+    parser.add_argument('--output', help='CSV path, or path prefix for --format binary')
+    parser.add_argument('--with-id', action='store_true', help='Add a Response Id column (16P.csv layout)')
+    parser.add_argument('--block-rows', type=int, default=BLOCK_ROWS)
+    parser.add_argument('--data', default=DATA_PATH, help='Responses to fit the model on')
+    parser.add_argument('--model', default=MODEL_PATH, help='Fitted model (created if missing)')
+    parser.add_argument('--refit', action='store_true', help='Refit even if the model file exists')
+    parser.add_argument('--fit-only', action='store_true')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SYNTHETIC RESPONSE GENERATOR")
+    print("=" * 60)
+
+    if os.path.exists(args.model) and not args.refit:
+        model = ResponseModel.load(args.model)
+        print(f"Loaded model: {args.model}")
+    else:
+        start = time.perf_counter()
+        df = pd.read_csv(args.data)
+        model = ResponseModel.fit(df)
+        model.save(args.model)
+        print(f"Fitted on {len(df):,} rows of {args.data} in {time.perf_counter() - start:.1f}s")
+        print(f"Saved: {args.model}")
+    print(f"  {len(model.classes)} types, {len(model.columns)} questions")
+    if args.fit_only:
+        return
+
+    output = args.output or f"synthetic_{args.rows}{'.csv' if args.format == 'csv' else ''}"
+    start = time.perf_counter()
+    report_every = max(args.rows // 10, 1)
+    next_report = [report_every]
+
+    def on_block(done):
+        if done >= next_report[0] or done == args.rows:
+            elapsed = time.perf_counter() - start
+            print(f"  {done:>12,} rows  {elapsed:7.1f}s  ({done / elapsed:,.0f} rows/s)")
+            next_report[0] = done + report_every
+
+    if args.format == 'csv':
+        write_csv(model, output, args.rows, args.seed, args.block_rows, args.with_id, on_block)
+        print(f"Saved: {output} ({os.path.getsize(output) / 1e6:,.0f} MB)")
+    else:
+        write_binary(model, output, args.rows, args.seed, args.block_rows, on_block)
+        print(f"Saved: {output}.answers.npy, {output}.labels.npy, {output}.json")
+
+
+if __name__ == '__main__':
+    main()
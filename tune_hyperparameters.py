@@ -0,0 +1,418 @@
+"""
+Hyperparameter Search with Successive Halving / Hyperband
+=========================================================
+
+RF_PARAMS, XGBOOST_PARAMS, LOGISTIC_PARAMS and LDA_PARAMS in the technique
+scripts are hand-picked. This script searches a grid of candidate values
+for each model family and writes the best configuration of each to a params
+file that the scripts load with --params:
+
+    python random_forest/rf_classifier.py --params best_params.json
+
+Search:
+- Configurations are drawn from each family's grid (SEARCH_SPACES) and
+  scored on the validation set of the shared 70/15/15 split
+  (data_split_indices.json from create_fixed_splits.py when present,
+  otherwise the identical stratified split). The test set is never used.
+- Successive halving evaluates n configurations on a small budget, keeps the
+  best 1/eta of them, and multiplies the budget by eta until the survivors
+  run at the full budget. Hyperband (the default) runs several such
+  brackets, from many configurations on a tiny budget down to a few on the
+  full one.
+- Budget: a fraction of the trees for Random Forest (of RF_MAX_TREES) and of
+  the boosting rounds for XGBoost (of XGB_MAX_ROUNDS, still with early
+  stopping), and a fraction of the training rows for LR and LDA.
+- Trials run in a process pool, one thread each. Every finished trial is
+  appended to a JSON-lines store, keyed by family, configuration, budget,
+  metric and split. The brackets are seeded, so re-running resumes: trials
+  already in the store are not run again.
+
+At the end the CPU time of the search is compared with a plain grid search:
+every configuration of the grid at full budget, estimated from the mean CPU
+time of the full-budget trials.
+
+Usage:
+    python tune_hyperparameters.py [--families xgb rf lr lda] [--mode hyperband|sha] [--workers 8]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import ParameterGrid, train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from threadpoolctl import threadpool_limits
+from xgboost import XGBClassifier
+
+from model_params import EARLY_STOPPING_ROUNDS, RANDOM_STATE, load_params
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(SCRIPT_DIR, '16P_eda_cleaned.csv')
+SPLITS_PATH = os.path.join(SCRIPT_DIR, 'data_split_indices.json')
+STORE_PATH = os.path.join(SCRIPT_DIR, 'tuning_trials.jsonl')
+PARAMS_PATH = os.path.join(SCRIPT_DIR, 'best_params.json')
+# Written next to the params file
+SUMMARY_NAME = 'tuning_summary.csv'
+
+# Data splits (same as every technique script)
+TEST_SIZE = 0.15      # 15% for test
+VAL_SIZE = 0.176      # 15% of remaining 85% ≈ 15% of total
+
+MODEL_NAMES = {
+    'xgb': 'XGBoost',
+    'rf': 'Random Forest',
+    'lr': 'Logistic Regression',
+    'lda': 'LDA'
+}
+
+# Hyperparameters of the technique scripts (model_params.py); searched values
+# override them, n_estimators comes from the budget, and n_jobs=1: the pool
+# provides the parallelism
+BASE_PARAMS = {
+    family: {key: 1 if key == 'n_jobs' else value
+             for key, value in load_params(family).items() if key != 'n_estimators'}
+    for family in MODEL_NAMES
+}
+
+# Full budget of the tree families
+XGB_MAX_ROUNDS = 500
+RF_MAX_TREES = 100
+
+# Candidate values; a list of grids is their union (as in sklearn's ParameterGrid)
+SEARCH_SPACES = {
+    'xgb': {
+        'learning_rate': [0.03, 0.05, 0.1, 0.2],
+        'max_depth': [3, 4, 6, 8],
+        'min_child_weight': [1, 3, 5],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.5, 0.8, 1.0],
+        'reg_lambda': [1.0, 5.0]
+    },
+    'rf': {
+        'max_depth': [10, 20, 30, None],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 'log2', 0.3],
+        'criterion': ['gini', 'entropy']
+    },
+    'lr': {
+        'C': [0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0],
+        'class_weight': [None, 'balanced']
+    },
+    'lda': [
+        {'solver': ['svd'], 'tol': [1e-4, 1e-3]},
+        # 'eigen' keeps transform() and scalings_, which lda_classifier.py uses
+        {'solver': ['eigen'], 'shrinkage': [None, 'auto', 0.001, 0.01, 0.03, 0.1, 0.3]}
+    ]
+}
+
+# Halving rate and number of halvings (smallest budget = ETA ** -MAX_LEVEL)
+ETA = 3
+MAX_LEVEL = 3
+
+# Per-worker state, set by init_worker
+_worker = {}
+
+
+# =============================================================================
+# Data
+# =============================================================================
+
+def load_splits(data_path, splits_path):
+    """(X_train, y_train, X_val, y_val, X_test, y_test, class_names, split_hash) of the shared split
+
+    split_hash identifies the data and the train/validation rows.
+    """
+    df = pd.read_csv(data_path)
+    if 'Response Id' in df.columns:
+        df = df.drop(columns=['Response Id'])
+    X = df.drop(columns=['Personality'])
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(df['Personality'])
+
+    if splits_path and os.path.exists(splits_path):
+        with open(splits_path) as f:
+            splits = json.load(f)
+        train_index = np.asarray(splits['train_indices'])
+        val_index = np.asarray(splits['val_indices'])
+        test_index = np.asarray(splits['test_indices'])
+        print(f"  -> Splits: {splits_path}")
+    else:
+        # Same two stratified splits as the technique scripts
+        index = np.arange(len(df))
+        temp_index, test_index = train_test_split(index, test_size=TEST_SIZE,
+                                                  random_state=RANDOM_STATE, stratify=y)
+        train_index, val_index = train_test_split(temp_index, test_size=VAL_SIZE,
+                                                  random_state=RANDOM_STATE, stratify=y[temp_index])
+        print(f"  -> Splits: stratified 70/15/15, random_state={RANDOM_STATE}")
+
+    X = np.ascontiguousarray(X.to_numpy(), dtype=np.float32)
+    digest = hashlib.sha256()
+    for array in (train_index, val_index, y):
+        digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+    digest.update(X.tobytes())
+    return (X[train_index], y[train_index], X[val_index], y[val_index],
+            X[test_index], y[test_index], list(label_encoder.classes_), digest.hexdigest()[:16])
+
+
+# =============================================================================
+# Trials
+# =============================================================================
+
+def make_model(family, config, budget, n_classes):
+    params = {**BASE_PARAMS[family], **config}
+    if family == 'xgb':
+        return XGBClassifier(**params, num_class=n_classes,
+                             n_estimators=max(1, round(XGB_MAX_ROUNDS * budget)),
+                             early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    if family == 'rf':
+        return RandomForestClassifier(**params, n_estimators=max(1, round(RF_MAX_TREES * budget)))
+    if family == 'lr':
+        return make_pipeline(StandardScaler(), LogisticRegression(**params))
+    if family == 'lda':
+        return make_pipeline(StandardScaler(), LinearDiscriminantAnalysis(**params))
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def score(proba, y, metric):
+    """Higher is better for both metrics (neg_log_loss is the mean log-likelihood)"""
+    if metric == 'accuracy':
+        return float(np.mean(proba.argmax(axis=1) == y))
+    picked = proba[np.arange(len(y)), y]
+    return float(np.mean(np.log(np.clip(picked, 1e-15, 1.0))))
+
+
+def init_worker(X_train, y_train, X_val, y_val, n_classes, metric):
+    threadpool_limits(1)
+    # Row budgets take a prefix of one fixed shuffle of the training rows
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(y_train))
+    _worker.update(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val,
+                   order=order, n_classes=n_classes, metric=metric)
+
+
+def run_trial(task):
+    """Fit one configuration at one budget; returns the task with its result"""
+    family, config, budget = task
+    X_train, y_train = _worker['X_train'], _worker['y_train']
+    if family in ('lr', 'lda'):
+        rows = _worker['order'][:max(_worker['n_classes'] * 10, round(len(y_train) * budget))]
+        X_train, y_train = X_train[rows], y_train[rows]
+    model = make_model(family, config, budget, _worker['n_classes'])
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    if family == 'xgb':
+        model.fit(X_train, y_train, eval_set=[(_worker['X_val'], _worker['y_val'])], verbose=False)
+    else:
+        model.fit(X_train, y_train)
+    value = score(model.predict_proba(_worker['X_val']), _worker['y_val'], _worker['metric'])
+    result = {'score': value,
+              'cpu_seconds': time.process_time() - cpu_start,
+              'wall_seconds': time.perf_counter() - wall_start}
+    if family == 'xgb':
+        result['best_iteration'] = int(model.best_iteration)
+    return task, result
+
+
+def trial_key(family, config, budget, metric, split_hash):
+    return json.dumps([family, config, round(budget, 6), metric, split_hash], sort_keys=True)
+
+
+class TrialStore:
+    """Append-only JSON-lines store of finished trials"""
+
+    def __init__(self, path):
+        self.path = path
+        self.trials = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        trial = json.loads(line)
+                        self.trials[trial['key']] = trial
+
+    def get(self, key):
+        return self.trials.get(key)
+
+    def add(self, key, trial):
+        trial = dict(trial, key=key)
+        self.trials[key] = trial
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(trial) + '\n')
+
+
+# =============================================================================
+# Successive halving / Hyperband
+# =============================================================================
+
+class Bracket:
+    """One successive-halving bracket: n configurations, halved s times"""
+
+    def __init__(self, family, s, configs, eta):
+        self.family = family
+        self.s = s
+        self.eta = eta
+        self.rung = 0
+        self.configs = configs
+
+    @property
+    def done(self):
+        return self.rung > self.s
+
+    @property
+    def budget(self):
+        return float(self.eta ** (self.rung - self.s))
+
+    def tasks(self):
+        return [(self.family, config, self.budget) for config in self.configs]
+
+    def advance(self, scores):
+        """scores: one per current configuration; keep the best 1/eta"""
+        if self.rung < self.s:
+            keep = max(1, len(self.configs) // self.eta)
+            order = sorted(range(len(self.configs)), key=lambda i: -scores[i])
+            self.configs = [self.configs[i] for i in order[:keep]]
+        self.rung += 1
+
+
+def make_brackets(family, grid, mode, eta, max_level, seed):
+    """Seeded brackets of one family; the same arguments give the same brackets"""
+    levels = [max_level] if mode == 'sha' else range(max_level, -1, -1)
+    brackets = []
+    for s in levels:
+        if mode == 'sha':
+            n = eta ** s
+        else:
+            n = math.ceil((max_level + 1) / (s + 1) * eta ** s)
+        rng = np.random.default_rng([seed, list(MODEL_NAMES).index(family), s])
+        picks = rng.choice(len(grid), size=min(n, len(grid)), replace=False)
+        brackets.append(Bracket(family, s, [grid[int(i)] for i in picks], eta))
+    return brackets
+
+
+def search(brackets, store, pool, metric, split_hash):
+    """Run all brackets rung by rung, every rung's trials in one parallel batch"""
+    start = time.perf_counter()
+    round_ = 0
+    while any(not b.done for b in brackets):
+        active = [b for b in brackets if not b.done]
+        tasks = [task for b in active for task in b.tasks()]
+        keys = [trial_key(*task, metric, split_hash) for task in tasks]
+        pending = list({key: task for key, task in zip(keys, tasks) if store.get(key) is None}.values())
+        for task, result in pool.imap_unordered(run_trial, pending):
+            family, config, budget = task
+            store.add(trial_key(*task, metric, split_hash),
+                      dict(result, family=family, config=config, budget=budget,
+                           metric=metric, split=split_hash))
+
+        for b in active:
+            b.advance([store.get(trial_key(*task, metric, split_hash))['score'] for task in b.tasks()])
+        round_ += 1
+        print(f"  Round {round_}: {len(tasks):4d} trials ({len(tasks) - len(pending)} from store)  "
+              f"{time.perf_counter() - start:7.1f}s")
+
+
+def best_config(family, store, metric, split_hash):
+    """Best full-budget trial of a family in the store"""
+    trials = [t for t in store.trials.values()
+              if t['family'] == family and t['metric'] == metric and t['split'] == split_hash
+              and t['budget'] == 1.0]
+    return max(trials, key=lambda t: t['score']) if trials else None
+
+
+def cost_summary(family, grid_size, store, metric, split_hash):
+    """CPU hours spent on this family vs a full-budget grid search"""
+    trials = [t for t in store.trials.values()
+              if t['family'] == family and t['metric'] == metric and t['split'] == split_hash]
+    full = [t['cpu_seconds'] for t in trials if t['budget'] == 1.0]
+    spent = sum(t['cpu_seconds'] for t in trials) / 3600
+    grid = grid_size * float(np.mean(full)) / 3600 if full else float('nan')
+    return {'Model': MODEL_NAMES[family], 'Trials': len(trials),
+            'Configs Tried': len({json.dumps(t['config'], sort_keys=True) for t in trials}),
+            'Grid Configs': grid_size, 'CPU Hours': spent,
+            'Grid CPU Hours (est.)': grid, 'Speedup': grid / spent if spent else float('nan')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Successive-halving / Hyperband search per model family')
+    parser.add_argument('--families', nargs='+', choices=list(MODEL_NAMES), default=list(MODEL_NAMES))
+    parser.add_argument('--mode', choices=['hyperband', 'sha'], default='hyperband',
+                        help='All brackets, or successive halving from the smallest budget only')
+    parser.add_argument('--eta', type=int, default=ETA)
+    parser.add_argument('--max-level', type=int, default=MAX_LEVEL,
+                        help='Halvings in the largest bracket (smallest budget = eta^-max_level)')
+    parser.add_argument('--metric', choices=['accuracy', 'neg_log_loss'], default='accuracy')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=RANDOM_STATE)
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--splits', default=SPLITS_PATH)
+    parser.add_argument('--store', default=STORE_PATH, help='Trial results (appended, resumable)')
+    parser.add_argument('--output', default=PARAMS_PATH, help='Best configuration per family')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("HYPERPARAMETER SEARCH")
+    print(f"Models: {', '.join(MODEL_NAMES[f] for f in args.families)}")
+    print(f"{args.mode}, eta={args.eta}, smallest budget 1/{args.eta ** args.max_level}, "
+          f"metric: {args.metric}, {args.workers} workers")
+    print("=" * 60)
+
+    X_train, y_train, X_val, y_val, _, _, class_names, split_hash = load_splits(args.data, args.splits)
+    print(f"  -> Training: {len(y_train):,}  Validation: {len(y_val):,}  (split {split_hash})")
+    store = TrialStore(args.store)
+    if store.trials:
+        print(f"  -> Store: {len(store.trials):,} trials in {args.store}")
+
+    grids = {family: ParameterGrid(SEARCH_SPACES[family]) for family in args.families}
+    brackets = [b for family in args.families
+                for b in make_brackets(family, grids[family], args.mode, args.eta, args.max_level, args.seed)]
+
+    with Pool(args.workers, initializer=init_worker,
+              initargs=(X_train, y_train, X_val, y_val, len(class_names), args.metric)) as pool:
+        search(brackets, store, pool, args.metric, split_hash)
+
+    best = {}
+    if os.path.exists(args.output):
+        with open(args.output) as f:
+            best = json.load(f)
+    rows = []
+    print("\n" + "=" * 60)
+    print(f"BEST CONFIGURATIONS (validation {args.metric})")
+    print("=" * 60)
+    for family in args.families:
+        trial = best_config(family, store, args.metric, split_hash)
+        params = dict(trial['config'])
+        if family == 'xgb':
+            params['n_estimators'] = XGB_MAX_ROUNDS
+        elif family == 'rf':
+            params['n_estimators'] = RF_MAX_TREES
+        best[family] = {'params': params, 'val_score': trial['score'], 'metric': args.metric,
+                        'split': split_hash}
+        print(f"  {MODEL_NAMES[family]:<20} {trial['score']:.4f}  {params}")
+        rows.append(cost_summary(family, len(grids[family]), store, args.metric, split_hash))
+    with open(args.output, 'w') as f:
+        json.dump(best, f, indent=2)
+    print(f"Saved: {args.output}")
+
+    summary = pd.DataFrame(rows)
+    print("\nCost vs grid search (every grid configuration at full budget):")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    total, grid_total = summary['CPU Hours'].sum(), summary['Grid CPU Hours (est.)'].sum()
+    print(f"Total: {total:.4f} CPU hours vs {grid_total:.4f} estimated for grid search "
+          f"({grid_total / total:.1f}x)")
+    summary_path = os.path.join(os.path.dirname(os.path.abspath(args.output)), SUMMARY_NAME)
+    summary.to_csv(summary_path, index=False)
+    print(f"Saved: {summary_path}")
+
+
+if __name__ == '__main__':
+    main()
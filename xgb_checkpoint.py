@@ -0,0 +1,177 @@
+"""
+Resumable XGBoost Training Checkpoints
+======================================
+
+Used by gradient_boosting/xgboost_classifier.py and
+Feature_Selection_Analysis/train_short_model.py, which run up to 500
+boosting rounds with early stopping.
+
+CheckpointCallback saves the booster every K rounds to <directory>/<name>.ubj,
+together with the evaluation history so far (<name>.json). The history file
+is written after the booster and records how many rounds it covers, so a
+crash between the two writes never leaves a history that runs ahead of the
+model. fit_with_checkpoints() wraps XGBClassifier.fit:
+
+- if a checkpoint for the same parameters and data exists, training
+  continues from it (xgb_model continuation) for the remaining rounds;
+  if that run had already finished, the model is loaded without training
+- early stopping is applied to the combined history of all sessions: the
+  best round is the best validation score over every round trained, and
+  the model predicts with the trees up to it
+- when training ends, the rounds-vs-validation-metric curve is written to
+  <directory>/<name>_eval_history.csv, so the truncation point for serving
+  can be chosen later without retraining
+
+Boosting draws its row and column subsamples from the booster's random
+state, which is not part of a checkpoint; rounds trained after a resume can
+differ slightly from an uninterrupted run.
+
+Usage (from a training script):
+    model, history = fit_with_checkpoints(XGBClassifier(**params, early_stopping_rounds=15),
+                                          X_train, y_train, X_val, y_val, 'checkpoints', 'xgb')
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+# Rounds between checkpoints
+DEFAULT_INTERVAL = 25
+# Metrics where higher is better (everything else is minimized)
+MAXIMIZE_METRICS = ('auc', 'aucpr', 'map', 'ndcg', 'pre')
+
+
+def fingerprint(params, *arrays):
+    """Hash of the hyperparameters and training data a checkpoint belongs to"""
+    digest = hashlib.sha256()
+    keep = {k: v for k, v in params.items() if k not in ('callbacks', 'n_jobs', 'verbosity')}
+    digest.update(json.dumps(keep, sort_keys=True, default=str).encode())
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def paths(directory, name):
+    """(booster, state, curve) file paths of a checkpoint"""
+    base = os.path.join(directory, name)
+    return base + '.ubj', base + '.json', base + '_eval_history.csv'
+
+
+def merge_history(history, evals_log):
+    """Previous sessions' history followed by this session's evals_log"""
+    merged = {data: {metric: list(values) for metric, values in metrics.items()}
+              for data, metrics in history.items()}
+    for data, metrics in evals_log.items():
+        for metric, values in metrics.items():
+            merged.setdefault(data, {}).setdefault(metric, []).extend(float(v) for v in values)
+    return merged
+
+
+def best_round(history):
+    """(index, score) of the best round by the last metric of the last eval set
+
+    This is the metric XGBoost's early stopping watches.
+    """
+    data = list(history)[-1]
+    metric = list(history[data])[-1]
+    values = np.asarray(history[data][metric])
+    index = int(values.argmax() if metric.split('@')[0] in MAXIMIZE_METRICS else values.argmin())
+    return index, float(values[index])
+
+
+def history_frame(history):
+    """One row per boosting round, one column per eval set and metric"""
+    columns = {f"{data}_{metric}": values
+               for data, metrics in history.items() for metric, values in metrics.items()}
+    frame = pd.DataFrame(columns)
+    frame.insert(0, 'round', np.arange(1, len(frame) + 1))
+    return frame
+
+
+class CheckpointCallback(xgb.callback.TrainingCallback):
+    """Saves the booster and the eval history every `interval` rounds"""
+
+    def __init__(self, directory, name, key, interval=DEFAULT_INTERVAL, history=None):
+        super().__init__()
+        self.directory = directory
+        self.name = name
+        self.key = key
+        self.interval = interval
+        self.history = history or {}
+        self.evals_log = {}
+
+    def save(self, model, finished=False):
+        os.makedirs(self.directory, exist_ok=True)
+        booster_path, state_path, _ = paths(self.directory, self.name)
+        history = merge_history(self.history, self.evals_log)
+        # Keep the .ubj extension: xgboost picks the format from it (and warns without one)
+        temp_path = booster_path[:-len('.ubj')] + '.tmp.ubj'
+        model.save_model(temp_path)
+        os.replace(temp_path, booster_path)
+        with open(state_path + '.tmp', 'w') as f:
+            json.dump({'key': self.key, 'rounds': model.num_boosted_rounds(),
+                       'finished': finished, 'history': history}, f)
+        os.replace(state_path + '.tmp', state_path)
+
+    def after_iteration(self, model, epoch, evals_log):
+        self.evals_log = evals_log
+        if model.num_boosted_rounds() % self.interval == 0:
+            self.save(model)
+        return False
+
+    def after_training(self, model):
+        self.save(model, finished=True)
+        return model
+
+
+def load_checkpoint(directory, name, key):
+    """(booster, state) of a matching checkpoint, or (None, None)"""
+    booster_path, state_path, _ = paths(directory, name)
+    if not (os.path.exists(booster_path) and os.path.exists(state_path)):
+        return None, None
+    with open(state_path) as f:
+        state = json.load(f)
+    if state['key'] != key:
+        print(f"  -> Checkpoint {state_path} is for other parameters or data; starting over")
+        return None, None
+    booster = xgb.Booster(model_file=booster_path)
+    if booster.num_boosted_rounds() > state['rounds']:
+        # Crashed after saving the booster but before its history
+        booster = booster[:state['rounds']]
+    return booster, state
+
+
+def fit_with_checkpoints(model, X_train, y_train, X_val, y_val, directory, name,
+                         interval=DEFAULT_INTERVAL, resume=True):
+    """Fit an XGBClassifier with early stopping on (X_val, y_val), resumably
+
+    Returns (fitted model, eval history {eval set: {metric: [per round]}}).
+    """
+    params = model.get_params()
+    total_rounds = params['n_estimators']
+    key = fingerprint(params, X_train, y_train, X_val, y_val)
+    booster, state = load_checkpoint(directory, name, key) if resume else (None, None)
+    history = state['history'] if state else {}
+    done = state['rounds'] if state else 0
+
+    if state and (state['finished'] or done >= total_rounds):
+        print(f"  -> Loaded finished run from checkpoint ({done} rounds), no training needed")
+        model.load_model(bytearray(booster.save_raw()))
+    else:
+        if done:
+            print(f"  -> Resuming from checkpoint at round {done}")
+        callback = CheckpointCallback(directory, name, key, interval, history)
+        model.set_params(n_estimators=total_rounds - done, callbacks=[callback])
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False, xgb_model=booster)
+        model.set_params(n_estimators=total_rounds, callbacks=None)
+        history = merge_history(history, callback.evals_log)
+
+    # Early stopping over every session's rounds, not just the last one
+    best, score = best_round(history)
+    model.get_booster().set_attr(best_iteration=str(best), best_score=str(score))
+    history_frame(history).to_csv(paths(directory, name)[2], index=False)
+    return model, history